@@ -3,9 +3,9 @@ import re
 import io
 import base64
 import black
+import numpy as np
 import pandas as pd
 import plotly.express as px
-import plotly.io as pio
 import plotly.graph_objects as go
 import google.generativeai as genai
 from contextlib import redirect_stdout
@@ -14,13 +14,29 @@ from langchain_community.document_loaders import PyPDFLoader
 from autogen import AssistantAgent
 import logging
 import ast
-import glob
+import time
+import functools
+import threading
+from typing import List, Optional
+from collections import OrderedDict
+from backend.utils.code_cache import CodeCache, schema_fingerprint
+from backend.utils.column_refs import referenced_columns
+from backend.utils.plot_payload import render_figure_payload
+from backend.utils.upload_catalog import upload_catalog, DATASET_EXTENSIONS
+from backend.utils.dataset_cache import dataset_cache, NormalizedIndex, NORMALIZED_MAX_VALUES
+from backend.utils.fast_path import AggregateFastPath, FastQuery, column_categories, describe_result, entity_nouns
+from backend.utils.approximate import (
+    APPROXIMATE_MODE, APPROXIMATE_MIN_ROWS, APPROXIMATE_REFINE, PILOT_ROWS, REPLICATES,
+    annotate_estimates, refinements, render_refinement_placeholder, sample_size,
+)
 
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 api_key=os.getenv("GOOGLE_API_KEY")
 
+PROFILE_CACHE_SIZE = int(os.getenv("ANALYTICS_PROFILE_CACHE_SIZE", "32"))
+
 class AnalyticsAgent(AssistantAgent):
     def __init__(self):
         super().__init__(
@@ -29,6 +45,10 @@ class AnalyticsAgent(AssistantAgent):
         )
         genai.configure(api_key=os.getenv("GOOGLE_API_KEY")) # type: ignore[attr-defined]
         self.model = genai.GenerativeModel("gemini-1.5-flash") # type: ignore[attr-defined]
+        self.code_cache = CodeCache()
+        self.fast_path = AggregateFastPath()
+        self.profiles: "OrderedDict[str, dict]" = OrderedDict()
+        self._profiles_lock = threading.Lock()  # upload jobs warm profiles from worker threads
 
     def extract_code(self, text: str) -> str:
         cleaned = text.strip()
@@ -72,6 +92,8 @@ Strict rules:
 - Don't use df = pd.read_csv(...).
 - Avoid fig.show().
 - Do not include extra closing ')' after multiline string blocks like data = """""".
+- To filter on string values, use the precomputed normalized index `norm` (case- and whitespace-insensitive):
+  `df[norm.eq("Brand", "maruti")]`, or `df[norm.isin("Brand", ["maruti", "honda"])]` for several values.
 
 
 ```python
@@ -102,22 +124,31 @@ Ensure the Python code is syntactically correct and executable without unmatched
         except Exception:
             return raw_code, summary
 
-    def load_file(self, file: dict) -> pd.DataFrame:
+    def load_file(self, file: dict, columns: Optional[List[str]] = None) -> pd.DataFrame:
         filename = file["name"]
         path = file.get("path")
         content = file.get("content")
+        sha256 = file.get("sha256")
+
+        # ✅ Prefer the converted Arrow copy; while it is still being built, parse the original
+        if sha256 and path and (filename.endswith(".csv") or filename.endswith(".xlsx")):
+            cached = dataset_cache.load(sha256, columns=columns)
+            if cached is not None:
+                logger.info(f"🗂️ Loaded memory-mapped dataset cache for {filename}")
+                return cached
+            dataset_cache.schedule(path, sha256)
 
         # ✅ Prefer reading from disk if path is provided
         if path and os.path.exists(path):
             logger.info(f"📂 Loading file from disk: {path}")
             if filename.endswith(".csv"):
-                return pd.read_csv(path)
+                return pd.read_csv(path, usecols=columns)
             elif filename.endswith(".xlsx"):
-                return pd.read_excel(path, engine="openpyxl")
+                return pd.read_excel(path, engine="openpyxl", usecols=columns)
 
         # ✅ Fallback to in-memory content
         if filename.endswith(".csv") and content:
-            return pd.read_csv(io.StringIO(content))
+            return pd.read_csv(io.StringIO(content), usecols=columns)
 
         elif filename.endswith(".xlsx") and content:
             if isinstance(content, bytes):
@@ -126,7 +157,7 @@ Ensure the Python code is syntactically correct and executable without unmatched
                 content_bytes = base64.b64decode(content)
             else:
                 raise ValueError("Unsupported content type for Excel file.")
-            return pd.read_excel(io.BytesIO(content_bytes), engine="openpyxl")
+            return pd.read_excel(io.BytesIO(content_bytes), engine="openpyxl", usecols=columns)
 
         elif filename.endswith(".pdf") and content:
             os.makedirs("temp", exist_ok=True)
@@ -141,21 +172,19 @@ Ensure the Python code is syntactically correct and executable without unmatched
         else:
             raise ValueError("Unsupported file format. Use .csv, .xlsx, or .pdf.")
         
-    def get_latest_uploaded_file(self) -> dict:
-        files = glob.glob("uploads/*")
-        if not files:
-            raise FileNotFoundError("No uploaded files found in 'uploads/' directory.")
-        
-        latest_file = max(files, key=os.path.getmtime)
-        with open(latest_file, "rb") as f:
-            content = f.read()
+    def get_latest_uploaded_file(self, session_id: str) -> dict:
+        if not session_id:
+            raise ValueError("A session id is required to find the uploaded dataset.")
+        latest_file = upload_catalog.latest_file(session_id, DATASET_EXTENSIONS)
+        if latest_file is None:
+            raise FileNotFoundError("No uploaded dataset found for this session.")
 
-        filename = os.path.basename(latest_file)
         return {
-            "name": filename,
-            "path": latest_file,
-            "content": content
+            "name": latest_file["name"],
+            "path": latest_file["path"],
+            "sha256": latest_file["sha256"],
         }
+
     def is_graph_required(self, user_prompt: str) -> bool:
         reasoning_prompt = f"""
                 You're a data analyst. The user asks: "{user_prompt}"
@@ -187,8 +216,10 @@ Ensure the Python code is syntactically correct and executable without unmatched
         2. Do NOT use `df.read_csv`, `df.sample()`, or hardcoded values unless explicitly instructed.
         3. You MUST use `print(...)` to display the result. Do not return or evaluate expressions silently.
         4. Avoid assumptions about column names — rely only on the provided sample and stats.
-        5. If comparing string values (e.g., Brand == "Maruti"), always use:
-        `df["Brand"].str.strip().str.lower() == "maruti"` to ensure consistent matching.
+        5. If comparing string values (e.g., Brand == "Maruti"), always use the precomputed
+        normalized index `norm`, which matches case- and whitespace-insensitively:
+        `df[norm.eq("Brand", "maruti")]`, or `df[norm.isin("Brand", ["maruti", "honda"])]` for several values.
+        Do NOT use `.str.strip().str.lower() ==` for this.
         6. Do NOT use `pandas.compat.StringIO` — it is deprecated and will cause an error. Use `io.StringIO` if needed.
         7. Wrap only the code inside triple backticks like this:
 
@@ -199,7 +230,7 @@ Ensure the Python code is syntactically correct and executable without unmatched
         Example:
 
         Count rows for Brand == 'Maruti'
-        print(df[df["Brand"].str.strip().str.lower() == "maruti"].shape[0]) is the count of rows for Brand 'Maruti'.
+        print(df[norm.eq("Brand", "maruti")].shape[0]) is the count of rows for Brand 'Maruti'.
         """
         
         response = self.model.generate_content(prompt).text
@@ -216,13 +247,14 @@ Ensure the Python code is syntactically correct and executable without unmatched
         self,
         df: pd.DataFrame,
         code: str,
-        user_prompt: str
+        user_prompt: str,
+        norm: Optional[NormalizedIndex] = None
     ) -> dict:
         """
         Executes provided code on the DataFrame `df`, captures output,
         and rephrases it using the LLM to produce a natural-language summary.
         """
-        local_vars = {"pd": pd, "df": df}
+        local_vars = {"pd": pd, "df": df, "norm": norm if norm is not None else NormalizedIndex(df)}
         buffer = io.StringIO()
 
         with redirect_stdout(buffer):
@@ -245,121 +277,349 @@ Ensure the Python code is syntactically correct and executable without unmatched
                 "agent_type": "analytics"
             }
 
+        return {
+            "response": "",
+            "summary": self.rephrase_output(user_prompt, output),
+            "code": code,
+            "agent_type": "analytics"
+        }
+
+    def rephrase_output(self, user_prompt: str, output: str, note: str = "") -> str:
         rephrase_prompt = f"""
     You are a helpful assistant. The user asked:
     "{user_prompt}"
 
     The Python code produced this output:
     {output}
-
+    {note}
     Rephrase this as a concise, friendly sentence that directly answers the user's query.
     Final answer:
     """
         try:
-            rephrased = self.model.generate_content(rephrase_prompt).text.strip()
+            return self.model.generate_content(rephrase_prompt).text.strip()
         except Exception as e:
-            rephrased = f"(Could not rephrase due to LLM error: {e})"
+            return f"(Could not rephrase due to LLM error: {e})"
+
+    def capture_output(self, code: str, df: pd.DataFrame, norm: NormalizedIndex) -> str:
+        """Run analysis code and return what it printed, without redirecting the process-wide stdout."""
+        buffer = io.StringIO()
+        exec(code, {"pd": pd, "df": df, "norm": norm, "print": functools.partial(print, file=buffer)})
+        return buffer.getvalue().strip()
+
+
+
+    def profile_dataframe(self, df: pd.DataFrame) -> tuple:
+        """Sample rows and summary statistics shown to the LLM in place of the full DataFrame."""
+        df_sample = df.sample(min(len(df), 10), random_state=42) # more diverse than head()
+        sample_csv = df_sample.to_csv(index=False)
+        columns = df.columns.tolist()
+        stats = df.describe(include='all').to_string()
+
+        # Optional: include additional stats like unique counts, nulls, dtypes
+        extra_info = pd.DataFrame({
+            "dtype": df.dtypes,
+            "nulls": df.isnull().sum(),
+            "unique": df.nunique()
+        }).to_string()
+
+        return df_sample, sample_csv, columns, stats + "\n\n" + extra_info
+
+    def execute_generated_code(self, df: pd.DataFrame, code: str, summary: str, is_plot: bool, user_prompt: str,
+                               norm: Optional[NormalizedIndex] = None) -> dict:
+        if norm is None:
+            norm = NormalizedIndex(df)
+        local_vars = {"pd": pd, "px": px, "go": go, "df": df, "norm": norm}
+        buffer = io.StringIO()
+
+        with redirect_stdout(buffer):
+            try:
+                try:
+                    ast.parse(code)
+                except SyntaxError as e:
+                    return {
+                        "error": f"❌ Pre-execution syntax error:\n\n{e}\n\npython\n{code}\n"
+                    }
+
+                exec(code, local_vars)
+                if not is_plot:
+                    return self.execute_and_rephrase_code(df=df, code=code, user_prompt=user_prompt, norm=norm)
+
+            except SyntaxError as e:
+                return {
+                    "error": f"❌ Syntax error in generated code:\n\n{e}\n\npython\n{code}\n"
+                }
+
+        figs = [v for v in local_vars.values() if isinstance(v, go.Figure)]
+        if not figs:
+            return {
+                "response": "Code executed but no graph was returned.",
+                "code": code,
+                "summary": summary,
+                "agent_type": "analytics"
+            }
+
+        html_parts = []
+        for fig in figs:
+            fig.update_layout(
+                autosize=True,
+                width=None,
+                height=None,
+                margin=dict(l=10, r=10, t=40, b=20),
+            )
+            html_parts.append(render_figure_payload(fig))
 
         return {
-            "response": "",
-            "summary": rephrased,
+            "response": "\n".join(html_parts),
+            "summary": summary,
+            "plot_graph": "\n".join(html_parts),
             "code": code,
             "agent_type": "analytics"
         }
 
+    def cached_profile(self, file: dict) -> Optional[dict]:
+        sha256 = file.get("sha256")
+        with self._profiles_lock:
+            if not sha256 or sha256 not in self.profiles:
+                return None
+            self.profiles.move_to_end(sha256)
+            return self.profiles[sha256]
+
+    def build_profile(self, file: dict, df: pd.DataFrame) -> dict:
+        df_sample, sample_csv, columns, stats = self.profile_dataframe(df)
+        profile = {
+            "fingerprint": schema_fingerprint(df),
+            "df_sample": df_sample,
+            "sample_csv": sample_csv,
+            "columns": columns,
+            "stats": stats,
+            "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
+            "categories": column_categories(df, NORMALIZED_MAX_VALUES),
+        }
+        sha256 = file.get("sha256")
+        if sha256:
+            with self._profiles_lock:
+                self.profiles[sha256] = profile
+                while len(self.profiles) > PROFILE_CACHE_SIZE:
+                    self.profiles.popitem(last=False)
+        return profile
+
+    def warm_profile(self, file: dict) -> dict:
+        """Build (or reuse) the dataset profile ahead of the first question."""
+        profile = self.cached_profile(file)
+        if profile is None:
+            profile = self.build_profile(file, self.load_file(file))
+        return profile
+
+    def columns_for_code(self, code: str, columns: list) -> Optional[List[str]]:
+        """The subset of columns the generated code references, or None to load everything."""
+        needed = None
+        if all(isinstance(col, str) for col in columns):
+            needed = referenced_columns(code, columns)
+        return needed if needed is not None and len(needed) < len(columns) else None
+
+    def load_for_code(self, file: dict, code: str, columns: list) -> pd.DataFrame:
+        """Load only the columns the generated code references, or everything if that is unclear."""
+        needed = self.columns_for_code(code, columns)
+        if needed is not None:
+            logger.info(f"✂️ Loading {len(needed)} of {len(columns)} columns: {needed}")
+            return self.load_file(file, columns=needed)
+        return self.load_file(file)
+
+    def exact_answer(self, file: dict, profile: dict, code: str, user_prompt: str) -> dict:
+        """Full-data answer that replaces an approximate one once it is ready."""
+        df = self.load_for_code(file, code, profile["columns"])
+        output = self.capture_output(code, df, dataset_cache.normalized_index(file.get("sha256"), df))
+        return {"output": output, "summary": self.rephrase_output(user_prompt, output)}
+
+    def _sample_outputs(self, sha256: str, code: str, columns: Optional[List[str]], total_rows: int):
+        """(output, replicate outputs, replicate sizes, sample) of the code on a stratified sample, or None."""
+        pilot = dataset_cache.sample(sha256, PILOT_ROWS, columns)
+        if pilot is None:
+            return None
+        pilot_df, pilot_rows, _ = pilot
+        start = time.perf_counter()
+        self.capture_output(code, pilot_df, dataset_cache.normalized_index(sha256, pilot_df, rows=pilot_rows))
+        n = sample_size((time.perf_counter() - start) / len(pilot_df), total_rows)
+        if n is None:
+            return None
+
+        sample_df, rows, ranks = dataset_cache.sample(sha256, n, columns)
+        norm = dataset_cache.normalized_index(sha256, sample_df, rows=rows)
+        output = self.capture_output(code, sample_df, norm)
+
+        # Disjoint slices of the stratified order are themselves stratified samples
+        labels = ranks * REPLICATES // len(ranks)
+        replicate_outputs, replicate_rows = [], []
+        for replicate in range(REPLICATES):
+            positions = np.flatnonzero(labels == replicate)
+            replicate_df = sample_df.iloc[positions].reset_index(drop=True)
+            replicate_outputs.append(self.capture_output(code, replicate_df, norm.subset(replicate_df, positions)))
+            replicate_rows.append(len(positions))
+        return output, replicate_outputs, replicate_rows, sample_df
+
+    def run_approximate(self, file: dict, profile: dict, code: str, user_prompt: str) -> Optional[dict]:
+        """
+        Answer analysis code from the precomputed stratified sample, sized by a timed pilot run
+        to hit the latency target. Returns None when the exact path should be used instead.
+        """
+        sha256 = file.get("sha256")
+        manifest = dataset_cache.manifest(sha256) if sha256 else None
+        if manifest is None or not manifest["sheets"] or manifest["sheets"][0]["rows"] < APPROXIMATE_MIN_ROWS:
+            return None
+        total_rows = manifest["sheets"][0]["rows"]
+        columns = self.columns_for_code(code, profile["columns"])
 
+        try:
+            sampled = self._sample_outputs(sha256, code, columns, total_rows)
+        except Exception as e:
+            # e.g. .iloc[0] on a rare category the sample missed; the full data may still answer it
+            logger.warning(f"⚠️ Generated code failed on the sample, answering exactly: {e}")
+            return None
+        if sampled is None:
+            return None
+        output, replicate_outputs, replicate_rows, sample_df = sampled
+
+        annotated = annotate_estimates(output, replicate_outputs, replicate_rows, len(sample_df), total_rows)
+        if not annotated:
+            logger.info("🎯 Sample outputs did not line up; answering exactly")
+            return None
+
+        note = (
+            f"These values are estimates from a {len(sample_df):,}-row sample of {total_rows:,} rows; "
+            f"keep the ± 95% intervals in the answer.\n"
+        )
+        summary = self.rephrase_output(user_prompt, annotated, note)
+        summary += f"\n\n*Approximate answer from a {len(sample_df):,}-row stratified sample of {total_rows:,} rows.*"
 
-    async def run(self, file: dict = None, user_prompt: str = "") -> dict:
-
-        code = ""
+        result = {
+            "response": "",
+            "summary": summary,
+            "code": code,
+            "agent_type": "analytics",
+            "approximate": True,
+            "sample_rows": len(sample_df),
+            "total_rows": total_rows,
+        }
+        if APPROXIMATE_REFINE:
+            refinement_id = refinements.submit(self.exact_answer, file, profile, code, user_prompt)
+            result["refinement_id"] = refinement_id
+            result["response"] = render_refinement_placeholder(refinement_id)
+        logger.info(f"🎯 Approximate answer from {len(sample_df)} of {total_rows} rows")
+        return result
+
+    def run_fast_path(self, file: dict, profile: dict, query: FastQuery, df: Optional[pd.DataFrame] = None) -> Optional[dict]:
+        """Answer a parsed aggregate question directly with pandas; None sends it to the LLM path."""
+        code = query.code()
         try:
-            if file is None:
-                file = self.get_latest_uploaded_file()
-
-            df = self.load_file(file)
-            logger.info(f"📥 Loaded DataFrame shape: {df.shape}")
-            logger.info(f"📄 Columns: {df.columns.tolist()}")
-            logger.info(f"🔍 First few rows:\n{df.head().to_string()}")
-
-            if df is None or df.empty:
-                return {"error": "❌ No valid data found in the uploaded file."}
-
-            df_sample = df.sample(min(len(df), 10), random_state=42) # more diverse than head()
-            sample_csv = df_sample.to_csv(index=False)
-            columns = df.columns.tolist()
-            stats = df.describe(include='all').to_string()
-
-            # Optional: include additional stats like unique counts, nulls, dtypes
-            extra_info = pd.DataFrame({
-                "dtype": df.dtypes,
-                "nulls": df.isnull().sum(),
-                "unique": df.nunique()
-            }).to_string()
-
-            if self.is_graph_required(user_prompt):
-                code, summary = self.generate_code_and_summary(df_sample, sample_csv, columns, stats + "\n\n" + extra_info, user_prompt)
-                is_plot = True
-            else:
-                code, summary = self.generate_analysis_code(df_sample, sample_csv, stats + "\n\n" + extra_info, user_prompt)
-                is_plot = False
+            if df is None:
+                # Row listings show every column, so only aggregates get a pruned load
+                df = self.load_file(file) if query.kind == "top_rows" else self.load_for_code(file, code, profile["columns"])
+            local_vars = {"pd": pd, "px": px, "df": df, "norm": dataset_cache.normalized_index(file.get("sha256"), df)}
+            exec(code, local_vars)
+            summary = describe_result(query, local_vars["result"])
+        except Exception as e:
+            logger.warning(f"⚠️ Fast path failed, falling back to the LLM: {e}")
+            self.fast_path.record("failed", query.kind)
+            return None
 
-            
-            local_vars = {"pd": pd, "px": px, "go": go, "df": df}
-            buffer = io.StringIO()
+        response = ""
+        fig = local_vars.get("fig")
+        if isinstance(fig, go.Figure):
+            fig.update_layout(autosize=True, width=None, height=None, margin=dict(l=10, r=10, t=40, b=20))
+            response = render_figure_payload(fig)
 
-            with redirect_stdout(buffer):
-                                try:
-                                    try:
-                                        ast.parse(code)
-                                    except SyntaxError as e:
-                                        return {
-                                            "error": f"❌ Pre-execution syntax error:\n\n{e}\n\npython\n{code}\n"
-                                        }
+        self.fast_path.record("hits", query.kind)
+        return {
+            "response": response,
+            "summary": summary,
+            "code": code,
+            "agent_type": "analytics",
+            "fast_path": True,
+        }
 
-                                    exec(code, local_vars)
-                                    if not is_plot:
-                                        return self.execute_and_rephrase_code(df=df, code=code, user_prompt=user_prompt)
+    def run_cached_code(self, file: dict, profile: dict, user_prompt: str, is_plot: bool,
+                        df: Optional[pd.DataFrame] = None, approximate: bool = False) -> Optional[dict]:
+        """Re-run code cached for this schema, prompt and plot mode; drop the entry if it no longer works."""
+        entry = self.code_cache.lookup(profile["fingerprint"], user_prompt, is_plot)
+        if entry is None:
+            return None
 
+        try:
+            result = None
+            if approximate and not entry.is_plot:
+                result = self.run_approximate(file, profile, entry.code, user_prompt)
+            if result is None:
+                if df is None:
+                    df = self.load_for_code(file, entry.code, profile["columns"])
+                norm = dataset_cache.normalized_index(file.get("sha256"), df)
+                result = self.execute_generated_code(df, entry.code, entry.summary, entry.is_plot, user_prompt, norm)
+        except Exception as e:
+            logger.warning(f"⚠️ Cached analytics code failed: {e}")
+            result = {"error": str(e)}
 
+        if "error" in result or (entry.is_plot and "plot_graph" not in result):
+            self.code_cache.discard(entry)
+            return None
 
-                                    
-                                except SyntaxError as e:
-                                    return {
-                                        "error": f"❌ Syntax error in generated code:\n\n{e}\n\npython\n{code}\n"
-                                        }
+        self.code_cache.record_success(entry)
+        logger.info(f"♻️ Reused cached analytics code ({entry.successes} successful runs)")
+        return result
 
-            figs = [v for v in local_vars.values() if isinstance(v, go.Figure)]
-            if not figs:
-                return {
-                    "response": "Code executed but no graph was returned.",
-                    "code": code,
-                    "summary": summary,
-                    "agent_type": "analytics"
-                }
+    async def run(self, file: dict = None, user_prompt: str = "", approximate: Optional[bool] = None,
+                  session_id: Optional[str] = None) -> dict:
 
-            html_parts = []
-            for i, fig in enumerate(figs):
-                fig.update_layout(
-                    autosize=True,
-                    width=None,
-                    height=None,
-                    margin=dict(l=10, r=10, t=40, b=20),
-                )
-                html = pio.to_html(
-                    fig,
-                    full_html=False,
-                    include_plotlyjs="cdn" if i == 0 else False,  # type: ignore[arg-type]
-                    config={"responsive": True}
-                )
-                html_parts.append(html)
+        code = ""
+        approximate = APPROXIMATE_MODE if approximate is None else approximate
+        try:
+            if file is None:
+                file = self.get_latest_uploaded_file(session_id)
+
+            # After the first question on a dataset its profile is reused, and only the
+            # columns the generated code references are loaded
+            df = None
+            profile = self.cached_profile(file)
+            if profile is None:
+                df = self.load_file(file)
+                logger.info(f"📥 Loaded DataFrame shape: {df.shape}")
+                logger.info(f"📄 Columns: {df.columns.tolist()}")
+                logger.info(f"🔍 First few rows:\n{df.head().to_string()}")
+
+                if df is None or df.empty:
+                    return {"error": "❌ No valid data found in the uploaded file."}
+
+                profile = self.build_profile(file, df)
+
+            query = self.fast_path.parse(user_prompt, profile["columns"], profile["dtypes"], profile["categories"],
+                                         entity_nouns(file.get("name", "")))
+            if query is None:
+                self.fast_path.record("unparsed")
+            else:
+                fast_result = self.run_fast_path(file, profile, query, df)
+                if fast_result is not None:
+                    return fast_result
 
-            return {
-                "response": "\n".join(html_parts),
-                "summary": summary,
-                "plot_graph": "\n".join(html_parts),
-                "code": code,
-                "agent_type": "analytics"
-            }
+            is_plot = self.is_graph_required(user_prompt)
+            cached_result = self.run_cached_code(file, profile, user_prompt, is_plot, df, approximate)
+            if cached_result is not None:
+                return cached_result
+
+            if is_plot:
+                code, summary = self.generate_code_and_summary(profile["df_sample"], profile["sample_csv"], profile["columns"], profile["stats"], user_prompt)
+            else:
+                code, summary = self.generate_analysis_code(profile["df_sample"], profile["sample_csv"], profile["stats"], user_prompt)
+
+            result = None
+            if approximate and not is_plot:
+                result = self.run_approximate(file, profile, code, user_prompt)
+
+            if result is None:
+                if df is None:
+                    df = self.load_for_code(file, code, profile["columns"])
+                norm = dataset_cache.normalized_index(file.get("sha256"), df)
+                result = self.execute_generated_code(df, code, summary, is_plot, user_prompt, norm)
+            if "error" not in result and (not is_plot or "plot_graph" in result):
+                self.code_cache.store(profile["fingerprint"], user_prompt, is_plot, code, summary)
+            return result
 
 
         except Exception as e:
@@ -1,15 +1,21 @@
 # database_agent.py
 
 import os
-import json
+import uuid
+import hashlib
 from typing_extensions import TypedDict, Annotated
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
 from langchain_community.utilities import SQLDatabase
-from langchain_community.tools.sql_database.tool import QuerySQLDataBaseTool
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.graph import StateGraph, START
 
+from backend.utils.schema_index import SchemaIndex
+from backend.utils.sql_cache import SqlResultCache, SqlTranslationCache
+from backend.utils.sql_digest import digest_result, render_table_payload, templated_answer
+from backend.utils.sql_engine import SqlEngine
+from backend.utils.response_stream import emit
+
 load_dotenv()
 
 # Initialize the LLM
@@ -23,9 +29,19 @@ llm = ChatGroq(
 db_path = "backend/database/Chinook.db"
 db = SQLDatabase.from_uri(f"sqlite:///{db_path}")
 table_info_cache = db.get_table_info()
+schema_version = hashlib.sha1(table_info_cache.encode("utf-8")).hexdigest()
+
+# Per-table snippets and foreign keys, so each prompt only carries the tables a question needs
+schema_index = SchemaIndex.from_database(db)
+
+# Read-only connection pool with a statement timeout and row/byte limits
+sql_engine = SqlEngine(db_path)
 
-# Reusable SQL tool
-sql_tool = QuerySQLDataBaseTool(db=db)
+# Results of repeated read-only queries, dropped whenever the database file changes
+result_cache = SqlResultCache(db_path)
+
+# Question → SQL for questions already answered successfully against this schema
+translation_cache = SqlTranslationCache()
 
 # Shared state
 class State(TypedDict):
@@ -52,45 +68,78 @@ query_prompt_template = ChatPromptTemplate.from_messages([
 class QueryOutput(TypedDict):
     query: Annotated[str, ..., "SQL query string"]
 
+structured_llm = llm.with_structured_output(QueryOutput)
+
 # Node 1: Generate SQL query
-def write_query(state: State):
+async def write_query(state: State):
     try:
+        cached = translation_cache.lookup(schema_version, state['question'])
+        if cached is not None:
+            return {'query': cached}
+
         messages = query_prompt_template.format_messages(
         dialect=db.dialect,
         top_k=10,
-        table_info=table_info_cache,
+        table_info=schema_index.context(state['question']),
         input=state['question']
         )
 
-        structured_llm = llm.with_structured_output(QueryOutput)
-        result = structured_llm.invoke(messages)
+        result = await structured_llm.ainvoke(messages)
         return {'query': result['query']}
     except Exception as e:
         return {'query': f"-- ERROR generating query: {str(e)}"}
 
 # Node 2: Execute SQL query
-def execute_query(state: State):
+async def execute_query(state: State):
+    table_id = uuid.uuid4().hex[:12]
+    chunks = []
+
+    def stream_rows(columns, rows):
+        # The full table goes straight to the chat as structured data; the LLM only sees a digest
+        if chunks or len(rows) > 1:
+            chunk = render_table_payload(table_id, None if chunks else columns, rows)
+            if emit(chunk):
+                chunks.append(chunk)
+
     try:
-        result = sql_tool.invoke(state['query'])
-        return {'result': {"status": "success", "data": result}}
+        if state['query'].lstrip().startswith("-- ERROR"):
+            raise ValueError(state['query'].lstrip()[3:])
+        result = result_cache.get(state['query'])
+        if result is None:
+            result = await sql_engine.execute(state['query'], on_rows=stream_rows)
+            result_cache.put(state['query'], result, size=result.size)
+        else:
+            stream_rows(result.columns, result.rows)
+        # Only translations that ran are reused; a cached one that now fails is dropped below
+        translation_cache.store(schema_version, state['question'], state['query'])
+        return {'result': {"status": "success", "data": result, "table": "".join(chunks)}}
     except Exception as e:
-        return {'result': {"status": "error", "message": str(e)}}
+        translation_cache.discard(schema_version, state['question'], state['query'])
+        return {'result': {"status": "error", "message": str(e), "table": "".join(chunks)}}
 
 # Node 3: Generate final answer
-def generate_answer(state: State):
+async def generate_answer(state: State):
+    # Whatever was streamed (the result table) has to stay the start of the answer
+    table = state['result'].get('table', "")
     if state['result'].get('status') == 'error':
-        return {"answer": f"Failed to run SQL query: {state['result']['message']}"}
+        return {"answer": table + f"Failed to run SQL query: {state['result']['message']}"}
+
+    result = state['result']['data']
+    templated = templated_answer(result, table_shown=bool(table))
+    if templated is not None:
+        return {"answer": table + templated}
+
     prompt = (
         f"Given the question:\n{state['question']}\n\n"
         f"The SQL query used:\n{state['query']}\n\n"
-        f"And the SQL result:\n{json.dumps(state['result']['data'], indent=2)}\n\n"
+        f"A summary of the SQL result (the full table is shown to the user separately):\n{digest_result(result)}\n\n"
         f"Provide a helpful answer."
     )
     try:
-        response = llm.invoke(prompt)
-        return {"answer": response.content}
+        response = await llm.ainvoke(prompt)
+        return {"answer": table + response.content}
     except Exception as e:
-        return {"answer": f"Failed to generate final answer: {str(e)}"}
+        return {"answer": table + f"Failed to generate final answer: {str(e)}"}
 
 # LangGraph pipeline
 def build_db_query_graph():
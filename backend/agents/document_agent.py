@@ -8,11 +8,18 @@ from langgraph.graph import StateGraph, END
 
 from backend.agents.rag_api.summarize import summarize_task
 from backend.agents.rag_api.query import query_task
+from backend.agents.rag_api.local_query import local_query_task
+from backend.agents.rag_api.local_summarize import local_summarize_task
+from backend.agents.rag_api.local_compare import local_compare_task
 from backend.utils.groq_client import groq_client
-from backend.utils.file_uploader import upload_single_file
 
 logger = logging.getLogger(__name__)
 
+# "remote": the RAG server's /query; "local" (opt-in): answer from the in-process FAISS index
+DOCUMENT_QUERY_BACKEND = os.getenv("DOCUMENT_QUERY_BACKEND", "remote")
+# "remote": the RAG server's /summarize; "local" (opt-in): cached map-reduce summaries via Groq
+DOCUMENT_SUMMARY_BACKEND = os.getenv("DOCUMENT_SUMMARY_BACKEND", "remote")
+
 
 class DocumentTask(str, Enum):
     summarize = "summarize"
@@ -20,6 +27,9 @@ class DocumentTask(str, Enum):
     query = "query"
 
 
+DOCUMENT_TASKS = {task.value for task in DocumentTask}
+
+
 class DocumentAgentState(TypedDict):
     input: str
     chat_id: Optional[str]
@@ -33,29 +43,14 @@ class DocumentAgent:
     def __init__(self):
         self.graph: Any = self._build_graph()  # CompiledGraph is not exposed directly
 
-    async def _compare_task(self, state: DocumentAgentState) -> DocumentAgentState:
-        uploads_dir = "uploads"
-        all_files = sorted([
-            os.path.join(uploads_dir, f)
-            for f in os.listdir(uploads_dir)
-            if f.lower().endswith(".pdf")
-        ], key=os.path.getmtime, reverse=True)
-
-        if len(all_files) < 2:
-            return {**state, "response": "❌ Not enough PDF files to compare. Upload at least two."}
-
-        try:
-            file1 = upload_single_file(all_files[0])
-            file2 = upload_single_file(all_files[1])
-
-            response = f"✅ Uploaded `{file1}` and `{file2}` for comparison.\n(Stub: Implement comparison logic)"
-            return {**state, "response": response}
-
-        except Exception as e:
-            logger.error(f"[❌ CompareTask Error]: {e}")
-            return {**state, "response": "❌ Failed to upload or compare the documents."}
+    @staticmethod
+    def _entry(state: DocumentAgentState) -> str:
+        """Use the task chosen by the top-level router; only unrouted requests pay for the router node."""
+        task = state.get("task")
+        return task if task in DOCUMENT_TASKS else "router"
 
     async def _router_node(self, state: DocumentAgentState) -> DocumentAgentState:
+        """Fallback classification when the caller did not supply a task."""
         prompt = state.get("input", "")
         history = state.get("chat_history", [])
 
@@ -84,7 +79,7 @@ class DocumentAgent:
             )
             task = result.choices[0].message.content.strip().lower()
 
-            if task not in {"summarize", "compare", "query"}:
+            if task not in DOCUMENT_TASKS:
                 logger.warning(f"[⚠️ Invalid Task Returned]: {task}, defaulting to 'query'")
                 task = "query"
 
@@ -99,11 +94,19 @@ class DocumentAgent:
         graph = StateGraph(DocumentAgentState)
 
         graph.add_node("router", self._router_node)
-        graph.add_node("summarize", summarize_task)
-        graph.add_node("compare", self._compare_task)
-        graph.add_node("query", query_task)
+        graph.add_node("summarize", local_summarize_task if DOCUMENT_SUMMARY_BACKEND == "local" else summarize_task)
+        graph.add_node("compare", local_compare_task)
+        graph.add_node("query", local_query_task if DOCUMENT_QUERY_BACKEND == "local" else query_task)
 
-        graph.set_entry_point("router")
+        graph.set_conditional_entry_point(
+            self._entry,
+            {
+                "router": "router",
+                "summarize": "summarize",
+                "compare": "compare",
+                "query": "query"
+            }
+        )
         graph.add_conditional_edges(
             "router",
             lambda state: state["task"],
@@ -1,39 +1,21 @@
-import os
-import requests
-from dotenv import load_dotenv
+import asyncio
 from typing import List
 
-load_dotenv()
-RAG_API_KEY = os.getenv("RAG_API_KEY")
-API_BASE_URL = os.getenv("API_BASE_URL")
+from backend.utils.upload_catalog import upload_catalog
+from backend.utils.rag_registry import rag_registry
+from backend.utils.rag_client import rag_client, API_BASE_URL, RAG_API_KEY
 
 if not RAG_API_KEY or not API_BASE_URL:
     raise EnvironmentError("Missing RAG_API_KEY or API_BASE_URL in .env")
 
-HEADERS = {"Authorization": f"Bearer {RAG_API_KEY}"}
+def get_latest_files(n: int, chat_id: str) -> List[str]:
+    return [entry["path"] for entry in upload_catalog.latest(chat_id, (".pdf",), n=n)]
 
-UPLOAD_DIR = "uploads"
+async def upload_file_to_server(filepath: str) -> str:
+    return await rag_client.upload(filepath)  # Return only the uploaded filename
 
-def get_latest_files(n: int) -> List[str]:
-    files = [os.path.join(UPLOAD_DIR, f) for f in os.listdir(UPLOAD_DIR) if os.path.isfile(os.path.join(UPLOAD_DIR, f))]
-    files.sort(key=os.path.getmtime, reverse=True)
-    return files[:n]
-
-def upload_file_to_server(filepath: str) -> str:
-    url = f"{API_BASE_URL}/upload/"
-    with open(filepath, "rb") as f:
-        files = [("files", (os.path.basename(filepath), f.read(), "application/pdf"))]
-        response = requests.post(url, headers=HEADERS, files=files)
-
-    if response.status_code != 200:
-        raise RuntimeError(f"Upload failed for {filepath}: {response.text}")
-
-    return response.json().get("filenames", [])[0]  # Return only the uploaded filename
-
-def compare_uploaded_files(filenames: List[str]) -> dict:
-    url = f"{API_BASE_URL}/compare"
-    form_data = [("filenames", name) for name in filenames]
-    response = requests.post(url, headers=HEADERS, files=form_data)
+async def compare_uploaded_files(filenames: List[str]) -> dict:
+    response = await rag_client.compare(filenames)
 
     if response.status_code != 200:
         raise RuntimeError(f"Comparison failed: {response.text}")
@@ -41,16 +23,25 @@ def compare_uploaded_files(filenames: List[str]) -> dict:
     return response.json()
 
 # Entry function for your compare sub-agent
-def run_compare_agent() -> dict:
-    latest_files = get_latest_files(2)
-    uploaded_filenames = []
-
-    for file_path in latest_files:
-        uploaded_name = upload_file_to_server(file_path)
-        uploaded_filenames.append(uploaded_name)
-
-    return compare_uploaded_files(uploaded_filenames)
+async def run_compare_agent(chat_id: str) -> dict:
+    latest_files = upload_catalog.latest(chat_id, (".pdf",), n=2)
+
+    # Uploads here carry no chat_id, so they are registered globally by content
+    async def upload_all() -> List[str]:
+        return list(await asyncio.gather(*(
+            rag_registry.ensure_uploaded(entry["path"], None, upload_file_to_server, entry["sha256"])
+            for entry in latest_files
+        )))
+
+    uploaded_filenames = await upload_all()
+    try:
+        return await compare_uploaded_files(uploaded_filenames)
+    except RuntimeError:
+        # The server may have dropped a document: upload them again once
+        for name in uploaded_filenames:
+            rag_registry.invalidate(name)
+        return await compare_uploaded_files(await upload_all())
 
 if __name__ == "__main__":
-    result = run_compare_agent()
+    result = asyncio.run(run_compare_agent("dev-main"))
     print("🧾 Compare Result:", result)
@@ -0,0 +1,120 @@
+# backend/agents/rag_api/local_compare.py
+
+import os
+import asyncio
+import logging
+from typing import Dict, Any, List
+
+from backend.utils.doc_compare import Comparison, compare_documents, word_diff
+from backend.utils.file_processor import FileProcessor
+from backend.utils.groq_client import groq_client
+from backend.utils.summary_cache import summary_cache, content_key
+from backend.utils.upload_catalog import upload_catalog
+
+logger = logging.getLogger(__name__)
+
+# Word budget for the changes sent to the LLM; the listing below the narrative is not limited by it
+NARRATIVE_WORDS = int(os.getenv("COMPARE_NARRATIVE_WORDS", "2500"))
+MAX_LISTED = 10
+PROMPT_VERSION = "1"
+
+NARRATIVE_PROMPT = (
+    "You compare two versions of a document. You are given only the passages that differ: "
+    "word-level edits of changed passages ([-removed-] {+added+}), and passages that were added or removed. "
+    "Write a short narrative of what changed and why it matters, most significant changes first. "
+    "Cite pages like (old p. 3 → new p. 4). Do not speculate about unchanged content."
+)
+
+file_processor = FileProcessor()
+
+
+def _snippet(text: str, words: int = 30) -> str:
+    tokens = text.split()
+    return " ".join(tokens[:words]) + (" …" if len(tokens) > words else "")
+
+
+def changes_for_llm(result: Comparison, budget: int = NARRATIVE_WORDS) -> str:
+    """The diff of each changed passage plus added/removed text, cut off at `budget` words."""
+    blocks = [f"CHANGED (old p. {a.page} → new p. {b.page}): {word_diff(a.text, b.text)}" for a, b, _ in result.changed]
+    blocks += [f"ADDED (new p. {p.page}): {p.text}" for p in result.added]
+    blocks += [f"REMOVED (old p. {p.page}): {p.text}" for p in result.removed]
+
+    kept, used = [], 0
+    for block in blocks:
+        words = len(block.split())
+        if used + words > budget:
+            kept.append(f"… {len(blocks) - len(kept)} more differences not shown")
+            break
+        kept.append(block)
+        used += words
+    return "\n\n".join(kept)
+
+
+def render_report(old_name: str, new_name: str, result: Comparison, narrative: str) -> str:
+    lines = [
+        f"**Comparing `{old_name}` → `{new_name}`:** {result.unchanged} passages unchanged, "
+        f"{len(result.changed)} changed, {len(result.added)} added, {len(result.removed)} removed.",
+        "",
+        narrative,
+    ]
+
+    def listing(title: str, items: List[str]):
+        if not items:
+            return
+        lines.extend(["", f"**{title}**"])
+        lines.extend(f"- {item}" for item in items[:MAX_LISTED])
+        if len(items) > MAX_LISTED:
+            lines.append(f"- …and {len(items) - MAX_LISTED} more")
+
+    listing("Changed", [f"p. {a.page} → p. {b.page}: {_snippet(word_diff(a.text, b.text))}" for a, b, _ in result.changed])
+    listing("Added", [f"p. {p.page}: {_snippet(p.text)}" for p in result.added])
+    listing("Removed", [f"p. {p.page}: {_snippet(p.text)}" for p in result.removed])
+    return "\n".join(lines)
+
+
+async def local_compare_task(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Compare the two latest PDFs locally; only the differing passages reach the LLM."""
+    try:
+        latest = upload_catalog.latest(state.get("chat_id"), (".pdf",), n=2)
+        if len(latest) < 2:
+            return {**state, "response": "❌ Not enough PDF files to compare. Upload at least two."}
+        new_file, old_file = latest  # newest first
+
+        key = content_key(PROMPT_VERSION, old_file["sha256"], new_file["sha256"])
+        cached = summary_cache.get("comparisons", key)
+        if cached is not None:
+            logger.info("⚡ Comparison cache hit")
+            return {**state, "response": cached}
+
+        old_pages, new_pages = await asyncio.gather(
+            file_processor.extract_pdf_pages_async(os.path.abspath(old_file["path"]), old_file["sha256"]),
+            file_processor.extract_pdf_pages_async(os.path.abspath(new_file["path"]), new_file["sha256"]),
+        )
+        result = await asyncio.to_thread(compare_documents, old_pages, new_pages)
+        logger.info(
+            f"🔍 Compared {old_file['original_name']} → {new_file['original_name']}: "
+            f"{result.unchanged} same, {len(result.changed)} changed, {len(result.added)} added, {len(result.removed)} removed"
+        )
+
+        if not (result.changed or result.added or result.removed):
+            narrative = "The two documents have the same text."
+        else:
+            completion = await asyncio.to_thread(
+                groq_client.client.chat.completions.create,
+                model=groq_client.model,
+                messages=[
+                    {"role": "system", "content": NARRATIVE_PROMPT},
+                    {"role": "user", "content": changes_for_llm(result)},
+                ],
+                temperature=0.2,
+                max_tokens=800,
+            )
+            narrative = completion.choices[0].message.content.strip()
+
+        report = render_report(old_file["original_name"], new_file["original_name"], result, narrative)
+        summary_cache.put("comparisons", key, report)
+        return {**state, "response": report}
+
+    except Exception as e:
+        logger.error(f"[❌ CompareTask Error]: {e}")
+        return {**state, "response": f"❌ Failed to compare the documents: {str(e)}"}
@@ -0,0 +1,62 @@
+# backend/agents/rag_api/local_query.py
+
+import os
+import asyncio
+import logging
+from typing import Dict, Any
+
+from backend.agents.rag_api.query import get_latest_uploaded_file, query_task
+from backend.utils.groq_client import groq_client
+from backend.utils.local_retrieval import local_retriever, TOP_K
+
+logger = logging.getLogger(__name__)
+
+ANSWER_PROMPT = (
+    "You answer questions about the user's uploaded documents.\n"
+    "Use ONLY the excerpts below. Cite the page of each fact like (p. 3).\n"
+    "If the excerpts do not contain the answer, say so plainly."
+)
+
+
+def build_context(hits) -> str:
+    return "\n\n".join(f"[{hit['name']}, p. {hit['page']}]\n{hit['text']}" for hit in hits)
+
+
+async def local_query_task(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer from the session's local FAISS index; falls back to the RAG server for non-PDF files."""
+    try:
+        prompt = state.get("input", "")
+        chat_id = state.get("chat_id", "default-session")
+
+        local_file = get_latest_uploaded_file(chat_id)
+        if local_file["extension"] != ".pdf":
+            return await query_task(state)
+
+        # Normally indexed right after upload; this only waits for (or does) that work if it has not finished
+        await asyncio.to_thread(
+            local_retriever.ensure_indexed,
+            chat_id, os.path.abspath(local_file["path"]), local_file["sha256"], local_file["original_name"],
+        )
+        hits = await asyncio.to_thread(local_retriever.search, chat_id, prompt, TOP_K)
+        if not hits:
+            logger.info("🔎 No local matches (scanned PDF or unrelated question), asking the RAG server")
+            return await query_task(state)
+
+        messages = [
+            {"role": "system", "content": ANSWER_PROMPT},
+            {"role": "user", "content": f"Excerpts:\n{build_context(hits)}\n\nQuestion: {prompt}"},
+        ]
+        result = await asyncio.to_thread(
+            groq_client.client.chat.completions.create,
+            model=groq_client.model,
+            messages=messages,
+            temperature=0.2,
+            max_tokens=1024,
+        )
+
+        logger.info(f"✅ Local query answered from {len(hits)} chunks of '{local_file['original_name']}'")
+        return {**state, "doc_id": local_file["sha256"], "response": result.choices[0].message.content.strip()}
+
+    except Exception as e:
+        logger.error(f"❌ Error in local_query_task: {e}")
+        return {**state, "response": f"Query error: {str(e)}"}
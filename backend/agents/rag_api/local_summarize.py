@@ -0,0 +1,206 @@
+# backend/agents/rag_api/local_summarize.py
+
+import os
+import re
+import asyncio
+import logging
+import weakref
+from typing import Dict, Any, List, Tuple
+
+from backend.agents.rag_api.summarize import get_latest_uploaded_file, summarize_task
+from backend.utils.extractive import EXTRACTIVE_BUDGET_TOKENS, condense_pages, estimate_tokens, quick_summary
+from backend.utils.file_processor import FileProcessor
+from backend.utils.groq_client import groq_client
+from backend.utils.response_stream import emit
+from backend.utils.summary_cache import summary_cache, content_key
+
+logger = logging.getLogger(__name__)
+
+SECTION_WORDS = int(os.getenv("SUMMARY_SECTION_WORDS", "1500"))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+REDUCE_FANIN = 12  # section summaries combined per reduce call
+
+# Bump when the prompts change so old cached summaries are not reused
+PROMPT_VERSION = "1"
+
+SECTION_PROMPT = (
+    "Summarize this section of a longer document in 2-4 sentences. "
+    "Keep names, numbers, dates and obligations; do not add anything that is not in the text."
+)
+COMBINE_PROMPT = (
+    "These are summaries of consecutive sections of one document. "
+    "Merge them into a single shorter summary that keeps the key facts, in document order."
+)
+FINAL_PROMPT = (
+    "Write the overall summary of a document from the section summaries below, "
+    "following the user's request for format and length. Do not invent facts."
+)
+
+# "quick summary", "tl;dr", ... answer instantly with key sentences instead of calling the LLM
+QUICK_REQUEST = re.compile(r"\b(quick|instant|extractive|key sentences|tl;?dr)\b", re.IGNORECASE)
+
+file_processor = FileProcessor()
+_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _limit() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if loop not in _limits:
+        _limits[loop] = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+    return _limits[loop]
+
+
+def normalize_request(prompt: str) -> str:
+    return re.sub(r"[^\w ]", "", re.sub(r"\s+", " ", prompt.lower())).strip()
+
+
+def split_sections(pages: List[str], words: int = SECTION_WORDS) -> List[Tuple[int, int, str]]:
+    """Group whole pages into sections of about `words` words: (first page, last page, text), 1-based."""
+    sections, current, first = [], [], 1
+    for page_no, page in enumerate(pages, start=1):
+        tokens = page.split()
+        if current and len(current) + len(tokens) > words:
+            sections.append((first, page_no - 1, " ".join(current)))
+            current = []
+        if not current:
+            first = page_no
+        current.extend(tokens)
+        while len(current) > words:  # a page longer than a section is split on its own
+            sections.append((first, page_no, " ".join(current[:words])))
+            current = current[words:]
+            first = page_no
+    if current:
+        sections.append((first, len(pages), " ".join(current)))
+    return sections
+
+
+async def _complete(system: str, user: str, max_tokens: int) -> str:
+    async with _limit():
+        result = await asyncio.to_thread(
+            groq_client.client.chat.completions.create,
+            model=groq_client.model,
+            messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
+            temperature=0.2,
+            max_tokens=max_tokens,
+        )
+    return result.choices[0].message.content.strip()
+
+
+async def summarize_section(text: str) -> str:
+    key = content_key(PROMPT_VERSION, "section", text)
+    cached = summary_cache.get("sections", key)
+    if cached is not None:
+        return cached
+    summary = await _complete(SECTION_PROMPT, text, max_tokens=300)
+    summary_cache.put("sections", key, summary)
+    return summary
+
+
+async def reduce_summaries(summaries: List[str]) -> List[str]:
+    """Combine groups of summaries until one final call can take them all."""
+    while len(summaries) > REDUCE_FANIN:
+        groups = [summaries[i:i + REDUCE_FANIN] for i in range(0, len(summaries), REDUCE_FANIN)]
+
+        async def combine(group: List[str]) -> str:
+            joined = "\n\n".join(group)
+            key = content_key(PROMPT_VERSION, "combine", joined)
+            cached = summary_cache.get("sections", key)
+            if cached is None:
+                cached = await _complete(COMBINE_PROMPT, joined, max_tokens=500)
+                summary_cache.put("sections", key, cached)
+            return cached
+
+        summaries = list(await asyncio.gather(*(combine(group) for group in groups)))
+    return summaries
+
+
+def _section_line(first: int, last: int, summary: str) -> str:
+    pages = f"p. {first}" if first == last else f"pp. {first}–{last}"
+    return f"📄 **{pages}:** {summary}\n"
+
+
+async def map_reduce_summary(pages: List[str], request: str) -> str:
+    """Summarize sections concurrently (streaming them in page order), then reduce to one summary."""
+    sections = split_sections(pages)
+    if not sections:
+        raise ValueError("❌ No extractable text in the document")
+    if len(sections) == 1:
+        return await _complete(FINAL_PROMPT, f"User request: {request}\n\nDocument:\n{sections[0][2]}", max_tokens=700)
+
+    async def run(i: int, text: str) -> Tuple[int, str]:
+        return i, await summarize_section(text)
+
+    summaries: Dict[int, str] = {}
+    lines: List[str] = []
+    tasks = [asyncio.ensure_future(run(i, text)) for i, (_, _, text) in enumerate(sections)]
+    try:
+        for done in asyncio.as_completed(tasks):
+            i, summary = await done
+            summaries[i] = summary
+            # Emit the finished prefix so the streamed text stays in page order
+            while len(lines) in summaries:
+                first, last, _ = sections[len(lines)]
+                lines.append(_section_line(first, last, summaries[len(lines)]))
+                emit(lines[-1])
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    reduced = await reduce_summaries([summaries[i] for i in range(len(sections))])
+    final = await _complete(
+        FINAL_PROMPT,
+        f"User request: {request}\n\nSection summaries:\n" + "\n\n".join(reduced),
+        max_tokens=700,
+    )
+    heading = "\n**Overall summary**\n"
+    emit(heading)
+    return "".join(lines) + heading + final
+
+
+async def local_summarize_task(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Map-reduce summary of the latest PDF/TXT with Groq; other formats go to the RAG server."""
+    try:
+        prompt = state.get("input", "")
+        chat_id = state.get("chat_id", "default-session")
+
+        local_file = get_latest_uploaded_file(chat_id)
+        if local_file["extension"] not in (".pdf", ".txt"):
+            return await summarize_task(state)
+
+        quick = bool(QUICK_REQUEST.search(prompt))
+
+        # The same document asked the same way, from any session, is answered from the cache
+        final_key = content_key(PROMPT_VERSION, local_file["sha256"], normalize_request(prompt), str(EXTRACTIVE_BUDGET_TOKENS))
+        cached = None if quick else summary_cache.get("documents", final_key)
+        if cached is not None:
+            logger.info(f"⚡ Summary cache hit for '{local_file['original_name']}'")
+            return {**state, "doc_id": local_file["sha256"], "response": cached}
+
+        path = os.path.abspath(local_file["path"])
+        if local_file["extension"] == ".pdf":
+            pages = await file_processor.extract_pdf_pages_async(path, local_file["sha256"])
+        else:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                pages = f.read().split("\f")
+
+        if quick:
+            summary = await asyncio.to_thread(quick_summary, pages)
+            logger.info(f"⚡ Quick extractive summary of '{local_file['original_name']}'")
+            return {**state, "doc_id": local_file["sha256"], "response": summary}
+
+        # Only the most central sentences (within EXTRACTIVE_BUDGET_TOKENS) reach the LLM
+        condensed = await asyncio.to_thread(condense_pages, pages)
+        if condensed is not pages:
+            logger.info(
+                f"✂️ Condensed '{local_file['original_name']}' from ~{sum(map(estimate_tokens, pages))} "
+                f"to ~{sum(map(estimate_tokens, condensed))} tokens"
+            )
+
+        summary = await map_reduce_summary(condensed, prompt or "Summarize the document.")
+        summary_cache.put("documents", final_key, summary)
+        logger.info(f"✅ Summarized '{local_file['original_name']}' locally")
+        return {**state, "doc_id": local_file["sha256"], "response": summary}
+
+    except Exception as e:
+        logger.error(f"❌ Error in local_summarize_task: {e}")
+        return {**state, "response": f"Summarization error: {str(e)}"}
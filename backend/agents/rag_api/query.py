@@ -1,61 +1,48 @@
 import os
-import requests
 from typing import Dict, Any
-from dotenv import load_dotenv
 import logging
 
-logger = logging.getLogger(__name__)
-load_dotenv()
+from backend.utils.upload_catalog import upload_catalog, DOCUMENT_EXTENSIONS
+from backend.utils.rag_registry import rag_registry
+from backend.utils.rag_client import rag_client
 
-RAG_API_KEY = os.getenv("RAG_API_KEY")
-API_BASE_URL = os.getenv("API_BASE_URL")
-HEADERS = {"Authorization": f"Bearer {RAG_API_KEY}"}
+logger = logging.getLogger(__name__)
 
-def get_latest_uploaded_file_path() -> str:
-    uploads_dir = os.path.abspath("uploads")
-    if not os.path.exists(uploads_dir) or not os.listdir(uploads_dir):
+def get_latest_uploaded_file(chat_id: str) -> dict:
+    latest_file = upload_catalog.latest_file(chat_id, DOCUMENT_EXTENSIONS)
+    if latest_file is None:
         raise FileNotFoundError("❌ No file found in the 'uploads/' directory.")
 
-    return max(
-        [os.path.join(uploads_dir, f) for f in os.listdir(uploads_dir)],
-        key=os.path.getmtime
-    )
-
-def upload_file_to_server(file_path: str, chat_id: str) -> str:
-    upload_url = f"{API_BASE_URL}/upload"
-    with open(file_path, "rb") as file_data:
-        files = {"files": (os.path.basename(file_path), file_data)}
-        data = {"chat_id": chat_id}
-        response = requests.post(upload_url, headers=HEADERS, files=files, data=data)
-
-    if response.status_code != 200:
-        raise RuntimeError(f"❌ Upload failed: {response.status_code} - {response.text}")
+    return latest_file
 
-    uploaded = response.json()
-    if not uploaded or not isinstance(uploaded.get("filenames"), list):
-        raise ValueError("❌ Invalid upload response")
+def get_latest_uploaded_file_path(chat_id: str) -> str:
+    return os.path.abspath(get_latest_uploaded_file(chat_id)["path"])
 
-    return uploaded["filenames"][0]  # server-side filename
+async def upload_file_to_server(file_path: str, chat_id: str) -> str:
+    return await rag_client.upload(file_path, chat_id)  # server-side filename
 
 async def query_task(state: Dict[str, Any]) -> Dict[str, Any]:
     try:
         prompt = state.get("input", "")
         chat_id = state.get("chat_id", "default-session")
 
-        # Upload latest file and extract server-side doc_id
-        local_path = get_latest_uploaded_file_path()
-        doc_id = upload_file_to_server(local_path, chat_id)
-        state["doc_id"] = doc_id  # Save for future nodes
+        # Server-side doc_id for the latest file; uploaded only the first time this content is seen
+        local_file = get_latest_uploaded_file(chat_id)
+        local_path = os.path.abspath(local_file["path"])
+
+        async def upload(path: str) -> str:
+            return await upload_file_to_server(path, chat_id)
 
-        query_url = f"{API_BASE_URL}/query"
-        form_data = [
-            ("prompt", prompt),
-            ("doc_id", doc_id),
-            ("chat_id", chat_id),
-        ]
+        doc_id = await rag_registry.ensure_uploaded(local_path, chat_id, upload, local_file.get("sha256"))
 
-        response = requests.post(query_url, headers=HEADERS, data=form_data)
+        response = await rag_client.query(prompt, doc_id, chat_id)
+        if response.status_code >= 400:
+            # The server may have dropped the document: upload it again once
+            rag_registry.invalidate(doc_id, chat_id)
+            doc_id = await rag_registry.ensure_uploaded(local_path, chat_id, upload, local_file.get("sha256"))
+            response = await rag_client.query(prompt, doc_id, chat_id)
         response.raise_for_status()
+        state["doc_id"] = doc_id  # Save for future nodes
 
         result = response.json()
         if not isinstance(result, dict) or "result" not in result:
@@ -1,64 +1,54 @@
 # backend/agents/rag_api/summarize.py
 
 import os
-import requests
-from dotenv import load_dotenv
 from typing import Dict, Any
 import logging
 import asyncio
 
-logger = logging.getLogger(__name__)
-load_dotenv()
+from backend.utils.upload_catalog import upload_catalog, DOCUMENT_EXTENSIONS
+from backend.utils.rag_registry import rag_registry
+from backend.utils.rag_client import rag_client
 
-RAG_API_KEY = os.getenv("RAG_API_KEY")
-API_BASE_URL = os.getenv("API_BASE_URL")
-HEADERS = {"Authorization": f"Bearer {RAG_API_KEY}"}
+logger = logging.getLogger(__name__)
 
 
-def get_latest_uploaded_file_path() -> str:
-    uploads_dir = os.path.abspath("uploads")
-    if not os.path.exists(uploads_dir) or not os.listdir(uploads_dir):
+def get_latest_uploaded_file(chat_id: str) -> dict:
+    latest_file = upload_catalog.latest_file(chat_id, DOCUMENT_EXTENSIONS)
+    if latest_file is None:
         raise FileNotFoundError("❌ No file found in the 'uploads/' directory.")
 
-    return max(
-        [os.path.join(uploads_dir, f) for f in os.listdir(uploads_dir)],
-        key=os.path.getmtime
-    )
-
+    return latest_file
 
-def upload_file_to_server(file_path: str, chat_id: str = "default-session") -> str:
-    upload_url = f"{API_BASE_URL}/upload"
-    with open(file_path, "rb") as file_data:
-        files = {
-            "files": (os.path.basename(file_path), file_data),
-            "chat_id": (None, chat_id)
-        }
-        response = requests.post(upload_url, headers=HEADERS, files=files)
 
-    if response.status_code != 200:
-        raise RuntimeError(f"❌ Upload failed: {response.status_code} - {response.text}")
+def get_latest_uploaded_file_path(chat_id: str) -> str:
+    return os.path.abspath(get_latest_uploaded_file(chat_id)["path"])
 
-    uploaded = response.json()
-    if not uploaded or "filenames" not in uploaded or not uploaded["filenames"]:
-        raise ValueError("❌ Invalid upload response")
 
-    return uploaded["filenames"][0]  # Server-side filename
+async def upload_file_to_server(file_path: str, chat_id: str = "default-session") -> str:
+    return await rag_client.upload(file_path, chat_id)  # Server-side filename
 
 
 # LangGraph-compatible async summarization task
 async def summarize_task(state: Dict[str, Any]) -> Dict[str, Any]:
     try:
         chat_id = state.get("chat_id", "default-session")
-        local_path = get_latest_uploaded_file_path()
-        filename_on_server = upload_file_to_server(local_path, chat_id)
+        local_file = get_latest_uploaded_file(chat_id)
+        local_path = os.path.abspath(local_file["path"])
 
-        state["doc_id"] = filename_on_server  # Save for downstream
+        async def upload(path: str) -> str:
+            return await upload_file_to_server(path, chat_id)
+
+        filename_on_server = await rag_registry.ensure_uploaded(local_path, chat_id, upload, local_file.get("sha256"))
 
-        summarize_url = f"{API_BASE_URL}/summarize"
-        form_data = [("filenames", filename_on_server)]
-        res = requests.post(summarize_url, headers=HEADERS, data=form_data)
+        res = await rag_client.summarize([filename_on_server])
+        if res.status_code >= 400:
+            # The server may have dropped the document: upload it again once
+            rag_registry.invalidate(filename_on_server, chat_id)
+            filename_on_server = await rag_registry.ensure_uploaded(local_path, chat_id, upload, local_file.get("sha256"))
+            res = await rag_client.summarize([filename_on_server])
 
         res.raise_for_status()
+        state["doc_id"] = filename_on_server  # Save for downstream
         result = res.json()
 
         if not isinstance(result, list) or not result:
@@ -75,35 +65,19 @@ async def summarize_task(state: Dict[str, Any]) -> Dict[str, Any]:
 
 
 if __name__ == "__main__":
-    try:
-        file_path = get_latest_uploaded_file_path()
-        upload_url = f"{API_BASE_URL}/upload"
-
-        # Upload file to server
-        with open(file_path, "rb") as f:
-            files = {
-                "files": (os.path.basename(file_path), f, "application/pdf"),
-                "chat_id": (None, "dev-main")  # Or any default/test session ID
-            }
-            upload_res = requests.post(upload_url, headers=HEADERS, files=files)
-
-        if upload_res.status_code != 200:
-            print(f"Upload failed: {upload_res.status_code} - {upload_res.text}")
-            exit(1)
-
-        uploaded_filenames = upload_res.json().get("filenames", [])
-        if not uploaded_filenames:
-            print("No filenames returned from upload.")
-            exit(1)
-
-        # Build state and run summarization
+    async def main():
+        # Upload the latest file for a static test session, then summarize it
+        file_path = get_latest_uploaded_file_path("dev-main")
+        await upload_file_to_server(file_path, "dev-main")
+
         state = {
             "chat_id": "dev-main",  # Static chat_id for testing
             "input": ""
         }
-
-        result = asyncio.run(summarize_task(state))
+        result = await summarize_task(state)
         print(f"Summary: {result.get('response')}")
 
+    try:
+        asyncio.run(main())
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -1,11 +1,10 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
 import json
 import uuid
 import os
-import aiofiles
 from typing import List, Optional
 import logging
 from datetime import datetime
@@ -19,6 +18,17 @@ load_dotenv()
 
 from backend.utils.langgraph_manager import hpgpt_graph
 from backend.utils.file_processor import FileProcessor
+from backend.utils.plot_payload import figure_store
+from backend.utils.upload_catalog import upload_catalog, DATASET_EXTENSIONS
+from backend.utils.dataset_cache import dataset_cache
+from backend.utils.approximate import refinements
+from backend.utils.rag_registry import rag_registry
+from backend.utils.rag_client import rag_client
+from backend.utils.local_retrieval import local_retriever
+from backend.utils.file_utils import save_upload_stream, UploadTooLargeError
+from backend.utils.upload_jobs import upload_jobs
+from backend.agents.document_agent import DOCUMENT_QUERY_BACKEND, DOCUMENT_SUMMARY_BACKEND
+from backend.agents.database_agent import result_cache, translation_cache, sql_engine
 
 from backend.database.db_manager import database
 from backend.database import auth
@@ -31,6 +41,45 @@ logger = logging.getLogger(__name__)
 
 # Initialize file processor
 file_processor = FileProcessor()
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+
+# Post-upload pipeline, run by the upload job workers after the bytes are on disk
+async def extract_pdf_text(entry: dict) -> str:
+    pages = await file_processor.extract_pdf_pages_async(entry["path"], sha256=entry["sha256"])
+    return "".join(pages)
+
+async def index_pdf(entry: dict) -> None:
+    await asyncio.to_thread(
+        local_retriever.ensure_indexed, entry["session_id"], entry["path"], entry["sha256"], entry["original_name"]
+    )
+
+async def register_with_rag(entry: dict) -> None:
+    async def upload(path: str) -> str:
+        return await rag_client.upload(path, entry["session_id"])
+
+    await rag_registry.ensure_uploaded(os.path.abspath(entry["path"]), entry["session_id"], upload, entry["sha256"])
+
+async def inspect_image(entry: dict) -> str:
+    return await asyncio.to_thread(file_processor.process_image, entry["path"])
+
+async def convert_dataset(entry: dict) -> None:
+    future = dataset_cache.schedule(entry["path"], entry["sha256"])
+    if future is not None:
+        await asyncio.wrap_future(future)
+
+async def warm_dataset_profile(entry: dict) -> str:
+    file = {"name": os.path.basename(entry["path"]), "path": entry["path"], "sha256": entry["sha256"]}
+    profile = await asyncio.to_thread(hpgpt_graph.analytics_agent.warm_profile, file)
+    return f"Dataset profiled: {len(profile['columns'])} columns ({', '.join(map(str, profile['columns'][:10]))})"
+
+upload_jobs.add_step("extract_text", (".pdf",), extract_pdf_text)
+if "local" in (DOCUMENT_QUERY_BACKEND, DOCUMENT_SUMMARY_BACKEND):
+    upload_jobs.add_step("index", (".pdf",), index_pdf)
+if "remote" in (DOCUMENT_QUERY_BACKEND, DOCUMENT_SUMMARY_BACKEND) and rag_client.base_url:
+    upload_jobs.add_step("rag_register", (".pdf",), register_with_rag)
+upload_jobs.add_step("inspect_image", (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp"), inspect_image)
+upload_jobs.add_step("convert_dataset", DATASET_EXTENSIONS, convert_dataset)
+upload_jobs.add_step("profile_dataset", DATASET_EXTENSIONS, warm_dataset_profile)
 
 # Track stop requests per session
 stop_requests = {}
@@ -53,6 +102,10 @@ async def lifespan(app: FastAPI):
     logger.info("hpGPT Backend started successfully")
     yield  # Application runs here
     # Shutdown
+    await upload_jobs.stop()
+    await rag_client.aclose()
+    FileProcessor.shutdown()
+    sql_engine.shutdown()
     await database.disconnect()
     logger.info("hpGPT Backend shutting down")
 
@@ -182,7 +235,8 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                     user_msg_id=user_msg_id,
                     assistant_msg_id=assistant_msg_id,
                     user_id=user_id,
-                    websocket=websocket
+                    websocket=websocket,
+                    approximate=message_data.get("approximate")
                                 ):
                     
                     # Check if stop was requested
@@ -379,6 +433,9 @@ async def delete_session(session_id: str):
         success = await hpgpt_graph.delete_session(session_id)
         if success:
             logger.info(f"Deleted session: {session_id}")
+            rag_registry.forget_chat(session_id)
+            local_retriever.forget_session(session_id)
+            upload_catalog.forget_session(session_id)
             # Clean up stop request if exists
             if session_id in stop_requests:
                 del stop_requests[session_id]
@@ -469,40 +526,53 @@ async def get_feedback_analytics():
             }
         )
 
+async def store_upload(session_id: str, file: UploadFile) -> dict:
+    """Stream one upload to disk, catalog it and queue its post-processing"""
+    if file.size and file.size > MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail="File too large. Maximum size is 50MB.")
+
+    # Streamed to disk in fixed-size chunks; the size is enforced on the bytes actually received
+    try:
+        file_path, file_size, sha256 = await save_upload_stream(session_id, file, MAX_UPLOAD_SIZE)
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail="File too large. Maximum size is 50MB.")
+
+    # An identical file already uploaded in this session is reused instead of stored twice
+    existing = upload_catalog.find(session_id, sha256)
+    if existing is not None:
+        os.remove(file_path)
+        file_path = existing["path"]
+
+    logger.info(f"File uploaded: {file.filename} -> {file_path} ({file_size} bytes, sha256 {sha256[:12]})")
+
+    catalog_entry = upload_catalog.register(
+        session_id,
+        file_path,
+        file.filename,
+        content_type=file.content_type,
+        size=file_size,
+        sha256=sha256,
+    )
+    job = upload_jobs.submit(catalog_entry)
+
+    return {
+        "success": True,
+        "filename": file.filename,
+        "file_path": file_path,
+        "file_type": file.content_type,
+        "file_size": file_size,
+        "file_id": catalog_entry["file_id"],
+        "sha256": catalog_entry["sha256"],
+        "status": job["status"],
+        "status_url": f"/uploads/{catalog_entry['file_id']}/status",
+        "content": job["content"] or "",
+    }
+
 @app.post("/upload/{session_id}")
 async def upload_file(session_id: str, file: UploadFile = File(...)):
-    """Upload and process files"""
+    """Upload a file; text extraction and cache warming continue in the background"""
     try:
-        max_size = 50 * 1024 * 1024
-        if file.size and file.size > max_size:
-            raise HTTPException(status_code=413, detail="File too large. Maximum size is 50MB.")
-        
-        file_extension = os.path.splitext(file.filename)[1]
-        original_filename = os.path.splitext(file.filename)[0]
-        unique_id = uuid.uuid4().hex[:16]
-        # unique_filename = f"{session_id}_{unique_id}_{original_filename}{file_extension}"
-        unique_filename = f"{session_id}_{original_filename}{file_extension}"
-        file_path = f"uploads/{unique_filename}"
-        
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
-        
-        logger.info(f"File uploaded: {file.filename} -> {file_path}")
-        
-        processed_content = await file_processor.process_file(file_path, file.content_type)
-        
-        return JSONResponse(
-            status_code=200,
-            content={
-                "success": True,
-                "filename": file.filename,
-                "file_path": file_path,
-                "file_type": file.content_type,
-                "file_size": len(content),
-                "content": processed_content[:500] + "..." if len(processed_content) > 500 else processed_content
-            }
-        )
+        return JSONResponse(status_code=200, content=await store_upload(session_id, file))
         
     except HTTPException:
         raise
@@ -513,6 +583,70 @@ async def upload_file(session_id: str, file: UploadFile = File(...)):
             content={"success": False, "error": str(e)}
         )
 
+@app.post("/uploads/{session_id}")
+async def upload_files(session_id: str, files: List[UploadFile] = File(...)):
+    """Upload several files at once; each is stored and queued in parallel"""
+    results = await asyncio.gather(*(store_upload(session_id, file) for file in files), return_exceptions=True)
+    uploaded = []
+    for file, result in zip(files, results):
+        if isinstance(result, HTTPException):
+            uploaded.append({"success": False, "filename": file.filename, "error": result.detail})
+        elif isinstance(result, Exception):
+            logger.error(f"File upload error: {result}")
+            uploaded.append({"success": False, "filename": file.filename, "error": str(result)})
+        else:
+            uploaded.append(result)
+    return {"success": all(item["success"] for item in uploaded), "files": uploaded}
+
+@app.get("/uploads/{file_id}/status")
+async def get_upload_status(file_id: str):
+    """Progress of an upload's background processing (queued, running, done or failed, per step)"""
+    job = upload_jobs.status(file_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return job
+
+@app.get("/figures/{figure_id}")
+async def get_full_figure(figure_id: str):
+    """Full-resolution figure JSON for charts that were downsampled in chat"""
+    figure_json = figure_store.load(figure_id)
+    if figure_json is None:
+        raise HTTPException(status_code=404, detail="Figure not found")
+    return Response(content=figure_json, media_type="application/json")
+
+@app.get("/analytics/stats")
+async def get_analytics_stats():
+    """Hit rates of the analytics fast path and generated-code cache"""
+    agent = hpgpt_graph.analytics_agent
+    return {"fast_path": agent.fast_path.stats(), "code_cache": agent.code_cache.stats()}
+
+@app.get("/rag/stats")
+async def get_rag_stats():
+    """Reuse counters for documents already uploaded to the RAG server"""
+    return rag_registry.stats()
+
+@app.get("/database/stats")
+async def get_database_stats():
+    """Hit rates of the database agent's SQL result and question→SQL translation caches"""
+    return {"result_cache": result_cache.stats(), "translation_cache": translation_cache.stats()}
+
+@app.get("/analytics/refinements/{refinement_id}")
+async def get_refinement(refinement_id: str, wait: float = 20.0):
+    """Exact answer for an approximate analytics reply; waits up to `wait` seconds for it"""
+    future = refinements.get(refinement_id)
+    if future is None:
+        raise HTTPException(status_code=404, detail="Refinement not found")
+
+    try:
+        result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=min(wait, 60.0))
+    except asyncio.TimeoutError:
+        return {"status": "pending"}
+    except Exception as e:
+        logger.error(f"Exact analytics refinement failed: {e}")
+        return {"status": "failed", "error": str(e)}
+
+    return {"status": "done", **result}
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -0,0 +1,106 @@
+# backend/utils/approximate.py
+
+import os
+import re
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: answer from a sample first for datasets at least this large
+APPROXIMATE_MODE = os.getenv("ANALYTICS_APPROXIMATE", "0") == "1"
+APPROXIMATE_MIN_ROWS = int(os.getenv("ANALYTICS_APPROXIMATE_MIN_ROWS", "1000000"))
+APPROXIMATE_TARGET_S = float(os.getenv("ANALYTICS_APPROXIMATE_TARGET_MS", "500")) / 1000
+APPROXIMATE_REFINE = os.getenv("ANALYTICS_APPROXIMATE_REFINE", "1") == "1"
+
+PILOT_ROWS = 20_000
+REPLICATES = 8
+T_975 = 2.365  # Student t quantile for a 95% interval from 8 replicates (7 degrees of freedom)
+
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?(?![\w.])")
+
+
+def sample_size(seconds_per_row: float, total_rows: int, target_s: float = APPROXIMATE_TARGET_S) -> Optional[int]:
+    """Rows to sample so the sample plus its replicates run in about `target_s`; None if not worth it."""
+    n = max(int(target_s / (2 * max(seconds_per_row, 1e-9))), PILOT_ROWS)
+    return n if 2 * n < total_rows else None
+
+
+def _format(value: float) -> str:
+    return f"{value:,.0f}" if abs(value) >= 1000 else f"{value:.4g}"
+
+
+def annotate_estimates(sample_output: str, replicate_outputs: List[str], replicate_rows: List[int],
+                       sample_rows: int, total_rows: int) -> Optional[str]:
+    """
+    Scale the numbers printed for the sample to the full dataset and attach 95% intervals.
+
+    Each number is compared with the same number from disjoint replicate subsamples: if it
+    grows with the subsample size it is a count or sum (scaled by rows/sample), otherwise a
+    mean-like statistic (left as is). Returns None when the replicate outputs do not line up.
+    """
+    template = _NUMBER.sub("#", sample_output)
+    tokens = _NUMBER.findall(sample_output)
+
+    replicates, sizes = [], []
+    for output, rows in zip(replicate_outputs, replicate_rows):
+        if _NUMBER.sub("#", output) == template:
+            replicates.append([float(t) for t in _NUMBER.findall(output)])
+            sizes.append(rows)
+    if len(replicates) < 3:
+        return None
+    if not tokens:
+        return sample_output
+
+    values = np.array([float(t) for t in tokens])
+    reps = np.array(replicates)
+    scale = sample_rows / np.array(sizes, dtype=float)[:, None]
+
+    extensive = np.abs((reps * scale).mean(axis=0) - values) < np.abs(reps.mean(axis=0) - values)
+    factor = total_rows / sample_rows
+    estimates = np.where(extensive, values * factor, values)
+    spread = np.where(extensive, (reps * scale * factor).std(axis=0, ddof=1), reps.std(axis=0, ddof=1))
+    bounds = T_975 * spread / np.sqrt(len(replicates))
+
+    annotated = iter(
+        token if bound == 0 and not ext else f"≈{_format(estimate)} ± {_format(bound)}"
+        for token, estimate, bound, ext in zip(tokens, estimates, bounds, extensive)
+    )
+    return _NUMBER.sub(lambda _: next(annotated), sample_output)
+
+
+class RefinementStore:
+    """Exact answers computed in the background after an approximate one was returned."""
+
+    def __init__(self, max_entries: int = 256, max_workers: int = 1):
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analytics-refine")
+        self._futures: "OrderedDict[str, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args) -> str:
+        refinement_id = uuid.uuid4().hex
+        future = self._executor.submit(func, *args)
+        with self._lock:
+            self._futures[refinement_id] = future
+            while len(self._futures) > self.max_entries:
+                self._futures.popitem(last=False)
+        return refinement_id
+
+    def get(self, refinement_id: str) -> Optional[Future]:
+        with self._lock:
+            return self._futures.get(refinement_id)
+
+
+refinements = RefinementStore()
+
+
+def render_refinement_placeholder(refinement_id: str) -> str:
+    """Placeholder the chat client swaps for the exact answer once it is ready."""
+    return f'<div class="hpgpt-refinement" data-refinement-id="{refinement_id}"></div>'
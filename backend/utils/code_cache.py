@@ -0,0 +1,111 @@
+# backend/utils/code_cache.py
+
+import os
+import re
+import ast
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CODE_CACHE_SIZE = int(os.getenv("ANALYTICS_CODE_CACHE_SIZE", "256"))
+
+
+def schema_fingerprint(df: pd.DataFrame) -> str:
+    """Hash of the column names and dtypes, so files with the same layout share code."""
+    schema = [[str(col), str(dtype)] for col, dtype in df.dtypes.items()]
+    return hashlib.sha1(json.dumps(schema).encode("utf-8")).hexdigest()
+
+
+def normalize_prompt(prompt: str) -> str:
+    cleaned = re.sub(r"\s+", " ", prompt.strip().lower())
+    return cleaned.rstrip("?!. ")
+
+
+@dataclass
+class CachedCode:
+    key: Tuple[str, str, bool]
+    code: str
+    summary: str
+    is_plot: bool
+    successes: int = 0
+
+
+class CodeCache:
+    """LRU cache of generated analytics code keyed by (schema, prompt, plot mode)."""
+
+    def __init__(self, max_entries: int = CODE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, bool], CachedCode]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, fingerprint: str, prompt: str, is_plot: bool) -> Optional[CachedCode]:
+        """Return the cached entry for this schema, prompt and plot mode."""
+        with self._lock:
+            entry = self._entries.get((fingerprint, normalize_prompt(prompt), is_plot))
+            if entry is None:
+                self.misses += 1
+                return None
+
+            try:
+                ast.parse(entry.code)
+            except SyntaxError:
+                del self._entries[entry.key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(entry.key)
+            self.hits += 1
+            return entry
+
+    def store(self, fingerprint: str, prompt: str, is_plot: bool, code: str, summary: str) -> None:
+        if not code.strip():
+            return
+        try:
+            ast.parse(code)
+        except SyntaxError:
+            return
+
+        key = (fingerprint, normalize_prompt(prompt), is_plot)
+        with self._lock:
+            existing = self._entries.get(key)
+            self._entries[key] = CachedCode(
+                key=key,
+                code=code,
+                summary=summary,
+                is_plot=is_plot,
+                successes=existing.successes if existing else 0,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def record_success(self, entry: CachedCode) -> None:
+        with self._lock:
+            if entry.key in self._entries:
+                self._entries[entry.key].successes += 1
+
+    def discard(self, entry: CachedCode) -> None:
+        with self._lock:
+            if self._entries.pop(entry.key, None) is not None:
+                logger.info(f"🗑️ Dropped failing cached code for prompt: {entry.key[1]}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
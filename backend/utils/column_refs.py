@@ -0,0 +1,168 @@
+# backend/utils/column_refs.py
+
+import ast
+from typing import Dict, List, Optional, Sequence, Set
+
+# Methods that keep every column of the frame they are called on
+ROW_PRESERVING_METHODS = {
+    "sort_values", "sort_index", "nlargest", "nsmallest",
+    "head", "tail", "reset_index", "copy", "sample", "fillna",
+}
+
+# Row filters that look at every column unless `subset=` names the ones they compare
+SUBSET_METHODS = {"dropna", "drop_duplicates"}
+
+# Frame-level callables that only touch the columns named in their keyword arguments
+PLOT_COLUMN_KEYWORDS = {"x", "y"}
+
+
+def _is_column_key(node: ast.AST) -> bool:
+    """df["a"] or df[["a", "b"]]: the result only carries the named columns."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return True
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return bool(node.elts) and all(_is_column_key(elt) for elt in node.elts)
+    return False
+
+
+def _names_subset(call: ast.Call) -> bool:
+    """dropna(subset=[...]) / drop_duplicates([...]): the rows kept depend only on the named columns."""
+    subset = next((kw.value for kw in call.keywords if kw.arg == "subset"), None)
+    if subset is None and call.args and call.func.attr == "drop_duplicates":
+        subset = call.args[0]
+    return subset is not None and _is_column_key(subset)
+
+
+class _FrameUsage:
+    """Decides whether every use of the DataFrame (and frames derived from it) is column-explicit."""
+
+    def __init__(self, tree: ast.AST, columns: Sequence[str]):
+        self.columns = set(columns)
+        self.parents: Dict[ast.AST, ast.AST] = {}
+        for parent in ast.walk(tree):
+            for child in ast.iter_child_nodes(parent):
+                self.parents[child] = parent
+        self.tree = tree
+
+    def _parent(self, node: ast.AST) -> Optional[ast.AST]:
+        return self.parents.get(node)
+
+    def frame_is_safe(self, node: ast.AST, frame_vars: Set[str]) -> bool:
+        parent = self._parent(node)
+
+        if isinstance(parent, ast.Subscript) and parent.value is node:
+            if _is_column_key(parent.slice):
+                return True
+            return self.frame_is_safe(parent, frame_vars)  # row filter keeps every column
+
+        if isinstance(parent, ast.Attribute) and parent.value is node:
+            return self._attribute_is_safe(parent, frame_vars)
+
+        if isinstance(parent, ast.Call) and node in parent.args:
+            func = parent.func
+            if isinstance(func, ast.Name) and func.id == "len":
+                return True
+            if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id == "px":
+                return any(kw.arg in PLOT_COLUMN_KEYWORDS for kw in parent.keywords)
+            return False
+
+        if isinstance(parent, ast.Assign) and parent.value is node:
+            if len(parent.targets) == 1 and isinstance(parent.targets[0], ast.Name):
+                frame_vars.add(parent.targets[0].id)
+                return True
+            return False
+
+        return False
+
+    def _attribute_is_safe(self, attr: ast.Attribute, frame_vars: Set[str]) -> bool:
+        grandparent = self._parent(attr)
+
+        if attr.attr in self.columns:
+            return True
+
+        if attr.attr == "shape":
+            return (
+                isinstance(grandparent, ast.Subscript)
+                and isinstance(grandparent.slice, ast.Constant)
+                and grandparent.slice.value == 0
+            )
+
+        if attr.attr == "loc":
+            if not isinstance(grandparent, ast.Subscript):
+                return False
+            key = grandparent.slice
+            return isinstance(key, ast.Tuple) and len(key.elts) == 2 and _is_column_key(key.elts[1])
+
+        if not (isinstance(grandparent, ast.Call) and grandparent.func is attr):
+            return False
+
+        if attr.attr in ROW_PRESERVING_METHODS:
+            return self.frame_is_safe(grandparent, frame_vars)
+
+        if attr.attr in SUBSET_METHODS:
+            return _names_subset(grandparent) and self.frame_is_safe(grandparent, frame_vars)
+
+        if attr.attr == "groupby":
+            return self._groupby_is_safe(grandparent)
+
+        return False
+
+    def _groupby_is_safe(self, call: ast.Call) -> bool:
+        parent = self._parent(call)
+        if isinstance(parent, ast.Subscript) and parent.value is call:
+            return _is_column_key(parent.slice)
+        if isinstance(parent, ast.Attribute) and parent.value is call:
+            if parent.attr == "size":
+                return True
+            if parent.attr in ("agg", "aggregate"):
+                agg_call = self._parent(parent)
+                return (
+                    isinstance(agg_call, ast.Call)
+                    and bool(agg_call.args)
+                    and isinstance(agg_call.args[0], ast.Dict)
+                    and all(_is_column_key(k) for k in agg_call.args[0].keys if k is not None)
+                )
+        return False
+
+    def all_uses_safe(self, frame_name: str) -> bool:
+        frame_vars = {frame_name}
+        checked: Set[str] = set()
+        while frame_vars - checked:
+            name = (frame_vars - checked).pop()
+            checked.add(name)
+            for node in ast.walk(self.tree):
+                if isinstance(node, ast.Name) and node.id == name and isinstance(node.ctx, ast.Load):
+                    if not self.frame_is_safe(node, frame_vars):
+                        return False
+        return True
+
+
+def referenced_columns(code: str, columns: Sequence[str], frame_name: str = "df") -> Optional[List[str]]:
+    """
+    Columns of `frame_name` that the generated code can touch, in the DataFrame's column order.
+    Returns None when that cannot be determined statically (the caller should load every column).
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+
+    # String expressions evaluated against the frame can name any column
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute) and node.attr in ("query", "eval", "iloc", "columns", "filter"):
+            return None
+
+    if not _FrameUsage(tree, columns).all_uses_safe(frame_name):
+        return None
+
+    known = set(columns)
+    used: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str) and node.value in known:
+            used.add(node.value)
+        elif isinstance(node, ast.Attribute) and node.attr in known:
+            used.add(node.attr)
+
+    ordered = [col for col in columns if col in used]
+    # Keep one column even for row-count-only code so the frame still has its rows
+    return ordered or list(columns[:1])
@@ -0,0 +1,312 @@
+# backend/utils/dataset_cache.py
+
+import os
+import json
+import uuid
+import shutil
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+logger = logging.getLogger(__name__)
+
+DATASET_CACHE_DIR = "dataset_cache"
+MANIFEST_FILE = "manifest.json"
+
+# String columns with at most this many distinct normalized values get a categorical index
+NORMALIZED_MAX_VALUES = int(os.getenv("DATASET_NORMALIZED_MAX_VALUES", "1000"))
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """Make a parsed sheet writable as Arrow: string column names, no mixed-type object columns."""
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        try:
+            pa.array(df[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            df[col] = df[col].map(lambda v: None if pd.isna(v) else str(v))
+    return df.reset_index(drop=True)
+
+
+def normalize_values(series: pd.Series) -> pd.Series:
+    """The same normalization the analytics prompt asks for: str.strip().str.lower()."""
+    return series.astype("string").str.strip().str.lower()
+
+
+def normalized_codes(series: pd.Series) -> tuple:
+    """Sorted normalized values and an int32 code per row (-1 for missing)."""
+    codes, values = pd.factorize(normalize_values(series), sort=True)
+    return codes.astype(np.int32), [str(v) for v in values]
+
+
+def _build_normalized_index(df: pd.DataFrame) -> tuple:
+    """Codes plus a value -> rows map (rows grouped by code, with offsets) for low-cardinality strings."""
+    arrays: Dict[str, np.ndarray] = {}
+    meta: Dict[str, dict] = {}
+    for col in df.columns:
+        series = df[col]
+        if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+            continue
+        if series.nunique(dropna=True) > NORMALIZED_MAX_VALUES:
+            continue
+        codes, values = normalized_codes(series)
+        if len(values) > NORMALIZED_MAX_VALUES:
+            continue
+        order = np.argsort(codes, kind="stable")
+        offsets = np.searchsorted(codes[order], np.arange(len(values) + 1))
+        arrays[f"codes:{col}"] = codes
+        arrays[f"rows:{col}"] = order.astype(np.int64)
+        meta[col] = {"values": values, "offsets": offsets.tolist()}
+    return arrays, meta
+
+
+def stratified_order(strata: Optional[np.ndarray], n_rows: int, seed: int = 42) -> np.ndarray:
+    """
+    Row permutation whose every prefix is a stratified uniform sample: each stratum's rows are
+    spread evenly through the order, so the first n rows hold ~n * share of every stratum.
+    """
+    rng = np.random.default_rng(seed)
+    keys = rng.random(n_rows)
+    if strata is None:
+        return np.argsort(keys)
+
+    grouped = np.lexsort((keys, strata))
+    sorted_strata = strata[grouped]
+    starts = np.searchsorted(sorted_strata, sorted_strata, side="left")
+    sizes = np.searchsorted(sorted_strata, sorted_strata, side="right") - starts
+    priority = np.empty(n_rows)
+    priority[grouped] = (np.arange(n_rows) - starts + rng.random(n_rows)) / sizes
+    return np.argsort(priority, kind="stable")
+
+
+class NormalizedIndex:
+    """
+    Exposed to generated analytics code as `norm`: case- and whitespace-insensitive string
+    filters answered from precomputed codes instead of a str.strip().str.lower() pass.
+    """
+
+    def __init__(self, df: pd.DataFrame, table: Optional[pa.Table] = None, meta: Optional[dict] = None):
+        self._df = df
+        self._table = table
+        self._meta = meta or {}
+        self._computed: Dict[str, tuple] = {}
+
+    def _codes(self, column: str) -> tuple:
+        if column in self._meta and self._table is not None:
+            codes = self._table.column(f"codes:{column}").to_numpy()
+            return codes, self._meta[column]["values"]
+        if column not in self._computed:
+            # Not indexed (or cache not ready yet): normalize this column once per question
+            self._computed[column] = normalized_codes(self._df[column])
+        return self._computed[column]
+
+    def _code(self, values: List[str], value) -> int:
+        key = str(value).strip().lower()
+        position = int(np.searchsorted(values, key))
+        return position if position < len(values) and values[position] == key else -1
+
+    def eq(self, column: str, value) -> pd.Series:
+        """Boolean row mask for normalized(column) == normalized(value)."""
+        codes, values = self._codes(column)
+        code = self._code(values, value)
+        mask = codes == code if code >= 0 else np.zeros(len(codes), dtype=bool)
+        return pd.Series(mask, index=self._df.index, name=column)
+
+    def isin(self, column: str, candidates) -> pd.Series:
+        codes, values = self._codes(column)
+        wanted = [c for c in (self._code(values, v) for v in candidates) if c >= 0]
+        return pd.Series(np.isin(codes, wanted), index=self._df.index, name=column)
+
+    def rows(self, column: str, value) -> np.ndarray:
+        """Row positions whose normalized value matches, via the precomputed value -> rows map."""
+        codes, values = self._codes(column)
+        code = self._code(values, value)
+        if code < 0:
+            return np.array([], dtype=np.int64)
+        if column in self._meta and self._table is not None and f"rows:{column}" in self._table.column_names:
+            offsets = self._meta[column]["offsets"]
+            order = self._table.column(f"rows:{column}").to_numpy()
+            return order[offsets[code]:offsets[code + 1]]
+        return np.flatnonzero(codes == code)
+
+    def values(self, column: str) -> List[str]:
+        return list(self._codes(column)[1])
+
+    def subset(self, df: pd.DataFrame, positions: np.ndarray) -> "NormalizedIndex":
+        """Index for `df`, which holds the rows at `positions` of this index's frame."""
+        table = None
+        if self._table is not None:
+            codes = [name for name in self._table.column_names if name.startswith("codes:")]
+            table = self._table.select(codes).take(pa.array(positions))
+        subset = NormalizedIndex(df, table, self._meta)
+        subset._computed = {col: (codes[positions], values) for col, (codes, values) in self._computed.items()}
+        return subset
+
+
+class DatasetCache:
+    """Uploaded CSV/XLSX files converted once into memory-mappable Arrow IPC files, one per sheet."""
+
+    def __init__(self, cache_dir: str = DATASET_CACHE_DIR, max_workers: int = 2):
+        self.cache_dir = cache_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dataset-cache")
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _dir(self, sha256: str) -> str:
+        return os.path.join(self.cache_dir, sha256)
+
+    def manifest(self, sha256: str) -> Optional[dict]:
+        path = os.path.join(self._dir(sha256), MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def is_ready(self, sha256: str) -> bool:
+        return self.manifest(sha256) is not None
+
+    def schedule(self, path: str, sha256: str) -> Optional[Future]:
+        """Convert in the background; a no-op if the file is cached or already converting."""
+        if not sha256 or self.is_ready(sha256):
+            return None
+        with self._lock:
+            pending = self._pending.get(sha256)
+            if pending is not None and not pending.done():
+                return pending
+            future = self._executor.submit(self.convert, path, sha256)
+            self._pending[sha256] = future
+            future.add_done_callback(lambda _: self._pending.pop(sha256, None))
+            return future
+
+    def convert(self, path: str, sha256: str) -> Optional[dict]:
+        if self.is_ready(sha256):
+            return self.manifest(sha256)
+
+        if path.lower().endswith(".xlsx"):
+            sheets = pd.read_excel(path, sheet_name=None, engine="openpyxl")
+        elif path.lower().endswith(".csv"):
+            sheets = {"data": pd.read_csv(path)}
+        else:
+            return None
+
+        # Write into a scratch directory and rename, so readers never see a half-written cache
+        os.makedirs(self.cache_dir, exist_ok=True)
+        scratch = os.path.join(self.cache_dir, f".{sha256}.{uuid.uuid4().hex}")
+        os.makedirs(scratch)
+        try:
+            entries: List[dict] = []
+            for index, (sheet_name, df) in enumerate(sheets.items()):
+                df = _arrow_safe(df)
+                filename = f"sheet_{index}.arrow"
+                feather.write_feather(df, os.path.join(scratch, filename), compression="uncompressed")
+
+                arrays, normalized = _build_normalized_index(df)
+                index_file = None
+                if arrays:
+                    index_file = f"sheet_{index}.norm.arrow"
+                    feather.write_feather(pa.table(arrays), os.path.join(scratch, index_file),
+                                          compression="uncompressed")
+
+                # Stratify the sample order on the coarsest categorical column, if there is one
+                strata = min((col for col in normalized if len(normalized[col]["values"]) > 1),
+                             key=lambda col: len(normalized[col]["values"]), default=None)
+                order = stratified_order(arrays[f"codes:{strata}"] if strata else None, len(df))
+                sample_file = f"sheet_{index}.sample.arrow"
+                feather.write_feather(pa.table({"row": order.astype(np.int64)}),
+                                      os.path.join(scratch, sample_file), compression="uncompressed")
+
+                entries.append({
+                    "name": str(sheet_name),
+                    "file": filename,
+                    "rows": len(df),
+                    "columns": list(df.columns),
+                    "normalized_file": index_file,
+                    "normalized": normalized,
+                    "sample_file": sample_file,
+                    "strata": strata,
+                })
+
+            manifest = {"source": path, "sha256": sha256, "sheets": entries}
+            with open(os.path.join(scratch, MANIFEST_FILE), "w") as f:
+                json.dump(manifest, f, indent=2)
+
+            try:
+                os.rename(scratch, self._dir(sha256))
+            except OSError:
+                # Another worker finished the same content first
+                shutil.rmtree(scratch, ignore_errors=True)
+            logger.info(f"🗂️ Cached {os.path.basename(path)} as {len(entries)} Arrow sheet(s)")
+            return self.manifest(sha256)
+
+        except Exception as e:
+            shutil.rmtree(scratch, ignore_errors=True)
+            logger.error(f"❌ Dataset conversion failed for {path}: {e}")
+            return None
+
+    def load(self, sha256: str, sheet: Optional[str] = None,
+             columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """Memory-map a cached sheet (the first one by default); None if not converted yet."""
+        manifest = self.manifest(sha256) if sha256 else None
+        if manifest is None or not manifest["sheets"]:
+            return None
+
+        entry = manifest["sheets"][0]
+        if sheet is not None:
+            entry = next((s for s in manifest["sheets"] if s["name"] == sheet), entry)
+
+        table = feather.read_table(
+            os.path.join(self._dir(sha256), entry["file"]),
+            columns=columns,
+            memory_map=True,
+        )
+        return table.to_pandas()
+
+    def sample(self, sha256: str, n: int, columns: Optional[List[str]] = None) -> Optional[tuple]:
+        """
+        The first n rows of the precomputed stratified order, read in row order.
+        Returns (frame, row positions, rank of each row in the order), or None if not cached.
+        """
+        manifest = self.manifest(sha256) if sha256 else None
+        if manifest is None or not manifest["sheets"] or not manifest["sheets"][0].get("sample_file"):
+            return None
+
+        entry = manifest["sheets"][0]
+        order = feather.read_table(os.path.join(self._dir(sha256), entry["sample_file"]),
+                                   memory_map=True).column("row").to_numpy()[:n]
+        ranks = np.argsort(order)
+        rows = order[ranks]
+        table = feather.read_table(os.path.join(self._dir(sha256), entry["file"]), columns=columns, memory_map=True)
+        return table.take(pa.array(rows)).to_pandas(), rows, ranks
+
+    def normalized_index(self, sha256: Optional[str], df: pd.DataFrame,
+                         rows: Optional[np.ndarray] = None) -> NormalizedIndex:
+        """
+        `norm` accessor for the first sheet; computes on demand when nothing is cached.
+        Pass `rows` when `df` holds only those row positions of the sheet (e.g. a sample).
+        """
+        manifest = self.manifest(sha256) if sha256 else None
+        if manifest is None or not manifest["sheets"]:
+            return NormalizedIndex(df)
+
+        entry = manifest["sheets"][0]
+        expected = len(rows) if rows is not None else entry["rows"]
+        if not entry.get("normalized_file") or expected != len(df):
+            return NormalizedIndex(df)
+
+        table = feather.read_table(os.path.join(self._dir(sha256), entry["normalized_file"]), memory_map=True)
+        if rows is not None:
+            codes = [name for name in table.column_names if name.startswith("codes:")]
+            table = table.select(codes).take(pa.array(rows))
+        return NormalizedIndex(df, table, entry["normalized"])
+
+
+dataset_cache = DatasetCache()
@@ -0,0 +1,155 @@
+# backend/utils/doc_compare.py
+
+import os
+import re
+import zlib
+import difflib
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PASSAGE_WORDS = int(os.getenv("COMPARE_PASSAGE_WORDS", "120"))
+SHINGLE_WORDS = 5
+NUM_PERM = 64
+BANDS = 32  # 2 rows per band: pairs around 30% similar still become candidates
+MATCH_THRESHOLD = 0.3  # below this, passages are treated as unrelated (added/removed)
+SAME_THRESHOLD = 0.95
+
+_PRIME = (1 << 61) - 1
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+
+@dataclass
+class Passage:
+    page: int  # 1-based
+    text: str
+    shingles: set = field(default_factory=set, repr=False)
+    signature: Optional[np.ndarray] = field(default=None, repr=False)
+
+
+@dataclass
+class Comparison:
+    unchanged: int
+    changed: List[Tuple[Passage, Passage, float]]
+    added: List[Passage]
+    removed: List[Passage]
+
+
+def split_passages(pages: List[str], words: int = PASSAGE_WORDS) -> List[Passage]:
+    """Paragraph-sized passages per page; long paragraphs are cut into `words`-word windows."""
+    passages = []
+    for page_no, page in enumerate(pages, start=1):
+        buffer: List[str] = []
+        for paragraph in re.split(r"\n\s*\n", page):
+            tokens = paragraph.split()
+            if buffer and len(buffer) + len(tokens) > words:
+                passages.append(Passage(page_no, " ".join(buffer)))
+                buffer = []
+            buffer.extend(tokens)
+            while len(buffer) >= words:
+                passages.append(Passage(page_no, " ".join(buffer[:words])))
+                buffer = buffer[words:]
+        if buffer:
+            passages.append(Passage(page_no, " ".join(buffer)))
+    return passages
+
+
+def shingles(text: str, k: int = SHINGLE_WORDS) -> set:
+    tokens = re.findall(r"\w+", text.lower())
+    if len(tokens) < k:
+        return {zlib.crc32(" ".join(tokens).encode("utf-8"))} if tokens else set()
+    return {zlib.crc32(" ".join(tokens[i:i + k]).encode("utf-8")) for i in range(len(tokens) - k + 1)}
+
+
+def minhash(shingle_set: set) -> np.ndarray:
+    if not shingle_set:
+        return np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    x = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+    return ((np.outer(x, _A) + _B) % _PRIME).min(axis=0)
+
+
+def _prepare(passages: List[Passage]):
+    for passage in passages:
+        passage.shingles = shingles(passage.text)
+        passage.signature = minhash(passage.shingles)
+
+
+def _candidates(old: List[Passage], new: List[Passage]) -> set:
+    """LSH banding: pairs that agree on every row of at least one band."""
+    rows = NUM_PERM // BANDS
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    for j, passage in enumerate(new):
+        for band in range(BANDS):
+            key = (band, passage.signature[band * rows:(band + 1) * rows].tobytes())
+            buckets.setdefault(key, []).append(j)
+
+    pairs = set()
+    for i, passage in enumerate(old):
+        for band in range(BANDS):
+            key = (band, passage.signature[band * rows:(band + 1) * rows].tobytes())
+            for j in buckets.get(key, ()):
+                pairs.add((i, j))
+    return pairs
+
+
+def compare_documents(old_pages: List[str], new_pages: List[str]) -> Comparison:
+    """Align passages of two documents by MinHash similarity (one-to-one, most similar first)."""
+    old, new = split_passages(old_pages), split_passages(new_pages)
+    _prepare(old)
+    _prepare(new)
+
+    scored = []
+    for i, j in _candidates(old, new):
+        a, b = old[i].shingles, new[j].shingles
+        similarity = len(a & b) / len(a | b) if a | b else 1.0
+        if similarity >= MATCH_THRESHOLD:
+            # Prefer pairs in the same relative position when similarities tie
+            drift = abs(i / max(len(old), 1) - j / max(len(new), 1))
+            scored.append((-similarity, drift, i, j, similarity))
+    scored.sort()
+
+    used_old, used_new = set(), set()
+    unchanged, changed = 0, []
+    for _, _, i, j, similarity in scored:
+        if i in used_old or j in used_new:
+            continue
+        used_old.add(i)
+        used_new.add(j)
+        if similarity >= SAME_THRESHOLD or old[i].text == new[j].text:
+            unchanged += 1
+        else:
+            changed.append((j, old[i], new[j], similarity))
+
+    changed.sort(key=lambda pair: pair[0])  # in the new document's order
+    return Comparison(
+        unchanged=unchanged,
+        changed=[(a, b, similarity) for _, a, b, similarity in changed],
+        added=[p for j, p in enumerate(new) if j not in used_new],
+        removed=[p for i, p in enumerate(old) if i not in used_old],
+    )
+
+
+def word_diff(old_text: str, new_text: str, context: int = 4) -> str:
+    """Only the differing words of a changed passage, with a little context: `[-old-]{+new+}`."""
+    a, b = old_text.split(), new_text.split()
+    parts = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(a=a, b=b, autojunk=False).get_opcodes():
+        if tag == "replace" and "".join(a[i1:i2]) == "".join(b[j1:j2]):
+            tag = "equal"  # only the line wrapping differs
+        if tag == "equal":
+            if i2 - i1 > 2 * context:
+                parts.append(" ".join(a[i1:i1 + context]) + " … " + " ".join(a[i2 - context:i2]))
+            else:
+                parts.append(" ".join(a[i1:i2]))
+            continue
+        if i2 > i1:
+            parts.append("[-" + " ".join(a[i1:i2]) + "-]")
+        if j2 > j1:
+            parts.append("{+" + " ".join(b[j1:j2]) + "+}")
+    return " ".join(p for p in parts if p)
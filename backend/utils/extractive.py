@@ -0,0 +1,138 @@
+# backend/utils/extractive.py
+
+import os
+import re
+import zlib
+import logging
+from typing import List, Tuple
+
+import numpy as np
+
+from backend.utils.local_retrieval import tokenize
+
+logger = logging.getLogger(__name__)
+
+EXTRACTIVE_BUDGET_TOKENS = int(os.getenv("EXTRACTIVE_BUDGET_TOKENS", "6000"))
+QUICK_SUMMARY_TOKENS = int(os.getenv("QUICK_SUMMARY_TOKENS", "400"))
+FEATURE_DIM = 2 ** 11
+NEIGHBOURS = 20  # strongest similarity edges kept per sentence, so large documents stay O(n·k)
+BLOCK_ROWS = 512
+DAMPING = 0.85
+MIN_SENTENCE_WORDS = 5
+MAX_SENTENCE_WORDS = 80
+REDUNDANCY = 0.8  # a sentence this similar to one already chosen adds nothing
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+(?=[\"'(\[]?[A-Z])|\n\s*\n")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about 4 characters per token for English)."""
+    return (len(text) + 3) // 4
+
+
+def split_sentences(pages: List[str]) -> List[Tuple[int, str]]:
+    """(1-based page, sentence) pairs; fragments under MIN_SENTENCE_WORDS (headers, page numbers) are dropped."""
+    sentences = []
+    for page_no, page in enumerate(pages, start=1):
+        for raw in _SENTENCE_END.split(page):
+            words = raw.split()
+            if len(words) < MIN_SENTENCE_WORDS:
+                continue
+            # Run-on text without punctuation (tables, bad extraction) is cut into sentence-sized pieces
+            for start in range(0, len(words), MAX_SENTENCE_WORDS):
+                piece = words[start:start + MAX_SENTENCE_WORDS]
+                if len(piece) >= MIN_SENTENCE_WORDS:
+                    sentences.append((page_no, " ".join(piece)))
+    return sentences
+
+
+def _vectors(sentences: List[str]) -> np.ndarray:
+    """Row-normalized TF-IDF vectors over hashed unigrams."""
+    counts = np.zeros((len(sentences), FEATURE_DIM), dtype=np.float32)
+    for i, sentence in enumerate(sentences):
+        for token in tokenize(sentence):
+            counts[i, zlib.crc32(token.encode("utf-8")) % FEATURE_DIM] += 1.0
+    df = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + df)).astype(np.float32) + 1.0
+    vectors = np.log1p(counts) * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def textrank(vectors: np.ndarray, iterations: int = 50, tolerance: float = 1e-6) -> np.ndarray:
+    """TextRank centrality of each sentence over a cosine-similarity graph (top-k edges per sentence)."""
+    n = len(vectors)
+    if n <= 2:
+        return np.ones(n, dtype=np.float32)
+
+    k = min(NEIGHBOURS, n - 1)
+    rows, cols, weights = [], [], []
+    for start in range(0, n, BLOCK_ROWS):
+        sims = vectors[start:start + BLOCK_ROWS] @ vectors.T
+        block = np.arange(sims.shape[0])
+        sims[block, block + start] = 0.0  # no self-loops
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        rows.append(np.repeat(block + start, k))
+        cols.append(top.ravel())
+        weights.append(np.maximum(sims[block[:, None], top], 0.0).ravel())
+    rows, cols, weights = np.concatenate(rows), np.concatenate(cols), np.concatenate(weights)
+
+    # Symmetrize: an edge kept from either end counts for both sentences
+    rows, cols = np.concatenate([rows, cols]), np.concatenate([cols, rows])
+    weights = np.concatenate([weights, weights])
+    out_weight = np.zeros(n, dtype=np.float64)
+    np.add.at(out_weight, rows, weights)
+
+    scores = np.full(n, 1.0 / n)
+    share = np.divide(weights, out_weight[rows], out=np.zeros_like(weights, dtype=np.float64),
+                      where=out_weight[rows] > 0)
+    for _ in range(iterations):
+        incoming = np.zeros(n)
+        np.add.at(incoming, cols, share * scores[rows])
+        updated = (1 - DAMPING) / n + DAMPING * incoming
+        if np.abs(updated - scores).sum() < tolerance:
+            scores = updated
+            break
+        scores = updated
+    return scores
+
+
+def extract_central(pages: List[str], budget_tokens: int = EXTRACTIVE_BUDGET_TOKENS) -> List[Tuple[int, str]]:
+    """The most central sentences that fit in `budget_tokens`, returned in document order."""
+    sentences = split_sentences(pages)
+    if not sentences:
+        return []
+    vectors = _vectors([text for _, text in sentences])
+    scores = textrank(vectors)
+
+    chosen, used = [], 0
+    for i in np.argsort(-scores, kind="stable"):
+        cost = estimate_tokens(sentences[i][1])
+        if used + cost > budget_tokens:
+            continue  # a shorter sentence further down may still fit
+        if chosen and float((vectors[chosen] @ vectors[i]).max()) > REDUNDANCY:
+            continue
+        chosen.append(int(i))
+        used += cost
+    return [sentences[i] for i in sorted(chosen)]
+
+
+def condense_pages(pages: List[str], budget_tokens: int = EXTRACTIVE_BUDGET_TOKENS) -> List[str]:
+    """
+    The document cut down to its central sentences, still one string per page (pages with none
+    selected become empty), so page references survive. Returned unchanged if it already fits.
+    """
+    if sum(estimate_tokens(page) for page in pages) <= budget_tokens:
+        return pages
+    condensed = [[] for _ in pages]
+    for page_no, sentence in extract_central(pages, budget_tokens):
+        condensed[page_no - 1].append(sentence)
+    return [" ".join(sentences) for sentences in condensed]
+
+
+def quick_summary(pages: List[str], budget_tokens: int = QUICK_SUMMARY_TOKENS) -> str:
+    """Instant summary without an LLM call: the key sentences as bullets with their pages."""
+    sentences = extract_central(pages, budget_tokens)
+    if not sentences:
+        raise ValueError("❌ No extractable text in the document")
+    return "**Key sentences**\n" + "\n".join(f"- {text} (p. {page_no})" for page_no, text in sentences)
@@ -0,0 +1,315 @@
+# backend/utils/fast_path.py
+
+import re
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+AGGREGATES = {
+    "average": "mean", "mean": "mean", "avg": "mean",
+    "total": "sum", "sum": "sum",
+    "maximum": "max", "max": "max", "highest": "max", "largest": "max",
+    "minimum": "min", "min": "min", "lowest": "min", "smallest": "min",
+}
+AGGREGATE_NAMES = {"mean": "average", "sum": "total", "max": "maximum", "min": "minimum"}
+
+# Answers listing groups or rows show at most this many lines
+MAX_LISTED = 20
+
+_CHART = re.compile(r"\b(?:as |in |with )?(?:an? )?(?:bar )?(?:chart|graph|plot|visuali[sz]ation)\b|\b(?:plot|visuali[sz]e|chart|graph)\b")
+_LEADING = re.compile(
+    r"^(?:(?:please|can you|could you|show me|show|give me|tell me|find|display|list|get|"
+    r"what is|what's|what are|calculate|compute)\s+)+"
+)
+_AGG_WORDS = "|".join(sorted(AGGREGATES, key=len, reverse=True))
+# Exclusions flip the filter the parser would extract, so such questions go to the LLM
+_NEGATION = re.compile(r"\b(?:not|non|no|without|exclud\w*|except\w*|other than|besides|apart from)\b|n't\b")
+# Trailing nouns that only name the dataset's rows ("how many records", "average price of cars")
+ROW_NOUNS = {"row", "rows", "record", "records", "entry", "entries"}
+# File-name words that say nothing about what a row is
+_FILE_WORDS = {"data", "dataset", "sample", "file", "export", "final", "clean", "cleaned", "raw", "copy", "new", "test"}
+
+
+@dataclass
+class FastQuery:
+    """A parsed aggregate question, compiled to one vectorized pandas expression."""
+    kind: str  # count | nunique | aggregate | top_rows | top_groups
+    value: Optional[str] = None
+    group: Optional[str] = None
+    agg: Optional[str] = None
+    n: Optional[int] = None
+    largest: bool = True
+    filter: Optional[Tuple[str, str]] = None
+    chart: bool = False
+
+    def frame(self) -> str:
+        if self.filter is None:
+            return "df"
+        column, value = self.filter
+        return f"df[norm.eq({column!r}, {value!r})]"
+
+    def code(self) -> str:
+        frame = self.frame()
+        if self.kind == "count":
+            line = f"result = int({frame}.shape[0])"
+        elif self.kind == "nunique":
+            line = f"result = int({frame}[{self.value!r}].nunique())"
+        elif self.kind == "aggregate" and self.group is None:
+            line = f"result = {frame}[{self.value!r}].{self.agg}()"
+        elif self.kind == "aggregate":
+            line = f"result = {frame}.groupby({self.group!r})[{self.value!r}].{self.agg}().sort_values(ascending=False)"
+        elif self.kind == "top_rows":
+            method = "nlargest" if self.largest else "nsmallest"
+            line = f"result = {frame}.{method}({self.n}, {self.value!r})"
+        else:
+            method = "nlargest" if self.largest else "nsmallest"
+            line = f"result = {frame}.groupby({self.group!r})[{self.value!r}].{self.agg}().{method}({self.n})"
+
+        if self.chart and self.group is not None:
+            line += f"\nfig = px.bar(result.reset_index(), x={self.group!r}, y={self.value!r})"
+        return line
+
+
+def _format_value(value, column=None) -> str:
+    # Years (and other small integers) read wrong with thousands separators: "2,020"
+    grouping = "" if column is not None and "year" in str(column).lower() else ","
+    if isinstance(value, (float, np.floating)):
+        return f"{value:{grouping}.2f}"
+    if isinstance(value, (int, np.integer)):
+        return str(value) if abs(value) < 10000 else f"{value:{grouping}}"
+    return str(value)
+
+
+def entity_nouns(file_name: str) -> Set[str]:
+    """Nouns a dataset's file name gives its rows: "used_cars.csv" -> {"used", "car", "cars"}."""
+    stem = re.sub(r"^[0-9a-f-]{36}_", "", re.sub(r"\.[a-z0-9]+$", "", file_name.lower()))  # upload id prefix
+    nouns = set()
+    for word in re.findall(r"[a-z]{3,}", stem):
+        if word in _FILE_WORDS:
+            continue
+        singular = re.sub(r"s$", "", word)
+        nouns |= {word, singular, singular + "s"}
+    return nouns
+
+
+def describe_result(query: FastQuery, result) -> str:
+    """Templated answer sentence (plus a short listing for grouped or row results)."""
+    where = f" where {query.filter[0]} is '{query.filter[1]}'" if query.filter else ""
+
+    if query.kind == "count":
+        return f"There are {result:,} rows{where}."
+    if query.kind == "nunique":
+        return f"There are {result:,} distinct values of {query.value}{where}."
+
+    agg_name = AGGREGATE_NAMES.get(query.agg, query.agg)
+    if query.kind == "aggregate" and query.group is None:
+        return f"The {agg_name} {query.value}{where} is {_format_value(result, query.value)}."
+
+    if query.kind == "top_rows":
+        heading = f"{'Top' if query.largest else 'Bottom'} {query.n} rows by {query.value}{where}:"
+        lines = [
+            "- " + ", ".join(f"{col}: {_format_value(val, col)}" for col, val in row.items())
+            for _, row in result.head(MAX_LISTED).iterrows()
+        ]
+    else:
+        if query.kind == "top_groups":
+            heading = f"{'Top' if query.largest else 'Bottom'} {query.n} {query.group} values by {agg_name} {query.value}{where}:"
+        else:
+            heading = f"{agg_name.capitalize()} {query.value} by {query.group}{where}:"
+        lines = [f"- {key}: {_format_value(val, query.value)}" for key, val in result.head(MAX_LISTED).items()]
+
+    if len(result) > MAX_LISTED:
+        lines.append(f"- …and {len(result) - MAX_LISTED} more")
+    return "\n".join([heading, *lines])
+
+
+class AggregateFastPath:
+    """
+    Recognizes simple aggregate questions (counts, average/total/max/min [by column], top N)
+    against the dataset's column names, so they can be answered without the LLM.
+    Anything it cannot parse completely is left to the LLM path, as are questions with a
+    negation or exclusion and counts of anything other than the rows themselves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {"questions": 0, "hits": 0, "unparsed": 0, "failed": 0}
+        self.kinds: Dict[str, int] = {}
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        text = text.lower().replace("_", " ")
+        text = re.sub(r"[?!.,;:\"]", " ", text)
+        return re.sub(r"\s+", " ", text).strip()
+
+    def _column_pattern(self, columns: Sequence[str]) -> Tuple[str, Dict[str, str]]:
+        names = {self._normalize(str(col)): col for col in columns}
+        names = {name: col for name, col in names.items() if name}
+        alternation = "|".join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+        return rf"(?:{alternation})(?:e?s)?", names
+
+    @staticmethod
+    def _resolve(text: Optional[str], names: Dict[str, str]) -> Optional[str]:
+        if not text:
+            return None
+        for candidate in (text, re.sub(r"es$", "", text), re.sub(r"s$", "", text)):
+            if candidate in names:
+                return names[candidate]
+        return None
+
+    def _extract_filter(self, text: str, categories: Dict[str, Set[str]],
+                        names: Dict[str, str]) -> Tuple[str, Optional[Tuple[str, str]], bool]:
+        """Pull one `column == value` filter named by a categorical value out of the text."""
+        column_names = set(names)
+        found = []
+        for column, values in categories.items():
+            for value in values:
+                if len(value) < 2 or value in column_names or value in AGGREGATES:
+                    continue
+                if re.search(rf"\b{re.escape(value)}\b", text):
+                    found.append((column, value))
+        if not found:
+            return text, None, True
+        if len(found) > 1:
+            return text, None, False  # ambiguous: several values or columns mentioned
+
+        column, value = found[0]
+        col = re.escape(self._normalize(str(column)))
+        value_re = re.escape(value)
+        text = re.sub(
+            rf"(?:\b(?:where|with|whose|for|of|in)\s+)?(?:(?:the\s+)?{col}\s+(?:is|=|equals|of)\s+)?"
+            rf"\b{value_re}\b(?:\s+{col})?",
+            " ", text,
+        )
+        return re.sub(r"\s+", " ", text).strip(), (column, value), True
+
+    def parse(self, prompt: str, columns: Sequence[str], dtypes: Dict[str, str],
+              categories: Dict[str, Set[str]], entities: Set[str] = frozenset()) -> Optional[FastQuery]:
+        """`entities` are extra nouns for the rows themselves (see `entity_nouns`)."""
+        if not columns or not all(isinstance(col, str) for col in columns):
+            return None
+
+        text = self._normalize(prompt)
+        if _NEGATION.search(text):
+            return None
+        row_nouns = ROW_NOUNS | set(entities)
+        chart = bool(_CHART.search(text))
+        text = _CHART.sub(" ", text)
+        text = _LEADING.sub("", re.sub(r"\s+", " ", text).strip())
+        text = re.sub(r"\bthe\b", " ", text)
+        text = re.sub(r"\s+", " ", text).strip()
+
+        col_re, names = self._column_pattern(columns)
+        text, row_filter, unambiguous = self._extract_filter(text, categories, names)
+        if not unambiguous:
+            return None
+
+        def numeric(column: Optional[str], agg: Optional[str] = None) -> bool:
+            kind = dtypes.get(column, "")
+            if agg in ("max", "min") and kind.startswith("datetime"):
+                return True
+            return kind.startswith(("int", "float", "uint", "Int", "Float", "UInt"))
+
+        noun = r"(?:(?!are\b|there\b|in\b)[a-z]+)"
+
+        # "how many rows", "count of records", "number of entries in the dataset"
+        match = re.fullmatch(
+            rf"(?:how many|count(?: of)?|number of|total number of)(?: (?P<noun>{noun}))?"
+            rf"(?: (?:are )?(?:there|in (?:data|dataset|file|table)))?(?: are there)?",
+            text,
+        )
+        if match:
+            # "how many brands" asks for distinct values, not rows
+            if match.group("noun") and match.group("noun") not in row_nouns:
+                return None
+            return FastQuery("count", filter=row_filter, chart=False)
+
+        # "how many unique brands", "number of distinct fuel types"
+        match = re.fullmatch(
+            rf"(?:how many|number of|count of) (?:unique|distinct|different) (?P<col>{col_re})(?: (?:are )?there)?",
+            text,
+        )
+        if match:
+            column = self._resolve(match.group("col"), names)
+            if column:
+                return FastQuery("nunique", value=column, filter=row_filter)
+
+        # "average selling price by brand", "max km driven", "average price of petrol cars"
+        match = re.fullmatch(
+            rf"(?P<agg>{_AGG_WORDS})(?: value)?(?: of)? (?P<value>{col_re})(?: (?P<noun>{noun}))?"
+            rf"(?: (?:by|per|for each|across|grouped by|for every) (?P<group>{col_re}))?",
+            text,
+        )
+        if match:
+            agg = AGGREGATES[match.group("agg")]
+            value = self._resolve(match.group("value"), names)
+            group = self._resolve(match.group("group"), names)
+            if match.group("noun") and match.group("noun") not in row_nouns:
+                return None
+            if value and numeric(value, agg) and (match.group("group") is None or group) and group != value:
+                return FastQuery("aggregate", value=value, group=group, agg=agg, filter=row_filter, chart=chart)
+            return None
+
+        # "top 10 brands by average selling price", "bottom 5 cars by price"
+        match = re.fullmatch(
+            rf"(?P<dir>top|bottom|highest|lowest) (?P<n>\d+)(?: (?P<subject>[a-z ]+?))? by "
+            rf"(?:(?P<agg>{_AGG_WORDS}) )?(?P<value>{col_re})",
+            text,
+        )
+        if match:
+            largest = match.group("dir") in ("top", "highest")
+            n = int(match.group("n"))
+            value = self._resolve(match.group("value"), names)
+            subject = match.group("subject")
+            group = self._resolve(subject, names)
+            agg = AGGREGATES.get(match.group("agg") or "")
+            if not value or not numeric(value, agg) or n <= 0:
+                return None
+            if group and group != value:
+                if agg is None:
+                    return None  # "top brands by price" does not say how to aggregate
+                return FastQuery("top_groups", value=value, group=group, agg=agg, n=n,
+                                 largest=largest, filter=row_filter, chart=chart)
+            if subject and " " in subject:
+                return None
+            if agg is None:
+                return FastQuery("top_rows", value=value, n=n, largest=largest, filter=row_filter)
+
+        return None
+
+    def record(self, outcome: str, kind: Optional[str] = None):
+        with self._lock:
+            self.counts["questions"] += 1
+            self.counts[outcome] += 1
+            if kind:
+                self.kinds[kind] = self.kinds.get(kind, 0) + 1
+            hit_rate = self.counts["hits"] / self.counts["questions"]
+        logger.info(f"⚡ Fast path {outcome}{f' ({kind})' if kind else ''}; hit rate {hit_rate:.0%}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            questions = self.counts["questions"]
+            return {
+                **self.counts,
+                "hit_rate": self.counts["hits"] / questions if questions else 0.0,
+                "hits_by_kind": dict(self.kinds),
+            }
+
+
+def column_categories(df: pd.DataFrame, max_values: int) -> Dict[str, Set[str]]:
+    """Normalized values of low-cardinality string columns, used to recognize filters in questions."""
+    categories = {}
+    for col in df.columns:
+        series = df[col]
+        if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+            continue
+        uniques = series.dropna().unique()
+        if len(uniques) <= max_values:
+            categories[col] = {str(v).strip().lower() for v in uniques}
+    return categories
@@ -1,26 +1,218 @@
+import os
+import json
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
 import PyPDF2
 from PIL import Image
 
+from backend.utils.upload_catalog import file_sha256
+
+logger = logging.getLogger(__name__)
+
+PDF_TEXT_CACHE_DIR = "pdf_text_cache"
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Pages per worker task: small enough to stream, large enough to amortize re-opening the PDF
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Runs in a worker process: text of pages [start, stop)."""
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _pdf_page_count(file_path: str) -> int:
+    with open(file_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+class PdfPageCache:
+    """Extracted text of each PDF page on disk, keyed by the file's content hash."""
+
+    def __init__(self, cache_dir: str = PDF_TEXT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _dir(self, sha256: str) -> str:
+        return os.path.join(self.cache_dir, sha256)
+
+    def page_count(self, sha256: str) -> Optional[int]:
+        try:
+            with open(os.path.join(self._dir(sha256), "meta.json"), "r") as f:
+                return json.load(f)["pages"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set_page_count(self, sha256: str, pages: int):
+        os.makedirs(self._dir(sha256), exist_ok=True)
+        with open(os.path.join(self._dir(sha256), "meta.json"), "w") as f:
+            json.dump({"pages": pages}, f)
+
+    def get(self, sha256: str, page: int) -> Optional[str]:
+        try:
+            with open(os.path.join(self._dir(sha256), f"{page}.txt"), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, sha256: str, page: int, text: str):
+        path = os.path.join(self._dir(sha256), f"{page}.txt")
+        os.makedirs(self._dir(sha256), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(path + ".tmp", path)
+
+
 class FileProcessor:
-    async def process_file(self, file_path: str, content_type: str):
+    _pool: Optional[ProcessPoolExecutor] = None
+    _pool_lock = threading.Lock()
+
+    def __init__(self, cache: Optional[PdfPageCache] = None):
+        self.page_cache = cache or PdfPageCache()
+        self._fallback = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-extract")
+
+    @classmethod
+    def _executor(cls) -> ProcessPoolExecutor:
+        # One process pool shared by every FileProcessor, started on first use
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS)
+            return cls._pool
+
+    @classmethod
+    def _discard_pool(cls, pool: Optional[ProcessPoolExecutor], reason: Exception):
+        """Drop a broken pool so the next submit starts a fresh one (unless another caller already did)."""
+        if pool is None:
+            return
+        with cls._pool_lock:
+            if cls._pool is pool:
+                cls._pool = None
+                logger.warning(f"PDF process pool broke, starting a new one: {reason}")
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def shutdown(cls):
+        with cls._pool_lock:
+            if cls._pool is not None:
+                cls._pool.shutdown(wait=False, cancel_futures=True)
+                cls._pool = None
+
+    async def process_file(self, file_path: str, content_type: str, sha256: Optional[str] = None):
         if content_type == "application/pdf":
-            return self.extract_pdf_text(file_path)
+            try:
+                return "".join(await self.extract_pdf_pages_async(file_path, sha256=sha256))
+            except Exception as e:
+                return f"Error processing PDF: {str(e)}"
         elif content_type.startswith("image/"):
-            return self.process_image(file_path)
+            return await asyncio.to_thread(self.process_image, file_path)
         else:
             return "File uploaded successfully"
-    
+
+    def _plan(self, file_path: str, sha256: Optional[str], start: int,
+              stop: Optional[int]) -> Tuple[str, Dict[int, str], List[Tuple[int, int]]]:
+        """Cached pages in [start, stop) and the page ranges still to extract."""
+        sha256 = sha256 or file_sha256(file_path)
+        total = self.page_cache.page_count(sha256)
+        if total is None:
+            total = _pdf_page_count(file_path)
+            self.page_cache.set_page_count(sha256, total)
+        stop = total if stop is None else min(stop, total)
+
+        cached, missing = {}, []
+        for page in range(max(start, 0), stop):
+            text = self.page_cache.get(sha256, page)
+            if text is None:
+                missing.append(page)
+            else:
+                cached[page] = text
+
+        # Contiguous runs of missing pages, split so every worker gets a share
+        per_task = max(1, min(PDF_PAGES_PER_TASK, -(-len(missing) // PDF_EXTRACT_WORKERS)))
+        ranges = []
+        for page in missing:
+            if ranges and ranges[-1][1] == page and ranges[-1][1] - ranges[-1][0] < per_task:
+                ranges[-1] = (ranges[-1][0], page + 1)
+            else:
+                ranges.append((page, page + 1))
+        return sha256, cached, ranges
+
+    def _submit(self, file_path: str, start: int, stop: int) -> Tuple[Optional[ProcessPoolExecutor], Future]:
+        """Queue pages [start, stop) on the process pool; returns the pool (None for in-process) and the future."""
+        pool = self._executor()
+        try:
+            return pool, pool.submit(_extract_page_range, file_path, start, stop)
+        except (BrokenProcessPool, RuntimeError, OSError) as e:
+            logger.warning(f"PDF process pool unavailable, extracting in-process: {e}")
+            self._discard_pool(pool, e)
+            return None, self._fallback.submit(_extract_page_range, file_path, start, stop)
+
+    def _store(self, sha256: str, start: int, texts: List[str]) -> List[Tuple[int, str]]:
+        pages = list(enumerate(texts, start=start))
+        for page, text in pages:
+            self.page_cache.put(sha256, page, text)
+        return pages
+
+    async def iter_pdf_pages(self, file_path: str, sha256: Optional[str] = None, start: int = 0,
+                             stop: Optional[int] = None) -> AsyncIterator[Tuple[int, str]]:
+        """Yield (0-based page number, text) for pages [start, stop) as they complete, cached pages first."""
+        sha256, cached, ranges = await asyncio.to_thread(self._plan, file_path, sha256, start, stop)
+        for page, text in cached.items():
+            yield page, text
+
+        async def extract(a: int, b: int) -> Tuple[int, List[str]]:
+            pool, future = self._submit(file_path, a, b)
+            try:
+                return a, await asyncio.wrap_future(future)
+            except BrokenProcessPool as e:
+                # A worker died (malformed PDF, out of memory): retry this range in-process
+                self._discard_pool(pool, e)
+                return a, await asyncio.wrap_future(self._fallback.submit(_extract_page_range, file_path, a, b))
+
+        tasks = [asyncio.ensure_future(extract(a, b)) for a, b in ranges]
+        try:
+            for done in asyncio.as_completed(tasks):
+                first, texts = await done
+                for page, text in await asyncio.to_thread(self._store, sha256, first, texts):
+                    yield page, text
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def extract_pdf_pages_async(self, file_path: str, sha256: Optional[str] = None, start: int = 0,
+                                      stop: Optional[int] = None) -> List[str]:
+        """Text of pages [start, stop) in page order, without blocking the event loop."""
+        pages = {page: text async for page, text in self.iter_pdf_pages(file_path, sha256, start, stop)}
+        return [pages[page] for page in sorted(pages)]
+
     def extract_pdf_text(self, file_path: str):
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
-                return text
+            return "".join(self.extract_pdf_pages(file_path))
         except Exception as e:
             return f"Error processing PDF: {str(e)}"
-    
+
+    def extract_pdf_pages(self, file_path: str, sha256: Optional[str] = None, start: int = 0,
+                          stop: Optional[int] = None):
+        """Text of each page in [start, stop), in order (raises if the PDF cannot be read)"""
+        sha256, pages, ranges = self._plan(file_path, sha256, start, stop)
+        futures = {}
+        for a, b in ranges:
+            pool, future = self._submit(file_path, a, b)
+            futures[future] = (pool, a, b)
+        for future in as_completed(futures):
+            pool, a, b = futures[future]
+            try:
+                texts = future.result()
+            except BrokenProcessPool as e:
+                self._discard_pool(pool, e)
+                texts = _extract_page_range(file_path, a, b)
+            pages.update(self._store(sha256, a, texts))
+        return [pages[page] for page in sorted(pages)]
+
     def process_image(self, file_path: str):
         try:
             with Image.open(file_path) as img:
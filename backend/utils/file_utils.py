@@ -1,19 +1,60 @@
 import aiofiles
+import hashlib
 import os
 import uuid
+from typing import Tuple
 from werkzeug.utils import secure_filename
 
-async def save_document_to_disk(session_id: str, original_name: str, file_bytes: bytes) -> str:
-    upload_dir = "uploads_document"
-    os.makedirs(upload_dir, exist_ok=True)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    pass
 
+
+def unique_upload_name(session_id: str, original_name: str) -> str:
     file_extension = os.path.splitext(original_name)[1]
     filename_base = os.path.splitext(original_name)[0]
     unique_id = uuid.uuid4().hex[:16]
-    safe_filename = secure_filename(f"{session_id}_{unique_id}_{filename_base}{file_extension}")
-    file_path = os.path.join(upload_dir, safe_filename)
+    return secure_filename(f"{session_id}_{unique_id}_{filename_base}{file_extension}")
+
+
+async def save_document_to_disk(session_id: str, original_name: str, file_bytes: bytes) -> str:
+    upload_dir = "uploads_document"
+    os.makedirs(upload_dir, exist_ok=True)
+
+    file_path = os.path.join(upload_dir, unique_upload_name(session_id, original_name))
 
     async with aiofiles.open(file_path, 'wb') as f:
         await f.write(file_bytes)
 
     return file_path
+
+
+async def save_upload_stream(session_id: str, upload, max_size: int, upload_dir: str = "uploads",
+                             chunk_size: int = UPLOAD_CHUNK_SIZE) -> Tuple[str, int, str]:
+    """
+    Copy an UploadFile to disk chunk by chunk, hashing as it goes.
+    Returns (file_path, size, sha256); raises UploadTooLargeError as soon as max_size is crossed.
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+    file_path = os.path.join(upload_dir, unique_upload_name(session_id, upload.filename))
+    partial_path = file_path + ".part"
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(partial_path, 'wb') as f:
+            while chunk := await upload.read(chunk_size):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(f"{upload.filename} is larger than {max_size} bytes")
+                digest.update(chunk)
+                await f.write(chunk)
+        os.replace(partial_path, file_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    return file_path, size, digest.hexdigest()
@@ -15,6 +15,7 @@ from backend.agents.general_agent import GeneralAgent
 from backend.utils.langgraph_pipeline import build_langgraph
 from backend.agents.document_agent import DocumentAgent
 from backend.utils.groq_client import groq_client
+from backend.utils.response_stream import ResponseStream
 from backend.database.db_manager import database
 from backend.agents.database_agent import build_db_query_graph
 
@@ -531,7 +532,8 @@ class HPGPTGraph:
             return {"messages": [AIMessage(content=f"I apologize, but I encountered an error: {str(e)}")]}
 
     
-    async def chat(self, message: str, session_id: str, files=None, answer_mode: str = "specific", should_stop=None, user_msg_id: str = None, assistant_msg_id: str = None, user_id: Optional[int] = None,websocket: Optional[WebSocket] = None
+    async def chat(self, message: str, session_id: str, files=None, answer_mode: str = "specific", should_stop=None, user_msg_id: str = None, assistant_msg_id: str = None, user_id: Optional[int] = None,websocket: Optional[WebSocket] = None,
+        approximate: Optional[bool] = None
     ):
         # Initialize session if new
         if session_id not in self.sessions:
@@ -603,19 +605,46 @@ class HPGPTGraph:
             state = {
                 "prompt": message,
                 "session_id": session_id,
+                "chat_id": session_id,
                 "files": files,
                 "history": self.conversations.get(session_id, []),
                 "answer_mode": answer_mode,
                 "websocket": websocket,
+                "approximate": approximate,
             }
 
-            result = await self.langgraph_app.ainvoke(state)
+            # Agents may stream the start of their answer (e.g. section summaries) while the graph runs
+            stream = ResponseStream()
+            token = stream.activate()
+            try:
+                graph_task = asyncio.ensure_future(self.langgraph_app.ainvoke(state))
+            finally:
+                stream.deactivate(token)
+
+            streamed = ""
+            async for chunk in stream.drain(graph_task):
+                if check_should_stop():
+                    graph_task.cancel()
+                    break
+                streamed += chunk
+                yield chunk
+
+            if check_should_stop():
+                # Stopped mid-answer: let the cancelled graph unwind, then end the reply without saving it
+                graph_task.cancel()
+                await asyncio.wait({graph_task})
+                if not graph_task.cancelled() and graph_task.exception() is not None:
+                    logger.warning(f"Graph failed after a stop request: {graph_task.exception()}")
+                return
+
+            result = await graph_task
             complete_response = result.get("response", "")
             
             if not complete_response.strip():
                 complete_response = "I couldn't generate a response. Could you rephrase or try again?"
 
-            for line in complete_response.splitlines():
+            remaining = complete_response[len(streamed):] if complete_response.startswith(streamed) else complete_response
+            for line in remaining.splitlines():
                 if check_should_stop():
                     break
                 yield line + "\n"
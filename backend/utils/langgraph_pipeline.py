@@ -1,8 +1,9 @@
 from langgraph.graph import StateGraph, END
 from typing import TypedDict, Optional, List, Dict, Any
-import logging, os
-from backend.agents.document_agent import DocumentAgent
+import logging
+from backend.agents.document_agent import DocumentAgent, DOCUMENT_TASKS
 from backend.agents.database_agent import build_db_query_graph
+from backend.utils.upload_catalog import upload_catalog, DATASET_EXTENSIONS
 
 
 logger = logging.getLogger(__name__)
@@ -22,6 +23,8 @@ class AgentState(TypedDict):
     answer_mode: Optional[str]
     chat_id: Optional[str]
     doc_id: Optional[str]
+    document_task: Optional[str]
+    approximate: Optional[bool]
 
 
 def build_langgraph(coding_agent, analytics_agent, websearch_agent, general_agent, groq_client, database_agent):
@@ -41,7 +44,9 @@ def build_langgraph(coding_agent, analytics_agent, websearch_agent, general_agen
                 "- 'coding' for programming-related questions\n"
                 "- 'analytics' for data analysis, graphs, or file-based insights\n"
                 "- 'websearch' for real-time or factual queries\n"
-                "- 'document' for queries based on uploaded documents\n"
+                "- 'document.summarize' to summarize an uploaded document\n"
+                "- 'document.compare' to compare two uploaded documents\n"
+                "- 'document.query' for other questions about uploaded documents\n"
                 "- 'database' for questions that require querying a relational database\n"
                 "If none of these apply, respond with only 'general'.\n\n"
                 "Respond with only one agent type (no explanation, no punctuation):\n\n"
@@ -58,18 +63,22 @@ def build_langgraph(coding_agent, analytics_agent, websearch_agent, general_agen
                 model=groq_client.model,
                 messages=messages,
                 temperature=0,
-                max_tokens=5,
+                max_tokens=8,
                 top_p=1,
             )
 
-            raw_output = response.choices[0].message.content.strip().lower()
+            raw_output = response.choices[0].message.content.strip().lower().rstrip(".")
             valid_agents = {"coding", "analytics", "websearch", "document", "database", "general"}
-            selected_agent = raw_output if raw_output in valid_agents else "general"
+            # Document requests come back as "document.<task>" so the subgraph can skip its own router
+            agent, _, subtask = raw_output.partition(".")
+            selected_agent = agent if agent in valid_agents else "general"
+            document_task = subtask if selected_agent == "document" and subtask in DOCUMENT_TASKS else None
 
-            logger.info(f"✅ Routed to agent: {selected_agent}")
+            logger.info(f"✅ Routed to agent: {selected_agent}{f'.{document_task}' if document_task else ''}")
             return {
                 **state,
                 "agent_types": [selected_agent],
+                "document_task": document_task,
                 "responses": {},
             }
 
@@ -78,6 +87,7 @@ def build_langgraph(coding_agent, analytics_agent, websearch_agent, general_agen
             return {
                 **state,
                 "agent_types": ["general"],
+                "document_task": None,
                 "responses": {},
             }
 
@@ -90,17 +100,14 @@ def build_langgraph(coding_agent, analytics_agent, websearch_agent, general_agen
 
             try:
                 if getattr(agent, "name", "") == "AnalyticsAgent":
-                    uploads_dir = "uploads"
-                    files = [f for f in os.listdir(uploads_dir) if os.path.isfile(os.path.join(uploads_dir, f))]
-                    if not files:
+                    latest_file = upload_catalog.latest_file(state.get("chat_id"), DATASET_EXTENSIONS)
+                    if latest_file is None:
                         raise FileNotFoundError("No uploaded files found for analytics.")
 
-                    latest_file = max(files, key=lambda f: os.path.getctime(os.path.join(uploads_dir, f)))
-                    file_path = os.path.join(uploads_dir, latest_file)
-
-                    file_info = {"name": latest_file, "path": file_path}
+                    file_path = latest_file["path"]
+                    file_info = {"name": latest_file["name"], "path": file_path, "sha256": latest_file["sha256"]}
                     logger.info(f"📊 Running AnalyticsAgent with file: {file_path}")
-                    result = await agent.run(file_info, prompt)
+                    result = await agent.run(file_info, prompt, approximate=state.get("approximate"))
                     summary = result.get("summary", "")
                     plot = result.get("response", "")
                     response_text = f"{plot}\n\n{summary}".strip()
@@ -121,6 +128,7 @@ def build_langgraph(coding_agent, analytics_agent, websearch_agent, general_agen
                         "doc_id": state.get("doc_id", ""),
                         "chat_id": state.get("chat_id", "default-session"),
                         "chat_history": history,
+                        "task": state.get("document_task"),
                     }
                     result = await agent.ainvoke(sub_state)
                     response_text = result.get("response", "No response.")
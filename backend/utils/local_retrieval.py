@@ -0,0 +1,218 @@
+# backend/utils/local_retrieval.py
+
+import os
+import re
+import json
+import zlib
+import shutil
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import faiss
+import numpy as np
+
+from backend.utils.file_processor import FileProcessor
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_INDEX_DIR = "retrieval_index"
+HASH_DIM = int(os.getenv("RETRIEVAL_HASH_DIM", str(2 ** 13)))
+CHUNK_WORDS = int(os.getenv("RETRIEVAL_CHUNK_WORDS", "180"))
+CHUNK_OVERLAP = int(os.getenv("RETRIEVAL_CHUNK_OVERLAP", "40"))
+TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "5"))
+
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.json"
+DF_FILE = "df.npy"
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "its", "of", "on", "or", "that", "the", "this", "to", "was", "were", "which", "will", "with",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def hashed_counts(text: str, dim: int = HASH_DIM) -> np.ndarray:
+    """Signed feature-hashed counts of unigrams and bigrams (crc32, so stable across processes)."""
+    tokens = tokenize(text)
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    vec = np.zeros(dim, dtype=np.float32)
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vec[h % dim] += 1.0 if h & 0x80000000 else -1.0
+    return vec
+
+
+def _l2_normalize(vec: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+def chunk_pages(pages: List[str], words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> List[dict]:
+    """Overlapping word windows within each page, tagged with the 1-based page number."""
+    step = max(words - overlap, 1)
+    chunks = []
+    for page_no, page in enumerate(pages, start=1):
+        tokens = page.split()
+        for start in range(0, len(tokens), step):
+            window = tokens[start:start + words]
+            if len(window) < 5 and start > 0:
+                break
+            chunks.append({"page": page_no, "text": " ".join(window)})
+            if start + words >= len(tokens):
+                break
+    return chunks
+
+
+class SessionIndex:
+    """
+    FAISS inner-product index over one session's document chunks.
+
+    Chunks are stored as L2-normalized sublinear-tf vectors and the IDF weighting is applied
+    to the query only (squared), so new documents are appended without re-embedding old ones.
+    """
+
+    def __init__(self, directory: str, dim: int = HASH_DIM):
+        self.directory = directory
+        self.dim = dim
+        self.index = faiss.IndexFlatIP(dim)
+        self.chunks: List[dict] = []
+        self.documents: Dict[str, dict] = {}
+        self.df = np.zeros(dim, dtype=np.float64)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, directory: str) -> "SessionIndex":
+        session = cls(directory)
+        chunks_path = os.path.join(directory, CHUNKS_FILE)
+        if not os.path.exists(chunks_path):
+            return session
+        try:
+            with open(chunks_path, "r") as f:
+                data = json.load(f)
+            index = faiss.read_index(os.path.join(directory, INDEX_FILE))
+            if index.d != session.dim or index.ntotal != len(data["chunks"]):
+                raise ValueError("index does not match its chunks (or RETRIEVAL_HASH_DIM changed)")
+            session.index = index
+            session.chunks = data["chunks"]
+            session.documents = data["documents"]
+            session.df = np.load(os.path.join(directory, DF_FILE))
+        except Exception as e:
+            logger.error(f"Error loading retrieval index {directory}, rebuilding it: {e}")
+            session = cls(directory)
+        return session
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_index = os.path.join(self.directory, INDEX_FILE + ".tmp")
+        faiss.write_index(self.index, tmp_index)
+        with open(os.path.join(self.directory, DF_FILE + ".tmp"), "wb") as f:
+            np.save(f, self.df)
+        with open(os.path.join(self.directory, CHUNKS_FILE + ".tmp"), "w") as f:
+            json.dump({"documents": self.documents, "chunks": self.chunks}, f)
+        for name in (INDEX_FILE, DF_FILE, CHUNKS_FILE):
+            os.replace(os.path.join(self.directory, name + ".tmp"), os.path.join(self.directory, name))
+
+    def add(self, sha256: str, name: str, chunks: List[dict]) -> int:
+        if not chunks:
+            self.documents[sha256] = {"name": name, "chunks": 0}
+            return 0
+        counts = np.stack([hashed_counts(chunk["text"], self.dim) for chunk in chunks])
+        self.df += (counts != 0).sum(axis=0)
+        vectors = np.sign(counts) * np.log1p(np.abs(counts))
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        self.index.add(vectors.astype(np.float32))
+        self.chunks.extend({**chunk, "sha256": sha256, "name": name} for chunk in chunks)
+        self.documents[sha256] = {"name": name, "chunks": len(chunks)}
+        return len(chunks)
+
+    def search(self, query: str, k: int = TOP_K) -> List[dict]:
+        if self.index.ntotal == 0:
+            return []
+        counts = hashed_counts(query, self.dim)
+        idf = np.log((1 + len(self.chunks)) / (1 + self.df)) + 1
+        query_vec = _l2_normalize((np.sign(counts) * np.log1p(np.abs(counts)) * idf ** 2).astype(np.float32))
+        if not query_vec.any():
+            return []
+        scores, ids = self.index.search(query_vec[None, :], min(k, self.index.ntotal))
+        return [
+            {**self.chunks[i], "score": float(score)}
+            for score, i in zip(scores[0], ids[0]) if i >= 0 and score > 0
+        ]
+
+
+class LocalRetriever:
+    """Per-session FAISS indexes of uploaded PDFs, kept on disk and updated one upload at a time."""
+
+    def __init__(self, index_dir: str = RETRIEVAL_INDEX_DIR, max_workers: int = 1):
+        self.index_dir = index_dir
+        self.file_processor = FileProcessor()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retrieval-index")
+        self._sessions: Dict[str, SessionIndex] = {}
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _session_dir(self, session_id: str) -> str:
+        return os.path.join(self.index_dir, os.path.basename(session_id))
+
+    def _session(self, session_id: str) -> SessionIndex:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = SessionIndex.load(self._session_dir(session_id))
+                self._sessions[session_id] = session
+            return session
+
+    def is_indexed(self, session_id: str, sha256: str) -> bool:
+        return sha256 in self._session(session_id).documents
+
+    def schedule(self, session_id: str, path: str, sha256: str, name: str) -> Optional[Future]:
+        """Index a new upload in the background; a no-op if it is indexed or already indexing."""
+        if self.is_indexed(session_id, sha256):
+            return None
+        key = f"{session_id}:{sha256}"
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None and not pending.done():
+                return pending
+            future = self._executor.submit(self.index_document, session_id, path, sha256, name)
+            self._pending[key] = future
+            future.add_done_callback(lambda _: self._pending.pop(key, None))
+            return future
+
+    def index_document(self, session_id: str, path: str, sha256: str, name: str) -> int:
+        session = self._session(session_id)
+        with session.lock:
+            if sha256 in session.documents:
+                return session.documents[sha256]["chunks"]
+            chunks = chunk_pages(self.file_processor.extract_pdf_pages(path, sha256))
+            added = session.add(sha256, name, chunks)
+            session.save()
+        logger.info(f"🔎 Indexed {added} chunks of {name} for session {session_id}")
+        return added
+
+    def ensure_indexed(self, session_id: str, path: str, sha256: str, name: str) -> int:
+        """Wait for a scheduled indexing job, or index now for files uploaded before it existed."""
+        future = self.schedule(session_id, path, sha256, name)
+        if future is not None:
+            return future.result()
+        return self._session(session_id).documents[sha256]["chunks"]
+
+    def search(self, session_id: str, query: str, k: int = TOP_K) -> List[dict]:
+        session = self._session(session_id)
+        with session.lock:
+            return session.search(query, k)
+
+    def forget_session(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
+
+
+local_retriever = LocalRetriever()
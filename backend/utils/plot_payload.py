@@ -0,0 +1,252 @@
+# backend/utils/plot_payload.py
+
+import os
+import re
+import html
+import json
+import time
+import uuid
+import base64
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+logger = logging.getLogger(__name__)
+
+FIGURES_DIR = "figures"
+POINT_BUDGET = int(os.getenv("ANALYTICS_PLOT_POINT_BUDGET", "5000"))
+FIGURE_TTL_S = float(os.getenv("FIGURE_TTL_HOURS", "168")) * 3600
+FIGURE_STORE_MAX_BYTES = int(os.getenv("FIGURE_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Trace attributes that hold one value per point and must be subset together with x/y
+PER_POINT_KEYS = ("x", "y", "text", "hovertext", "customdata", "ids")
+PER_POINT_MARKER_KEYS = ("color", "size", "symbol", "opacity")
+
+_FIGURE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _as_array(value: Any) -> Optional[np.ndarray]:
+    """Return per-point data as an ndarray, decoding Plotly's base64 typed-array form."""
+    if isinstance(value, dict) and "bdata" in value:
+        arr = np.frombuffer(base64.b64decode(value["bdata"]), dtype=value["dtype"])
+        shape = value.get("shape")
+        if shape:
+            arr = arr.reshape([int(s) for s in str(shape).split(",")])
+        return arr
+    if isinstance(value, (np.ndarray, pd.Series, pd.Index, list, tuple)):
+        return np.asarray(value)
+    return None
+
+
+def _numeric(arr: np.ndarray) -> np.ndarray:
+    """Numeric proxy used only to choose which points to keep."""
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.astype("datetime64[ns]").astype(np.int64).astype(float)
+    if np.issubdtype(arr.dtype, np.number):
+        return np.nan_to_num(arr.astype(float))
+    numeric = pd.to_numeric(pd.Series(arr), errors="coerce")
+    if numeric.notna().all():
+        return numeric.to_numpy(dtype=float)
+    return pd.factorize(pd.Series(arr))[0].astype(float)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets selection, keeping the visual shape of a line."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = min(int((i + 1) * every) + 1, n - 1)
+        next_end = min(int((i + 2) * every) + 1, n)
+
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area)) if len(area) else start
+        selected[i + 1] = a
+
+    return selected
+
+
+def grid_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Keep one point per cell of a sqrt(budget) x sqrt(budget) grid over the scatter extent."""
+    bins = max(int(np.sqrt(max_points)), 1)
+
+    def _bin(values: np.ndarray) -> np.ndarray:
+        span = np.ptp(values) or 1.0
+        return ((values - values.min()) / span * (bins - 1)).astype(np.int64)
+
+    cells = _bin(x) * bins + _bin(y)
+    _, first = np.unique(cells, return_index=True)
+    return np.sort(first)
+
+
+def _downsample_trace(trace: Dict[str, Any], budget: int) -> bool:
+    if trace.get("type", "scatter") not in ("scatter", "scattergl"):
+        return False
+
+    y = _as_array(trace.get("y"))
+    if y is None or y.ndim != 1 or len(y) <= budget:
+        return False
+
+    n = len(y)
+    x = _as_array(trace.get("x"))
+    if x is None or len(x) != n:
+        x = np.arange(n)
+
+    mode = trace.get("mode") or "lines"
+    if "lines" in mode:
+        keep = lttb_indices(_numeric(x), _numeric(y), budget)
+    else:
+        keep = grid_indices(_numeric(x), _numeric(y), budget)
+
+    for key in PER_POINT_KEYS:
+        arr = _as_array(trace.get(key))
+        if arr is not None and len(arr) == n:
+            trace[key] = arr[keep]
+
+    marker = trace.get("marker")
+    if isinstance(marker, dict):
+        for key in PER_POINT_MARKER_KEYS:
+            arr = _as_array(marker.get(key))
+            if arr is not None and len(arr) == n:
+                marker[key] = arr[keep]
+
+    logger.info(f"📉 Downsampled {mode} trace from {n} to {len(keep)} points")
+    return True
+
+
+def _plain(value: Any) -> Any:
+    """Convert figure data into JSON-safe builtins (NaN becomes null)."""
+    arr = _as_array(value) if isinstance(value, (dict, np.ndarray, pd.Series, pd.Index)) else None
+    if arr is not None:
+        if np.issubdtype(arr.dtype, np.datetime64):
+            return [None if s == "NaT" else s for s in np.datetime_as_string(arr).tolist()]
+        if np.issubdtype(arr.dtype, np.floating):
+            out = arr.astype(object)
+            out[~np.isfinite(arr)] = None
+            return out.tolist()
+        if arr.dtype != object:
+            return arr.tolist()
+        return [_plain(v) for v in arr.tolist()]
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, np.generic):
+        return _plain(value.item())
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if isinstance(value, (datetime, date, pd.Timestamp)):
+        return value.isoformat()
+    return value
+
+
+def figure_to_json(fig: go.Figure, budget: Optional[int] = POINT_BUDGET) -> Tuple[str, bool]:
+    """Serialize a figure compactly, downsampling traces above the point budget."""
+    spec = fig.to_dict()
+    downsampled = False
+    if budget:
+        for trace in spec.get("data", []):
+            downsampled = _downsample_trace(trace, budget) or downsampled
+
+    # Theme defaults for trace types the figure does not use are dead weight in the payload
+    template_data = spec.get("layout", {}).get("template", {}).get("data")
+    if isinstance(template_data, dict):
+        used = {trace.get("type", "scatter") for trace in spec.get("data", [])}
+        for trace_type in list(template_data):
+            if trace_type not in used:
+                del template_data[trace_type]
+
+    payload = {"data": _plain(spec.get("data", [])), "layout": _plain(spec.get("layout", {}))}
+    return json.dumps(payload, separators=(",", ":"), default=str), downsampled
+
+
+class FigureStore:
+    """
+    Full-resolution figure JSON on disk, fetched by the client on demand. Each save deletes
+    files older than `ttl` seconds, then the oldest ones while the directory is over `max_bytes`.
+    """
+
+    def __init__(self, directory: str = FIGURES_DIR, ttl: float = FIGURE_TTL_S,
+                 max_bytes: int = FIGURE_STORE_MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    def _path(self, figure_id: str) -> str:
+        return os.path.join(self.directory, f"{figure_id}.json")
+
+    def save(self, figure_json: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        figure_id = uuid.uuid4().hex
+        with open(self._path(figure_id), "w") as f:
+            f.write(figure_json)
+        self.cleanup(keep=figure_id)
+        return figure_id
+
+    def cleanup(self, keep: str = ""):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json") and entry.name != f"{keep}.json":
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        expired = time.time() - self.ttl
+        total = sum(size for _, size, _ in files)
+        if keep:
+            total += os.path.getsize(self._path(keep))
+        removed = 0
+        for mtime, size, path in sorted(files):
+            if mtime >= expired and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"🗑️ Removed {removed} old figure files from {self.directory}")
+
+    def load(self, figure_id: str) -> Optional[str]:
+        if not _FIGURE_ID.match(figure_id) or not os.path.exists(self._path(figure_id)):
+            return None
+        with open(self._path(figure_id), "r") as f:
+            return f.read()
+
+
+figure_store = FigureStore()
+
+
+def render_figure_payload(fig: go.Figure) -> str:
+    """One-line HTML placeholder carrying compact figure JSON for the chat client to plot."""
+    figure_json, downsampled = figure_to_json(fig)
+    figure_id = ""
+    if downsampled:
+        # Plotly's own encoder (base64 typed arrays) keeps the full-resolution file small and fast
+        figure_id = figure_store.save(fig.to_json())
+
+    return (
+        f'<div class="hpgpt-figure" data-figure-id="{figure_id}" '
+        f'data-downsampled="{str(downsampled).lower()}" '
+        f"data-figure='{html.escape(figure_json, quote=False).replace(chr(39), '&#x27;')}'></div>"
+    )
@@ -0,0 +1,102 @@
+# backend/utils/rag_client.py
+
+import os
+import asyncio
+import logging
+import mimetypes
+from typing import Any, Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+RAG_API_KEY = os.getenv("RAG_API_KEY")
+API_BASE_URL = os.getenv("API_BASE_URL")
+
+RAG_MAX_CONNECTIONS = int(os.getenv("RAG_MAX_CONNECTIONS", "10"))
+
+# Seconds to wait for each endpoint's response, and how many requests to it may run at once
+ENDPOINT_TIMEOUTS = {
+    "upload": float(os.getenv("RAG_UPLOAD_TIMEOUT", "120")),
+    "query": float(os.getenv("RAG_QUERY_TIMEOUT", "60")),
+    "summarize": float(os.getenv("RAG_SUMMARIZE_TIMEOUT", "180")),
+    "compare": float(os.getenv("RAG_COMPARE_TIMEOUT", "180")),
+}
+ENDPOINT_CONCURRENCY = {
+    "upload": int(os.getenv("RAG_UPLOAD_CONCURRENCY", "2")),
+    "query": int(os.getenv("RAG_QUERY_CONCURRENCY", "8")),
+    "summarize": int(os.getenv("RAG_SUMMARIZE_CONCURRENCY", "2")),
+    "compare": int(os.getenv("RAG_COMPARE_CONCURRENCY", "2")),
+}
+
+
+class RagClient:
+    """Shared async client for the remote RAG server: one keep-alive connection pool for every document agent."""
+
+    def __init__(self, base_url: Optional[str] = API_BASE_URL, api_key: Optional[str] = RAG_API_KEY):
+        self.base_url = base_url
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        if not self.base_url:
+            raise EnvironmentError("Missing API_BASE_URL in .env")
+
+        # Pools and semaphores belong to one event loop; scripts that call asyncio.run() twice get fresh ones
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                limits=httpx.Limits(max_connections=RAG_MAX_CONNECTIONS,
+                                    max_keepalive_connections=RAG_MAX_CONNECTIONS),
+            )
+            self._limits = {name: asyncio.Semaphore(n) for name, n in ENDPOINT_CONCURRENCY.items()}
+            self._loop = loop
+        return self._client
+
+    async def post(self, endpoint: str, **kwargs: Any) -> httpx.Response:
+        client = self._ensure_client()
+        async with self._limits[endpoint]:
+            return await client.post(f"/{endpoint}", timeout=ENDPOINT_TIMEOUTS[endpoint], **kwargs)
+
+    async def upload(self, path: str, chat_id: Optional[str] = None) -> str:
+        """Upload one file, streamed from disk, and return its server-side filename (the doc_id)."""
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        data = {"chat_id": chat_id} if chat_id else None
+        with open(path, "rb") as file_data:
+            response = await self.post(
+                "upload",
+                files={"files": (os.path.basename(path), file_data, content_type)},
+                data=data,
+            )
+
+        if response.status_code != 200:
+            raise RuntimeError(f"❌ Upload failed: {response.status_code} - {response.text}")
+
+        uploaded = response.json()
+        if not uploaded or not isinstance(uploaded.get("filenames"), list) or not uploaded["filenames"]:
+            raise ValueError("❌ Invalid upload response")
+
+        return uploaded["filenames"][0]
+
+    async def query(self, prompt: str, doc_id: str, chat_id: str) -> httpx.Response:
+        return await self.post("query", data={"prompt": prompt, "doc_id": doc_id, "chat_id": chat_id})
+
+    async def summarize(self, filenames: List[str]) -> httpx.Response:
+        return await self.post("summarize", data={"filenames": filenames})
+
+    async def compare(self, filenames: List[str]) -> httpx.Response:
+        return await self.post("compare", data={"filenames": filenames})
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+rag_client = RagClient()
@@ -0,0 +1,136 @@
+# backend/utils/rag_registry.py
+
+import os
+import json
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+from backend.utils.upload_catalog import file_sha256
+
+logger = logging.getLogger(__name__)
+
+RAG_REGISTRY_FILE = "rag_registry.json"
+
+
+class RagUploadRegistry:
+    """
+    Server-side doc_id for each (file content hash, chat_id), so a document is uploaded to the
+    RAG server once and follow-up questions only cost the /query call.
+    """
+
+    def __init__(self, registry_file: str = RAG_REGISTRY_FILE):
+        self.registry_file = registry_file
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.counters: Dict[str, int] = {"hits": 0, "uploads": 0, "invalidations": 0, "upload_errors": 0}
+        self.load()
+
+    @staticmethod
+    def _key(sha256: str, chat_id: Optional[str]) -> str:
+        return f"{sha256}:{chat_id or ''}"
+
+    def load(self):
+        try:
+            if os.path.exists(self.registry_file):
+                with open(self.registry_file, "r") as f:
+                    self._entries = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading RAG upload registry: {e}")
+            self._entries = {}
+
+    def save(self):
+        try:
+            with open(self.registry_file, "w") as f:
+                json.dump(self._entries, f, indent=2)
+        except Exception as e:
+            logger.error(f"Error saving RAG upload registry: {e}")
+
+    def get(self, sha256: str, chat_id: Optional[str]) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(self._key(sha256, chat_id))
+            return entry["doc_id"] if entry else None
+
+    def put(self, sha256: str, chat_id: Optional[str], doc_id: str, name: str):
+        with self._lock:
+            self._entries[self._key(sha256, chat_id)] = {
+                "doc_id": doc_id,
+                "sha256": sha256,
+                "chat_id": chat_id,
+                "name": name,
+                "uploaded_at": datetime.now().isoformat(),
+            }
+            self.save()
+
+    def invalidate(self, doc_id: str, chat_id: Optional[str] = None):
+        """Forget a doc_id the server no longer answers for, so the next use re-uploads."""
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if entry["doc_id"] == doc_id and (chat_id is None or entry["chat_id"] == chat_id)
+            ]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self.counters["invalidations"] += len(stale)
+                self.save()
+        if stale:
+            logger.warning(f"♻️ Invalidated RAG doc_id {doc_id}; it will be re-uploaded")
+
+    def forget_chat(self, chat_id: str):
+        with self._lock:
+            self._entries = {k: e for k, e in self._entries.items() if e["chat_id"] != chat_id}
+            self.save()
+
+    async def ensure_uploaded(self, path: str, chat_id: Optional[str], upload: Callable[[str], Awaitable[str]],
+                              sha256: Optional[str] = None) -> str:
+        """Return the registered doc_id for this content, uploading through `upload(path)` only when missing."""
+        sha256 = sha256 or file_sha256(path)
+        doc_id = self.get(sha256, chat_id)
+        if doc_id:
+            with self._lock:
+                self.counters["hits"] += 1
+            logger.info(f"📎 Reusing RAG upload {doc_id} for {os.path.basename(path)}")
+            return doc_id
+
+        # Concurrent questions on the same document share one upload
+        key = self._key(sha256, chat_id)
+        pending = self._inflight.get(key)
+        if pending is not None and pending.get_loop() is asyncio.get_running_loop():
+            doc_id = await asyncio.shield(pending)
+            with self._lock:
+                self.counters["hits"] += 1
+            return doc_id
+
+        pending = asyncio.ensure_future(upload(path))
+        self._inflight[key] = pending
+        try:
+            doc_id = await asyncio.shield(pending)
+        except Exception:
+            with self._lock:
+                self.counters["upload_errors"] += 1
+            raise
+        finally:
+            if self._inflight.get(key) is pending:
+                del self._inflight[key]
+
+        with self._lock:
+            self.counters["uploads"] += 1
+        self.put(sha256, chat_id, doc_id, os.path.basename(path))
+        logger.info(f"📤 Uploaded {os.path.basename(path)} to the RAG server as {doc_id}")
+        return doc_id
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["uploads"] + self.counters["upload_errors"]
+            return {
+                **self.counters,
+                "entries": len(self._entries),
+                "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+            }
+
+
+rag_registry = RagUploadRegistry()
@@ -0,0 +1,52 @@
+# backend/utils/response_stream.py
+
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_active: ContextVar[Optional["ResponseStream"]] = ContextVar("response_stream", default=None)
+
+
+class ResponseStream:
+    """
+    Text an agent streams to the chat while the graph is still running.
+
+    `chat()` opens one per message; nodes call `emit()` from anywhere inside the graph run
+    (the context variable follows the LangGraph tasks), and whatever they emit must be the
+    start of their final response, so the manager only sends the rest once the graph returns.
+    """
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    def activate(self):
+        return _active.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _active.reset(token)
+
+    async def drain(self, task: asyncio.Task) -> AsyncIterator[str]:
+        """Yield emitted chunks until `task` finishes."""
+        while True:
+            getter = asyncio.ensure_future(self.queue.get())
+            done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield getter.result()
+                continue
+            getter.cancel()
+            while not self.queue.empty():
+                yield self.queue.get_nowait()
+            return
+
+
+def emit(text: str) -> bool:
+    """Stream `text` to the current chat message; False when nothing is listening."""
+    stream = _active.get()
+    if stream is None:
+        return False
+    stream.queue.put_nowait(text)
+    return True
@@ -0,0 +1,173 @@
+# backend/utils/schema_index.py
+
+import os
+import re
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+from backend.utils.extractive import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_CONTEXT_TOKENS = int(os.getenv("SCHEMA_CONTEXT_TOKENS", "1000"))
+
+_COLUMN = re.compile(r'^\s*"?(\w+)"?\s+[A-Z]', re.MULTILINE)
+_FOREIGN_KEY = re.compile(r'FOREIGN KEY\s*\(\s*"?(\w+)"?\s*\)\s*REFERENCES\s+"?(\w+)"?', re.IGNORECASE)
+_CONSTRAINT_WORDS = {"CREATE", "PRIMARY", "FOREIGN", "UNIQUE", "CHECK", "CONSTRAINT"}
+
+# Everyday words for what schemas usually call something else
+_SYNONYMS = {
+    "sale": {"invoice", "order", "price", "total", "quantity"},
+    "sold": {"invoice", "order", "price", "total", "quantity"},
+    "revenue": {"invoice", "order", "price", "total", "amount"},
+    "purchase": {"invoice", "order", "customer"},
+    "spend": {"invoice", "total", "customer"},
+    "spent": {"invoice", "total", "customer"},
+    "song": {"track"},
+    "music": {"track", "genre"},
+    "band": {"artist"},
+    "singer": {"artist"},
+    "staff": {"employee"},
+    "rep": {"employee", "support"},
+    "client": {"customer"},
+    "buyer": {"customer"},
+    "record": {"album"},
+}
+
+
+def name_tokens(name: str) -> Set[str]:
+    """'InvoiceLineId' -> {'invoice', 'line', 'id'}; 'media_type' -> {'media', 'type'}."""
+    words = re.findall(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+", name)
+    return {_singular(word.lower()) for word in words}
+
+
+def _singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def question_terms(question: str) -> Set[str]:
+    terms = set()
+    for word in re.findall(r"[a-z0-9]+", question.lower()):
+        word = _singular(word)
+        terms.add(word)
+        terms |= _SYNONYMS.get(word, set())
+    return terms - {"id", "the", "of", "by", "and", "for", "in", "a", "to"}
+
+
+@dataclass
+class TableInfo:
+    name: str
+    snippet: str  # CREATE TABLE statement plus sample rows
+    columns: List[str]
+    references: Set[str] = field(default_factory=set)  # tables this one has foreign keys to
+    key_columns: Set[str] = field(default_factory=set)  # its foreign-key columns
+    referenced_by: Set[str] = field(default_factory=set)
+
+    @property
+    def neighbours(self) -> Set[str]:
+        return self.references | self.referenced_by
+
+    def compact(self) -> str:
+        """One-line form used when the full snippet does not fit the budget."""
+        keys = "".join(f"; FK -> {table}" for table in sorted(self.references))
+        return f"{self.name}({', '.join(self.columns)}){keys}"
+
+
+class SchemaIndex:
+    """
+    Per-table schema snippets with their foreign-key graph, so each question's SQL prompt only
+    carries the tables it needs: tables matching the question's words and the tables on
+    foreign-key paths between them in full, plus one-line forms of their direct neighbours,
+    until the token budget is used.
+    """
+
+    def __init__(self, tables: Dict[str, TableInfo]):
+        self.tables = tables
+        for table in tables.values():
+            for target in table.references:
+                if target in tables:
+                    tables[target].referenced_by.add(table.name)
+        # Foreign-key columns are left out of matching: "TrackId" says nothing about InvoiceLine itself
+        self._tokens = {
+            name: (name_tokens(name), set().union(*(name_tokens(col) for col in table.columns
+                                                    if col not in table.key_columns)))
+            for name, table in tables.items()
+        }
+
+    @classmethod
+    def from_database(cls, db) -> "SchemaIndex":
+        """Index a langchain SQLDatabase from the DDL and sample rows of `get_table_info`."""
+        tables = {}
+        for name in db.get_usable_table_names():
+            snippet = db.get_table_info([name]).strip()
+            ddl = snippet.split("/*")[0]
+            columns = [c for c in _COLUMN.findall(ddl) if c.upper() not in _CONSTRAINT_WORDS]
+            keys = _FOREIGN_KEY.findall(ddl)
+            tables[name] = TableInfo(name, snippet, columns, {target for _, target in keys}, {col for col, _ in keys})
+        logger.info(f"🗂️ Indexed schema of {len(tables)} tables")
+        return cls(tables)
+
+    def score(self, question: str) -> Dict[str, float]:
+        terms = question_terms(question)
+        scores = {}
+        for name, (table_tokens, column_tokens) in self._tokens.items():
+            score = 3.0 * len(terms & table_tokens) + 1.0 * len(terms & (column_tokens - table_tokens - {"id"}))
+            if score:
+                scores[name] = score
+        return scores
+
+    def _path(self, start: str, goal: str) -> List[str]:
+        """Shortest foreign-key path between two tables (either direction), inclusive."""
+        previous = {start: None}
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            if current == goal:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = previous[current]
+                return path[::-1]
+            for neighbour in sorted(self.tables[current].neighbours):
+                if neighbour in self.tables and neighbour not in previous:
+                    previous[neighbour] = current
+                    queue.append(neighbour)
+        return []
+
+    def select(self, question: str) -> Tuple[List[str], List[str]]:
+        """(core, neighbours): matched tables most relevant first plus the tables joining them,
+        and the tables one foreign key away from those. Every table is core if nothing matched."""
+        scores = self.score(question)
+        core = sorted(scores, key=lambda name: (-scores[name], name))
+        if not core:
+            return sorted(self.tables), []
+
+        matched = list(core)
+        for i, a in enumerate(matched):
+            for b in matched[i + 1:]:
+                core += [t for t in self._path(a, b) if t not in core]
+        neighbours = []
+        for name in core:
+            neighbours += sorted(n for n in self.tables[name].neighbours
+                                 if n in self.tables and n not in core and n not in neighbours)
+        return core, neighbours
+
+    def context(self, question: str, budget_tokens: int = SCHEMA_CONTEXT_TOKENS) -> str:
+        """Schema text for the SQL prompt: full snippets of core tables while they fit, one-line forms otherwise."""
+        core, neighbours = self.select(question)
+        full = bool(self.score(question))  # with no match, every table in one-line form
+        parts, used = [], 0
+        for name in core + neighbours:
+            table = self.tables[name]
+            for text in ([table.snippet] if full and name in core else []) + [table.compact()]:
+                if used + estimate_tokens(text) <= budget_tokens:
+                    parts.append(text)
+                    used += estimate_tokens(text)
+                    break
+        return "\n\n".join(parts)
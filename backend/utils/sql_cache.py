@@ -0,0 +1,234 @@
+# backend/utils/sql_cache.py
+
+import os
+import re
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SQL_CACHE_MAX_BYTES = int(os.getenv("SQL_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+SQL_TRANSLATION_CACHE_SIZE = int(os.getenv("SQL_TRANSLATION_CACHE_SIZE", "512"))
+
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_READ_ONLY = re.compile(r"^\s*(select|with|values)\b", re.IGNORECASE)
+
+
+def normalize_sql(query: str) -> str:
+    """Lowercase, comment-free, single-spaced SQL; quoted literals and identifiers are left as written."""
+    parts = _QUOTED.split(query)
+    for i in range(0, len(parts), 2):  # even parts are outside quotes
+        parts[i] = re.sub(r"\s+", " ", _COMMENT.sub(" ", parts[i])).lower()
+        parts[i] = re.sub(r"\s*([(),=<>;])\s*", r"\1", parts[i])
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+class SqlResultCache:
+    """
+    Results of read-only queries against one SQLite file, keyed by normalized SQL text.
+
+    Every lookup compares the file's mtime/size and `PRAGMA data_version` (which changes when
+    another connection commits) with the values the entries were cached under, and drops them
+    all on a change. Entries are evicted least-recently-used beyond `max_bytes` of results.
+    """
+
+    def __init__(self, db_path: str, max_bytes: int = SQL_CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[Tuple[int, int, int]] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _database_version(self) -> Tuple[int, int, int]:
+        stat = os.stat(self.db_path)
+        if self._conn is None:
+            uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return stat.st_mtime_ns, stat.st_size, data_version
+
+    def _check_version(self):
+        """Drop every entry if the database changed since they were cached (call with the lock held)."""
+        try:
+            version = self._database_version()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"SQL cache could not read the database version: {e}")
+            version = None
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+                logger.info(f"🗑️ {self.db_path} changed, dropped {len(self._entries)} cached SQL results")
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    def get(self, query: str) -> Optional[Any]:
+        if not _READ_ONLY.match(query):
+            return None
+        key = normalize_sql(query)
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, query: str, result: Any, size: Optional[int] = None):
+        """Cache a successful read-only result (`size` in bytes, measured from str(result) if not given);
+        results over a quarter of the budget are not kept."""
+        if size is None:
+            size = len(str(result).encode("utf-8"))
+        if not _READ_ONLY.match(query) or size > self.max_bytes // 4:
+            return
+        key = normalize_sql(query)
+        with self._lock:
+            self._check_version()
+            if self._version is None:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_QUESTION_STOPWORDS = {
+    "a", "an", "the", "me", "show", "give", "list", "find", "get", "tell", "what", "which", "are", "is",
+    "please", "can", "you", "could", "would", "of", "for", "all", "in", "i", "want", "to", "see", "display",
+}
+
+# Filler that never changes which rows a question asks for (in question_tokens' singular form):
+# two questions share SQL only if every word they differ by is one of these
+_FILLER_WORDS = {
+    "how", "do", "doe", "did", "there", "we", "us", "our", "have", "has", "just", "also", "now", "here",
+    "currently", "kindly", "quickly", "database", "db", "data", "table", "result", "output",
+    "info", "information", "detail", "query", "sql", "run", "fetch", "return", "look", "up",
+    "let", "know", "some", "need", "like", "should", "will",
+}
+
+
+def question_tokens(question: str) -> frozenset:
+    """Content words of a question, lowercased and naively singularized."""
+    words = re.findall(r"[a-z0-9_]+", question.lower())
+    tokens = set()
+    for word in words:
+        if word in _QUESTION_STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.add(word)
+    return frozenset(tokens)
+
+
+class SqlTranslationCache:
+    """
+    Question → SQL translations that executed successfully, per schema version.
+
+    A question matches an entry with the same content words in any order, or one that differs
+    only by filler words, so "top 10 artists by sales" and "can you look up the top 10 artists
+    by sales in the database" share SQL, but "top 5", "not from USA" or "jazz" instead of
+    "rock" never do.
+    """
+
+    def __init__(self, max_entries: int = SQL_TRANSLATION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, frozenset], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.discarded = 0
+
+    def _match(self, schema_version: str, tokens: frozenset) -> Optional[Tuple[str, frozenset]]:
+        if (schema_version, tokens) in self._entries:
+            return schema_version, tokens
+        best, best_difference = None, None
+        for key in self._entries:
+            version, other = key
+            difference = tokens ^ other
+            if version != schema_version or not difference <= _FILLER_WORDS:
+                continue
+            if best is None or len(difference) < best_difference:
+                best, best_difference = key, len(difference)
+        return best
+
+    def lookup(self, schema_version: str, question: str) -> Optional[str]:
+        tokens = question_tokens(question)
+        if not tokens:
+            return None
+        with self._lock:
+            key = self._match(schema_version, tokens)
+            if key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if key[1] == tokens:
+                self.hits += 1
+            else:
+                self.near_hits += 1
+            return self._entries[key]
+
+    def store(self, schema_version: str, question: str, query: str):
+        tokens = question_tokens(question)
+        if not tokens:
+            return
+        with self._lock:
+            self._entries[(schema_version, tokens)] = query
+            self._entries.move_to_end((schema_version, tokens))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, schema_version: str, question: str, query: str):
+        """Forget a translation that failed to execute (the entry this question matched, if it holds `query`)."""
+        tokens = question_tokens(question)
+        with self._lock:
+            key = self._match(schema_version, tokens)
+            if key is not None and self._entries[key] == query:
+                del self._entries[key]
+                self.discarded += 1
+                logger.info(f"🗑️ Dropped failing SQL translation for: {question}")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "near_duplicate_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.near_hits) / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "discarded": self.discarded,
+            }
@@ -0,0 +1,120 @@
+# backend/utils/sql_digest.py
+
+import os
+import html
+import json
+import logging
+from collections import Counter
+from typing import List, Optional, Sequence
+
+from backend.utils.sql_engine import SqlResult
+
+logger = logging.getLogger(__name__)
+
+DIGEST_TOP_ROWS = int(os.getenv("SQL_DIGEST_TOP_ROWS", "10"))
+TEMPLATE_MAX_ROWS = int(os.getenv("SQL_TEMPLATE_MAX_ROWS", "10"))  # 0 always asks the LLM
+MAX_CELL_CHARS = 60
+
+
+def _type_name(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool) or isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "real"
+    if isinstance(value, bytes):
+        return "blob"
+    return "text"
+
+
+def _cell(value, limit: int = MAX_CELL_CHARS) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, bytes):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    text = str(value).replace("\n", " ")
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def _json_cell(value):
+    if isinstance(value, bytes):
+        return f"<{len(value)} bytes>"
+    return value
+
+
+def column_types(result: SqlResult) -> List[str]:
+    types = []
+    for i in range(len(result.columns)):
+        seen = {_type_name(row[i]) for row in result.rows} - {"null"}
+        types.append("|".join(sorted(seen)) or "null")
+    return types
+
+
+def _column_stats(values: Sequence) -> str:
+    present = [v for v in values if v is not None]
+    parts = []
+    if len(present) < len(values):
+        parts.append(f"{len(values) - len(present)} null")
+    numbers = [v for v in present if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    if numbers and len(numbers) == len(present):
+        parts.append(f"min {_cell(min(numbers))}, max {_cell(max(numbers))}, "
+                     f"mean {_cell(sum(numbers) / len(numbers))}, sum {_cell(sum(numbers))}")
+    elif present:
+        counts = Counter(_cell(v, 30) for v in present)
+        parts.append(f"{len(counts)} distinct")
+        common = [(v, n) for v, n in counts.most_common(3) if n > 1]
+        if common:
+            parts.append("most common " + ", ".join(f"{v} ({n})" for v, n in common))
+    return "; ".join(parts)
+
+
+def digest_result(result: SqlResult, top_rows: int = DIGEST_TOP_ROWS) -> str:
+    """Compact stand-in for a result table in the answer prompt: shape, types, per-column stats, first rows."""
+    lines = [f"{len(result.rows)} rows" + (" (cut off at the row limit; more exist)" if result.truncated else "")]
+    types = column_types(result)
+    lines.append("columns: " + ", ".join(f"{col} ({kind})" for col, kind in zip(result.columns, types)))
+    if len(result.rows) > 1:
+        for i, col in enumerate(result.columns):
+            stats = _column_stats([row[i] for row in result.rows])
+            if stats:
+                lines.append(f"  {col}: {stats}")
+    if result.rows:
+        shown = result.rows[:top_rows]
+        lines.append(f"first {len(shown)} rows:" if len(shown) < len(result.rows) else "rows:")
+        lines.append(" | ".join(result.columns))
+        lines.extend(" | ".join(_cell(value) for value in row) for row in shown)
+    return "\n".join(lines)
+
+
+def markdown_table(columns: List[str], rows: List[tuple]) -> str:
+    lines = ["| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+    lines += ["| " + " | ".join(_cell(value).replace("|", "\\|") for value in row) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+def templated_answer(result: SqlResult, table_shown: bool) -> Optional[str]:
+    """A fixed-form answer for small results, or None when the LLM should write one."""
+    if result.truncated or len(result.rows) > TEMPLATE_MAX_ROWS:
+        return None
+    if not result.rows:
+        return "No matching rows were found."
+    if len(result.rows) == 1:
+        return ", ".join(f"**{col}**: {_cell(value, 200)}" for col, value in zip(result.columns, result.rows[0]))
+    if table_shown:
+        return f"Found {len(result.rows)} rows (shown in the table above)."
+    return f"Found {len(result.rows)} rows:\n\n" + markdown_table(result.columns, result.rows)
+
+
+def render_table_payload(table_id: str, columns: Optional[List[str]], rows: List[tuple]) -> str:
+    """
+    One-line HTML placeholder carrying table rows as JSON for the chat client; the first chunk of
+    a table carries the columns and later chunks with the same id append rows to it.
+    """
+    attrs = f'class="hpgpt-table" data-table-id="{table_id}"'
+    if columns is not None:
+        attrs += f' data-columns="{html.escape(json.dumps(columns), quote=True)}"'
+    payload = json.dumps([[_json_cell(value) for value in row] for row in rows], default=str)
+    return f'<div {attrs} data-rows="{html.escape(payload, quote=True)}"></div>\n'
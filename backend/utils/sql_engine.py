@@ -0,0 +1,175 @@
+# backend/utils/sql_engine.py
+
+import os
+import time
+import queue
+import asyncio
+import sqlite3
+import logging
+import threading
+import weakref
+from contextlib import aclosing
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SQL_WORKERS = int(os.getenv("SQL_WORKERS", "4"))
+SQL_TIMEOUT_S = float(os.getenv("SQL_TIMEOUT_S", "5"))
+SQL_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", "1000"))
+SQL_MAX_RESULT_BYTES = int(os.getenv("SQL_MAX_RESULT_BYTES", str(1024 * 1024)))
+FETCH_BATCH = 200
+PROGRESS_STEPS = 10000  # SQLite VM instructions between deadline checks
+
+
+class SqlTimeoutError(TimeoutError):
+    pass
+
+
+@dataclass
+class SqlResult:
+    columns: List[str]
+    rows: List[tuple] = field(default_factory=list)
+    truncated: bool = False  # stopped at the row or byte limit
+    size: int = 0  # approximate bytes of the row values
+    seconds: float = 0.0
+
+
+def _row_size(row: tuple) -> int:
+    return sum(len(value) if isinstance(value, (str, bytes)) else 8 for value in row)
+
+
+class _Lease:
+    """A pooled connection checked out by one query, with the cursor and deadline of that query."""
+
+    def __init__(self, conn: sqlite3.Connection, deadline: float):
+        self.conn = conn
+        self.deadline = deadline
+        self.cursor: Optional[sqlite3.Cursor] = None
+        self.lock = threading.Lock()  # fetches and release never overlap, even after a cancellation
+
+
+class SqlEngine:
+    """
+    Read-only SQLite execution off the event loop.
+
+    A pool of `mode=ro` connections is shared by a thread pool of the same size; each query
+    checks one out for its whole run, and at most `workers` queries run at once. A progress
+    handler interrupts statements that pass their deadline, and `execute` stops fetching at
+    `max_rows` rows or `max_bytes` of values, so a runaway join can neither stall the server
+    nor fill its memory.
+    """
+
+    def __init__(self, db_path: str, workers: int = SQL_WORKERS, timeout: float = SQL_TIMEOUT_S,
+                 max_rows: int = SQL_MAX_ROWS, max_bytes: int = SQL_MAX_RESULT_BYTES):
+        self.db_path = db_path
+        self.workers = workers
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sql")
+        self._connections: "queue.SimpleQueue[sqlite3.Connection]" = queue.SimpleQueue()
+        self._limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def _limit(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop not in self._limits:
+            self._limits[loop] = asyncio.Semaphore(self.workers)
+        return self._limits[loop]
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _open(self, query: str, deadline: float) -> _Lease:
+        try:
+            conn = self._connections.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        lease = _Lease(conn, deadline)
+        conn.set_progress_handler(lambda: 1 if time.monotonic() > lease.deadline else 0, PROGRESS_STEPS)
+        try:
+            lease.cursor = conn.execute(query)
+        except Exception:
+            self._close(lease)
+            raise
+        return lease
+
+    @staticmethod
+    def _fetch(lease: _Lease) -> List[tuple]:
+        with lease.lock:
+            return lease.cursor.fetchmany(FETCH_BATCH)
+
+    def _close(self, lease: _Lease):
+        lease.deadline = 0.0  # interrupts a statement still running in another thread
+        with lease.lock:
+            if lease.cursor is not None:
+                lease.cursor.close()
+            lease.conn.set_progress_handler(None, 0)
+            self._connections.put(lease.conn)
+
+    def _timeout_error(self, e: sqlite3.OperationalError, timeout: float) -> Exception:
+        if "interrupted" in str(e):
+            return SqlTimeoutError(f"Query took longer than {timeout:g}s and was stopped")
+        return e
+
+    async def stream(self, query: str, timeout: Optional[float] = None) -> AsyncIterator[Tuple[List[str], List[tuple]]]:
+        """Yield (columns, rows) batches as SQLite produces them; close the generator to stop early."""
+        loop = asyncio.get_running_loop()
+        timeout = timeout or self.timeout
+        async with self._limit():
+            try:
+                lease = await loop.run_in_executor(self._executor, self._open, query, time.monotonic() + timeout)
+            except sqlite3.OperationalError as e:
+                raise self._timeout_error(e, timeout) from e
+            try:
+                columns = [d[0] for d in lease.cursor.description or []]
+                while True:
+                    try:
+                        batch = await loop.run_in_executor(self._executor, self._fetch, lease)
+                    except sqlite3.OperationalError as e:
+                        raise self._timeout_error(e, timeout) from e
+                    if not batch:
+                        if not columns:
+                            yield columns, []
+                        return
+                    yield columns, batch
+            finally:
+                self._close(lease)  # brief: a fetch still running is interrupted first
+
+    async def execute(self, query: str, timeout: Optional[float] = None,
+                      on_rows: Optional[Callable[[List[str], List[tuple]], None]] = None) -> SqlResult:
+        """Run a read-only query and collect its rows up to the row and byte limits;
+        `on_rows(columns, rows)` sees each batch of kept rows as it arrives."""
+        start = time.perf_counter()
+        result = None
+        async with aclosing(self.stream(query, timeout)) as batches:
+            async for columns, batch in batches:
+                if result is None:
+                    result = SqlResult(columns)
+                kept = 0
+                for row in batch:
+                    size = _row_size(row)
+                    if len(result.rows) >= self.max_rows or result.size + size > self.max_bytes:
+                        result.truncated = True
+                        break
+                    result.rows.append(row)
+                    result.size += size
+                    kept += 1
+                if on_rows is not None and kept:
+                    on_rows(columns, batch[:kept])
+                if result.truncated:
+                    break
+        result = result or SqlResult([])
+        result.seconds = time.perf_counter() - start
+        if result.truncated:
+            logger.info(f"✂️ SQL result cut at {len(result.rows)} rows / {result.size} bytes")
+        return result
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
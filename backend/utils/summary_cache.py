@@ -0,0 +1,63 @@
+# backend/utils/summary_cache.py
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CACHE_DIR = "summary_cache"
+
+
+def content_key(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """Section and document summaries on disk, keyed by a hash of what was summarized."""
+
+    def __init__(self, cache_dir: str = SUMMARY_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.cache_dir, kind, f"{key}.json")
+
+    def get(self, kind: str, key: str) -> Optional[str]:
+        try:
+            with open(self._path(kind, key), "r", encoding="utf-8") as f:
+                summary = json.load(f)["summary"]
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return summary
+
+    def put(self, kind: str, key: str, summary: str):
+        path = self._path(kind, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"summary": summary}, f)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.error(f"Error saving summary cache entry {kind}/{key}: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+summary_cache = SummaryCache()
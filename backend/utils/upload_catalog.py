@@ -0,0 +1,183 @@
+# backend/utils/upload_catalog.py
+
+import os
+import re
+import json
+import uuid
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = "uploads"
+CATALOG_FILE = "upload_catalog.json"
+
+DATASET_EXTENSIONS = (".csv", ".xlsx")
+DOCUMENT_EXTENSIONS = (".pdf", ".docx", ".doc", ".txt")
+
+# Files written by POST /upload/{session_id} are named "<session_id>_[<16 hex chars>_]<original name>"
+_SESSION_PREFIX = re.compile(r"^([0-9a-fA-F-]{36})_(?:[0-9a-f]{16}_)?(.+)$")
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadCatalog:
+    """Index of uploaded files per chat session, so agents never scan the uploads directory."""
+
+    def __init__(self, catalog_file: str = CATALOG_FILE, upload_dir: str = UPLOAD_DIR):
+        self.catalog_file = catalog_file
+        self.upload_dir = upload_dir
+        self._lock = threading.Lock()
+        self._files: Dict[str, dict] = {}
+        self._by_session: Dict[str, List[str]] = {}
+        self.load()
+
+    def load(self):
+        try:
+            if os.path.exists(self.catalog_file):
+                with open(self.catalog_file, "r") as f:
+                    entries = json.load(f)
+            else:
+                entries = self._index_existing_uploads()
+        except Exception as e:
+            logger.error(f"Error loading upload catalog: {e}")
+            entries = []
+
+        for entry in sorted(entries, key=lambda e: e["uploaded_at"]):
+            self._add(entry)
+
+    def save(self):
+        try:
+            with open(self.catalog_file, "w") as f:
+                json.dump(list(self._files.values()), f, indent=2)
+        except Exception as e:
+            logger.error(f"Error saving upload catalog: {e}")
+
+    def _index_existing_uploads(self) -> List[dict]:
+        """One-time import of files uploaded before the catalog existed."""
+        if not os.path.isdir(self.upload_dir):
+            return []
+
+        entries = []
+        for name in os.listdir(self.upload_dir):
+            path = os.path.join(self.upload_dir, name)
+            match = _SESSION_PREFIX.match(name)
+            if not match or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append(self._entry(
+                session_id=match.group(1),
+                path=path,
+                original_name=match.group(2),
+                content_type=None,
+                size=stat.st_size,
+                sha256=file_sha256(path),
+                uploaded_at=datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            ))
+        logger.info(f"📚 Indexed {len(entries)} existing uploads into the catalog")
+        return entries
+
+    @staticmethod
+    def _entry(session_id: str, path: str, original_name: str, content_type: Optional[str],
+               size: int, sha256: str, uploaded_at: Optional[str] = None) -> dict:
+        uploaded_at = uploaded_at or datetime.now().isoformat()
+        return {
+            "file_id": uuid.uuid4().hex,
+            "session_id": session_id,
+            "name": os.path.basename(path),
+            "original_name": original_name,
+            "path": path,
+            "extension": os.path.splitext(original_name)[1].lower(),
+            "content_type": content_type,
+            "size": size,
+            "sha256": sha256,
+            "uploaded_at": uploaded_at,
+            "modified_at": uploaded_at,
+        }
+
+    def _add(self, entry: dict):
+        # Re-registering a path (identical content uploaded again) replaces the old entry
+        session_files = self._by_session.setdefault(entry["session_id"], [])
+        for file_id in list(session_files):
+            if self._files[file_id]["path"] == entry["path"]:
+                entry["uploaded_at"] = self._files[file_id]["uploaded_at"]
+                session_files.remove(file_id)
+                del self._files[file_id]
+        self._files[entry["file_id"]] = entry
+        session_files.append(entry["file_id"])
+
+    def register(self, session_id: str, path: str, original_name: str, content_type: Optional[str] = None,
+                 size: Optional[int] = None, sha256: Optional[str] = None) -> dict:
+        entry = self._entry(
+            session_id=session_id,
+            path=path,
+            original_name=original_name,
+            content_type=content_type,
+            size=size if size is not None else os.path.getsize(path),
+            sha256=sha256 or file_sha256(path),
+        )
+        with self._lock:
+            self._add(entry)
+            self.save()
+        logger.info(f"📚 Cataloged upload {original_name} for session {session_id}")
+        return dict(entry)
+
+    def get(self, file_id: str) -> Optional[dict]:
+        entry = self._files.get(file_id)
+        return dict(entry) if entry else None
+
+    def session_files(self, session_id: str) -> List[dict]:
+        with self._lock:
+            return [dict(self._files[file_id]) for file_id in self._by_session.get(session_id, [])]
+
+    def find(self, session_id: str, sha256: str) -> Optional[dict]:
+        """An upload with this content in the session that is still on disk."""
+        with self._lock:
+            for file_id in self._by_session.get(session_id, []):
+                entry = self._files[file_id]
+                if entry["sha256"] == sha256 and os.path.exists(entry["path"]):
+                    return dict(entry)
+        return None
+
+    def latest(self, session_id: str, extensions: Optional[Sequence[str]] = None,
+               n: int = 1) -> List[dict]:
+        """Most recent uploads for a session (newest first), optionally limited to some extensions.
+        There is no cross-session form: another session's upload is never returned."""
+        if not session_id:
+            raise ValueError("A session id is required to look up uploads")
+        with self._lock:
+            file_ids = self._by_session.get(session_id, [])
+
+            found = []
+            for file_id in reversed(file_ids):
+                entry = self._files[file_id]
+                if extensions and entry["extension"] not in extensions:
+                    continue
+                if not os.path.exists(entry["path"]):
+                    continue
+                found.append(dict(entry))
+                if len(found) == n:
+                    break
+            return found
+
+    def latest_file(self, session_id: str, extensions: Optional[Sequence[str]] = None) -> Optional[dict]:
+        found = self.latest(session_id, extensions, n=1)
+        return found[0] if found else None
+
+    def forget_session(self, session_id: str):
+        with self._lock:
+            for file_id in self._by_session.pop(session_id, []):
+                self._files.pop(file_id, None)
+            self.save()
+
+
+upload_catalog = UploadCatalog()
@@ -0,0 +1,119 @@
+# backend/utils/upload_jobs.py
+
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "2"))
+MAX_JOBS = 1000
+PREVIEW_CHARS = 500
+
+# A step gets the upload's catalog entry and may return preview text for the status endpoint
+Step = Callable[[dict], Awaitable[Optional[str]]]
+
+
+class UploadJobQueue:
+    """
+    Post-upload work (text extraction, dataset conversion and profiling, RAG pre-registration)
+    run by a pool of asyncio workers, so POST /upload returns once the bytes are on disk.
+    """
+
+    def __init__(self, workers: int = UPLOAD_WORKERS, max_jobs: int = MAX_JOBS):
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self._steps: List[Tuple[str, Tuple[str, ...], Step]] = []
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def add_step(self, name: str, extensions: Sequence[str], step: Step):
+        """Run `step` for uploads with these extensions, in the order steps were added."""
+        self._steps.append((name, tuple(extensions), step))
+
+    def _start(self):
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"📦 Upload job queue started with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def submit(self, entry: dict) -> dict:
+        """Queue the post-processing of a cataloged upload; the job id is the catalog file_id."""
+        if self._queue is None:
+            self._start()
+
+        steps = [name for name, extensions, _ in self._steps if entry["extension"] in extensions]
+        job = {
+            "id": entry["file_id"],
+            "session_id": entry["session_id"],
+            "filename": entry["original_name"],
+            "sha256": entry["sha256"],
+            "status": "queued" if steps else "done",
+            "steps": {name: {"status": "pending"} for name in steps},
+            "content": None,
+            "queued_at": datetime.now().isoformat(),
+            "finished_at": None if steps else datetime.now().isoformat(),
+        }
+        self._jobs[job["id"]] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+
+        if steps:
+            self._queue.put_nowait((job, entry))
+        return dict(job)
+
+    async def _worker(self, number: int):
+        while True:
+            job, entry = await self._queue.get()
+            try:
+                await self._run(job, entry)
+            except Exception as e:
+                logger.error(f"Upload job {job['id']} crashed: {e}")
+                job["status"] = "failed"
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: dict, entry: dict):
+        job["status"] = "running"
+        start = time.perf_counter()
+        for name, extensions, step in self._steps:
+            if name not in job["steps"]:
+                continue
+            job["steps"][name] = {"status": "running"}
+            step_start = time.perf_counter()
+            try:
+                preview = await step(entry)
+                job["steps"][name] = {"status": "done", "seconds": round(time.perf_counter() - step_start, 3)}
+                if preview and job["content"] is None:
+                    job["content"] = preview[:PREVIEW_CHARS] + "..." if len(preview) > PREVIEW_CHARS else preview
+            except Exception as e:
+                logger.error(f"Upload step {name} failed for {entry['original_name']}: {e}")
+                job["steps"][name] = {"status": "failed", "error": str(e)}
+
+        failed = [name for name, step in job["steps"].items() if step["status"] == "failed"]
+        job["status"] = "failed" if failed else "done"
+        job["finished_at"] = datetime.now().isoformat()
+        logger.info(
+            f"📦 Processed {entry['original_name']} in {time.perf_counter() - start:.2f}s"
+            f"{f' (failed: {failed})' if failed else ''}"
+        )
+
+    def status(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        return {**job, "steps": {name: dict(step) for name, step in job["steps"].items()}}
+
+
+upload_jobs = UploadJobQueue()
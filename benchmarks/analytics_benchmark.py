@@ -0,0 +1,308 @@
+# benchmarks/analytics_benchmark.py
+"""
+Benchmark the non-LLM cost of AnalyticsAgent.run with a deterministic stub in place of Gemini.
+
+Run from the repository root:
+
+    python -m benchmarks.analytics_benchmark --sizes 10k,1m --repeat 3 --output bench.json
+    python -m benchmarks.analytics_benchmark --compare bench.json
+
+Each run reports per-stage wall time and tracemalloc peak memory (load, profile, format,
+exec, render) and writes machine-readable results that can be diffed across commits.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import backend.agents.analytics_agent as analytics_module
+from backend.agents.analytics_agent import AnalyticsAgent
+from backend.utils.code_cache import CodeCache
+from backend.utils.fast_path import AggregateFastPath
+
+DATA_DIR = os.path.join("benchmarks", ".data")
+SYNTHETIC_SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+STAGES = ("load", "profile", "format", "exec", "render")
+
+# Canned questions; the stub answers each with code for the dataset's group/value columns
+QUERIES = {
+    "plot_bar": "Plot the average {value} by {group} as a bar chart",
+    "plot_scatter": "Plot {value} against {x} as a scatter chart",
+    "analysis": "What are the top 10 {group} values by average {value}?",
+}
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    """Stands in for genai.GenerativeModel and returns canned code for the active scenario."""
+
+    def __init__(self):
+        self.scenario: Dict[str, str] = {}
+        self.query = ""
+
+    def generate_content(self, prompt: str) -> StubResponse:
+        group, value, x = self.scenario["group"], self.scenario["value"], self.scenario["x"]
+
+        if 'Answer only: "yes" or "no"' in prompt:
+            return StubResponse("yes" if self.query.startswith("plot") else "no")
+
+        if "Rephrase this" in prompt:
+            return StubResponse("Stub answer.")
+
+        if self.query == "plot_bar":
+            code = (
+                f"avg = df.groupby({group!r})[{value!r}].mean().reset_index()\n"
+                f"fig = px.bar(avg, x={group!r}, y={value!r})"
+            )
+        elif self.query == "plot_scatter":
+            code = f"fig = px.scatter(df, x={x!r}, y={value!r})"
+        else:
+            code = (
+                f"top = df.groupby({group!r})[{value!r}].mean().sort_values(ascending=False).head(10)\n"
+                f"print(top)"
+            )
+        return StubResponse(f"```python\n{code}\n```\nSummary:\nStub summary.")
+
+
+class StageRecorder:
+    """Accumulates wall time and peak traced memory for each instrumented stage of one run."""
+
+    def __init__(self, trace_memory: bool):
+        self.trace_memory = trace_memory
+        self.times: Dict[str, float] = {}
+        self.peaks: Dict[str, int] = {}
+        self.overall_peak = 0
+
+    def checkpoint(self) -> int:
+        """Fold the current tracemalloc peak into the run-wide peak before it is reset."""
+        if self.trace_memory:
+            self.overall_peak = max(self.overall_peak, tracemalloc.get_traced_memory()[1])
+        return self.overall_peak
+
+    def wrap(self, stage: str, func):
+        def timed(*args, **kwargs):
+            if self.trace_memory:
+                self.checkpoint()
+                tracemalloc.reset_peak()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.times[stage] = self.times.get(stage, 0.0) + time.perf_counter() - start
+                if self.trace_memory:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    self.peaks[stage] = max(self.peaks.get(stage, 0), peak)
+        return timed
+
+
+def synthetic_dataset(rows: int) -> str:
+    """Write (once) a cars-like CSV with the given number of rows and return its path."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"synthetic_{rows}.csv")
+    if os.path.exists(path):
+        return path
+
+    rng = np.random.default_rng(42)
+    brands = np.array(["Maruti", "Hyundai", "Honda", "Toyota", "Tata", "Mahindra", "Ford", "Skoda",
+                       "Renault", "Kia", "BMW", "Audi", "Volkswagen", "Nissan", "Jeep", "MG"])
+    chunk = 1_000_000
+    for start in range(0, rows, chunk):
+        n = min(chunk, rows - start)
+        pd.DataFrame({
+            "brand": brands[rng.integers(0, len(brands), n)],
+            "year": rng.integers(2000, 2025, n),
+            "km_driven": rng.integers(1_000, 300_000, n),
+            "fuel": np.where(rng.random(n) < 0.5, "Diesel", "Petrol"),
+            "selling_price": rng.lognormal(13, 0.6, n).round(),
+        }).to_csv(path, mode="a", header=(start == 0), index=False)
+    return path
+
+
+def datasets(sizes: List[str]) -> List[dict]:
+    found = []
+    for size in sizes:
+        found.append({
+            "name": f"synthetic_{size}",
+            "path": synthetic_dataset(SYNTHETIC_SIZES[size]),
+            "rows": SYNTHETIC_SIZES[size],
+            "group": "brand", "value": "selling_price", "x": "km_driven",
+        })
+
+    def count_rows(path: str) -> int:
+        with open(path, "rb") as f:
+            return sum(1 for _ in f) - 1
+
+    cars = sorted(glob.glob(os.path.join("uploads", "*cars.csv")))
+    if cars:
+        found.append({"name": "cars", "path": cars[0], "rows": count_rows(cars[0]),
+                      "group": "brand", "value": "selling_price", "x": "km_driven"})
+
+    mileages = sorted(glob.glob(os.path.join("uploads", "*mileages-sample.csv")))
+    if mileages:
+        found.append({"name": "mileages-sample", "path": mileages[0], "rows": count_rows(mileages[0]),
+                      "group": "Make Name", "value": "Mileage Combined Mpg", "x": "Model Year"})
+    return found
+
+
+def instrument(agent: AnalyticsAgent, recorder: StageRecorder):
+    """Route the agent's stages through the recorder; returns a function that undoes it."""
+    originals = {
+        "load_file": agent.load_file,
+        "profile_dataframe": agent.profile_dataframe,
+        "format_str": analytics_module.black.format_str,
+        "render": analytics_module.render_figure_payload,
+    }
+    agent.load_file = recorder.wrap("load", originals["load_file"])
+    agent.profile_dataframe = recorder.wrap("profile", originals["profile_dataframe"])
+    analytics_module.black.format_str = recorder.wrap("format", originals["format_str"])
+    analytics_module.render_figure_payload = recorder.wrap("render", originals["render"])
+    # Shadow the builtin inside the agent module so generated-code execution is timed too
+    analytics_module.exec = recorder.wrap("exec", exec)
+
+    def restore():
+        agent.load_file = originals["load_file"]
+        agent.profile_dataframe = originals["profile_dataframe"]
+        analytics_module.black.format_str = originals["format_str"]
+        analytics_module.render_figure_payload = originals["render"]
+        del analytics_module.exec
+
+    return restore
+
+
+def run_once(agent: AnalyticsAgent, dataset: dict, query: str, trace_memory: bool, fast_path: bool = False) -> dict:
+    agent.model.scenario = dataset
+    agent.model.query = query
+    agent.code_cache = CodeCache()  # every run measures the uncached path
+    agent.fast_path = AggregateFastPath()
+    if not fast_path:
+        # Keep the generated-code stages comparable across commits
+        agent.fast_path.parse = lambda *args, **kwargs: None
+
+    recorder = StageRecorder(trace_memory)
+    restore = instrument(agent, recorder)
+    file_info = {"name": os.path.basename(dataset["path"]), "path": dataset["path"]}
+    prompt = QUERIES[query].format(**dataset)
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = asyncio.run(agent.run(file_info, prompt))
+    finally:
+        total = time.perf_counter() - start
+        peak_total = recorder.checkpoint() if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+        restore()
+
+    error = result.get("error") or (result.get("response", "") if "❌" in result.get("response", "") else None)
+    return {
+        "total_s": total,
+        "stages_s": {stage: recorder.times.get(stage, 0.0) for stage in STAGES},
+        "peak_bytes": {stage: recorder.peaks.get(stage, 0) for stage in STAGES} if trace_memory else {},
+        "peak_total_bytes": peak_total,
+        "response_bytes": len(result.get("response", "")),
+        "error": error,
+    }
+
+
+def summarize(runs: List[dict]) -> dict:
+    return {
+        "total_s": statistics.median(r["total_s"] for r in runs),
+        "stages_s": {s: statistics.median(r["stages_s"][s] for r in runs) for s in STAGES},
+        "peak_bytes": {s: max(r["peak_bytes"].get(s, 0) for r in runs) for s in STAGES} if runs[0]["peak_bytes"] else {},
+        "peak_total_bytes": max(r["peak_total_bytes"] for r in runs) if runs[0]["peak_total_bytes"] is not None else None,
+        "response_bytes": runs[-1]["response_bytes"],
+        "error": next((r["error"] for r in runs if r["error"]), None),
+        "repeats": len(runs),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def print_report(results: List[dict], baseline: Optional[dict] = None):
+    previous = {(r["dataset"], r["query"]): r for r in (baseline or {}).get("results", [])}
+    header = f"{'dataset':<20}{'query':<14}{'total':>9}" + "".join(f"{s:>9}" for s in STAGES) + f"{'peak MB':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        line = f"{r['dataset']:<20}{r['query']:<14}{r['total_s']:>9.3f}"
+        line += "".join(f"{r['stages_s'][s]:>9.3f}" for s in STAGES)
+        peak = r.get("peak_total_bytes")
+        line += f"{peak / 1e6:>10.1f}" if peak is not None else f"{'-':>10}"
+        old = previous.get((r["dataset"], r["query"]))
+        if old:
+            line += f"   ({(r['total_s'] - old['total_s']) / old['total_s'] * 100:+.1f}% vs {baseline.get('commit')})"
+        if r["error"]:
+            line += f"   ERROR: {r['error'][:60]}"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="AnalyticsAgent benchmark with a stubbed LLM")
+    parser.add_argument("--sizes", default="10k,1m,10m", help="synthetic sizes: comma list of 10k,1m,10m (or 'none')")
+    parser.add_argument("--queries", default=",".join(QUERIES), help="comma list of " + ", ".join(QUERIES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (faster, no peak memory)")
+    parser.add_argument("--fast-path", action="store_true", help="let the LLM-free aggregate fast path answer")
+    parser.add_argument("--output", help="write JSON results to this path")
+    parser.add_argument("--compare", help="JSON results from an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    sizes = [] if args.sizes == "none" else [s.strip() for s in args.sizes.split(",") if s.strip()]
+    queries = [q.strip() for q in args.queries.split(",") if q.strip()]
+
+    agent = AnalyticsAgent()
+    agent.model = StubModel()
+
+    results = []
+    for dataset in datasets(sizes):
+        for query in queries:
+            runs = [run_once(agent, dataset, query, not args.no_memory, args.fast_path) for _ in range(args.repeat)]
+            results.append({"dataset": dataset["name"], "rows": dataset["rows"], "query": query, **summarize(runs)})
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "results": results,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+
+    print_report(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
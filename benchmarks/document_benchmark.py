@@ -0,0 +1,267 @@
+# benchmarks/document_benchmark.py
+"""
+End-to-end latency benchmark of the document agent (DocumentAgent.get_graph()) against the
+local stand-in RAG server, with a stubbed Groq client (no API keys or network needed).
+
+Run from the repository root:
+
+    python -m benchmarks.document_benchmark --concurrency 1,4,16 --requests 32 --output docbench.json
+    python -m benchmarks.document_benchmark --compare docbench.json        # later, on another commit
+    python -m benchmarks.document_benchmark --base-url http://127.0.0.1:8765   # an already running server
+
+The PDFs in uploads/ are used as the documents. Every request reports per-stage wall time
+(route, upload, query) and each concurrency level reports throughput and latency percentiles.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import subprocess
+from contextvars import ContextVar
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+# The backend reads these at import time; the stubs below make real values unnecessary
+os.environ.setdefault("GROQ_API_KEY", "benchmark-stub")
+os.environ.setdefault("RAG_API_KEY", "benchmark")
+os.environ.setdefault("API_BASE_URL", "http://127.0.0.1:8765")
+
+from benchmarks.fake_rag_server import create_app, DEFAULT_LATENCY_MS
+
+STAGES = ("route", "upload", "query")
+PROMPTS = {
+    "query": "What are the main obligations described in this document?",
+    "summarize": "Summarize this document",
+    "compare": "Compare the two documents I uploaded",
+}
+
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("document_benchmark_timings", default=None)
+
+
+class StubGroq:
+    """Stands in for the Groq client: answers routing prompts with the task, everything else with filler."""
+
+    def __init__(self, latency_ms: float):
+        self.latency_ms = latency_ms
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, max_tokens: int = 0, **kwargs):
+        time.sleep(self.latency_ms / 1000)  # the real client is synchronous too
+        prompt = messages[-1]["content"].lower()
+        if max_tokens <= 8:
+            content = "compare" if "compare" in prompt else "summarize" if "summar" in prompt else "query"
+        else:
+            content = "Stub answer."
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def timed(stage: str, func):
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            timings = _timings.get()
+            if timings is not None:
+                timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+    return wrapper
+
+
+def start_server(port: int, latency_ms: Dict[str, float]):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(create_app(latency_ms=latency_ms, seed=42),
+                                           host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Fake RAG server failed to start on port {port}")
+        time.sleep(0.05)
+    return server, thread
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def setup_sessions(pdfs: List[str]) -> List[str]:
+    """Register each PDF (and, for comparisons, the next one too) in its own benchmark session."""
+    from backend.utils.upload_catalog import upload_catalog
+
+    upload_catalog.catalog_file = os.path.join(tempfile.mkdtemp(prefix="docbench-"), "catalog.json")
+    sessions = []
+    for i, path in enumerate(pdfs):
+        session_id = f"docbench-{i}"
+        if len(pdfs) > 1:
+            other = pdfs[(i + 1) % len(pdfs)]
+            upload_catalog.register(session_id, other, os.path.basename(other))
+        upload_catalog.register(session_id, path, os.path.basename(path))
+        sessions.append(session_id)
+    return sessions
+
+
+async def run_level(graph, sessions: List[str], tasks: List[str], concurrency: int, requests: int,
+                    prerouted: bool) -> dict:
+    limit = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def one(i: int):
+        task = tasks[i % len(tasks)]
+        state = {
+            "input": PROMPTS[task],
+            "chat_id": sessions[i % len(sessions)],
+            "chat_history": [],
+            "task": task if prerouted else None,
+        }
+        async with limit:
+            timings: Dict[str, float] = {}
+            _timings.set(timings)
+            start = time.perf_counter()
+            result = await graph.ainvoke(state)
+            total = time.perf_counter() - start
+        response = result.get("response") or ""
+        failed = response.startswith(("Query error", "Summarization error", "❌"))
+        results.append({"task": task, "total_s": total, "error": response[:120] if failed else None,
+                        **{f"{stage}_s": timings.get(stage, 0.0) for stage in STAGES}})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - start
+
+    totals = [r["total_s"] for r in results]
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "wall_s": wall,
+        "throughput_rps": requests / wall,
+        "p50_s": percentile(totals, 0.5),
+        "p95_s": percentile(totals, 0.95),
+        "stages_s": {stage: statistics.mean(r[f"{stage}_s"] for r in results) for stage in STAGES},
+        "errors": sum(1 for r in results if r["error"]),
+        "first_error": next((r["error"] for r in results if r["error"]), None),
+    }
+
+
+def print_report(results: List[dict], baseline: Optional[dict] = None):
+    previous = {r["concurrency"]: r for r in (baseline or {}).get("results", [])}
+    header = (f"{'conc':>5}{'req/s':>9}{'p50':>9}{'p95':>9}"
+              + "".join(f"{stage:>9}" for stage in STAGES) + f"{'errors':>8}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        line = f"{r['concurrency']:>5}{r['throughput_rps']:>9.2f}{r['p50_s']:>9.3f}{r['p95_s']:>9.3f}"
+        line += "".join(f"{r['stages_s'][stage]:>9.3f}" for stage in STAGES)
+        line += f"{r['errors']:>8}"
+        old = previous.get(r["concurrency"])
+        if old:
+            change = (r["throughput_rps"] - old["throughput_rps"]) / old["throughput_rps"] * 100
+            line += f"   ({change:+.1f}% req/s vs {baseline.get('commit')})"
+        if r["first_error"]:
+            line += f"   ERROR: {r['first_error'][:60]}"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="DocumentAgent benchmark against a local stand-in RAG server")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma list of concurrency levels")
+    parser.add_argument("--requests", type=int, default=32, help="requests per concurrency level")
+    parser.add_argument("--tasks", default="query", help="comma list of query, summarize, compare")
+    parser.add_argument("--backend", choices=("remote", "local"), default="remote",
+                        help="document query/summary backend to exercise")
+    parser.add_argument("--prerouted", action="store_true", help="pass the task in, skipping the document router")
+    parser.add_argument("--llm-ms", type=float, default=300.0, help="latency of each stubbed Groq call")
+    parser.add_argument("--warm", action="store_true", help="keep uploads registered between levels")
+    parser.add_argument("--base-url", help="use an already running RAG server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    for endpoint, ms in DEFAULT_LATENCY_MS.items():
+        parser.add_argument(f"--{endpoint}-ms", type=float, default=ms, help=f"latency of the stand-in /{endpoint}")
+    parser.add_argument("--output", help="write JSON results to this path")
+    parser.add_argument("--compare", help="JSON results from an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    pdfs = sorted(glob.glob(os.path.join("uploads", "*.pdf")))
+    if not pdfs:
+        print("No PDFs found in uploads/")
+        return 1
+
+    # Both are read when the document agent is imported
+    os.environ["DOCUMENT_QUERY_BACKEND"] = args.backend
+    os.environ["DOCUMENT_SUMMARY_BACKEND"] = args.backend
+
+    import backend.agents.document_agent as document_module
+    from backend.utils.groq_client import groq_client
+    from backend.utils.rag_client import rag_client
+    from backend.utils.rag_registry import rag_registry
+
+    server = None
+    if args.base_url:
+        rag_client.base_url = args.base_url
+    else:
+        server, _ = start_server(args.port, {e: getattr(args, f"{e}_ms") for e in DEFAULT_LATENCY_MS})
+        rag_client.base_url = f"http://127.0.0.1:{args.port}"
+
+    groq_client.client = StubGroq(args.llm_ms)
+    document_module.DocumentAgent._router_node = timed("route", document_module.DocumentAgent._router_node)
+    rag_client.upload = timed("upload", rag_client.upload)
+    for endpoint in ("query", "summarize", "compare"):
+        setattr(rag_client, endpoint, timed("query", getattr(rag_client, endpoint)))
+
+    rag_registry.registry_file = os.path.join(tempfile.mkdtemp(prefix="docbench-"), "registry.json")
+    sessions = setup_sessions(pdfs)
+    graph = document_module.DocumentAgent().get_graph()
+    tasks = [t.strip() for t in args.tasks.split(",") if t.strip()]
+
+    results = []
+    try:
+        for level in [int(c) for c in args.concurrency.split(",") if c.strip()]:
+            if not args.warm:
+                rag_registry._entries.clear()  # every level pays for its uploads
+            results.append(asyncio.run(run_level(graph, sessions, tasks, level, args.requests, args.prerouted)))
+    finally:
+        if server is not None:
+            server.should_exit = True
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "backend": args.backend,
+        "tasks": tasks,
+        "documents": len(pdfs),
+        "results": results,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+
+    print(f"{len(pdfs)} PDFs, tasks={','.join(tasks)}, backend={args.backend}, stub LLM {args.llm_ms:.0f} ms\n")
+    print_report(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
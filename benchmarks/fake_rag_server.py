@@ -0,0 +1,125 @@
+# benchmarks/fake_rag_server.py
+"""
+Local stand-in for the remote RAG server (API_BASE_URL) with configurable latency and payload sizes.
+
+Implements the four endpoints the document agent calls:
+
+    POST /upload     files=<file>, chat_id=<str?>   -> {"filenames": [doc_id]}
+    POST /query      prompt, doc_id, chat_id        -> {"result": str}   (404 for unknown doc_id)
+    POST /summarize  filenames=[doc_id, ...]        -> [{"summary": str}]
+    POST /compare    filenames=[doc_id, doc_id]     -> {"comparison": str}
+
+Run from the repository root, then point the backend at it:
+
+    python -m benchmarks.fake_rag_server --port 8765 --query-ms 400 --summarize-ms 2500
+    API_BASE_URL=http://127.0.0.1:8765 RAG_API_KEY=dev uvicorn backend.main:app
+"""
+
+import sys
+import uuid
+import random
+import asyncio
+import argparse
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+
+DEFAULT_LATENCY_MS = {"upload": 300.0, "query": 400.0, "summarize": 2000.0, "compare": 2500.0}
+DEFAULT_RESPONSE_BYTES = {"query": 1200, "summarize": 3000, "compare": 4000}
+
+_FILLER = (
+    "The document states the obligations of each party, the applicable dates and the amounts due. "
+    "Relevant clauses are cited with their section numbers for reference. "
+)
+
+
+def _text(size: int, prefix: str) -> str:
+    body = (_FILLER * (size // len(_FILLER) + 1))[:max(size - len(prefix), 0)]
+    return prefix + body
+
+
+def create_app(latency_ms: Optional[Dict[str, float]] = None, response_bytes: Optional[Dict[str, int]] = None,
+               jitter: float = 0.2, upload_ms_per_mb: float = 50.0, seed: Optional[int] = None) -> FastAPI:
+    """FastAPI app whose endpoints sleep for their latency (± jitter) and return payloads of the given size."""
+    latency_ms = {**DEFAULT_LATENCY_MS, **(latency_ms or {})}
+    response_bytes = {**DEFAULT_RESPONSE_BYTES, **(response_bytes or {})}
+    rng = random.Random(seed)
+    documents: Dict[str, int] = {}  # doc_id -> size in bytes
+    counts: Dict[str, int] = {name: 0 for name in latency_ms}
+
+    app = FastAPI(title="Fake RAG server")
+
+    async def delay(endpoint: str, extra_ms: float = 0.0):
+        counts[endpoint] += 1
+        base = latency_ms[endpoint] + extra_ms
+        await asyncio.sleep(max(base * (1 + rng.uniform(-jitter, jitter)), 0) / 1000)
+
+    def require(doc_ids: List[str]):
+        missing = [doc_id for doc_id in doc_ids if doc_id not in documents]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Unknown document(s): {missing}")
+
+    @app.post("/upload")
+    async def upload(files: List[UploadFile] = File(...), chat_id: Optional[str] = Form(None)):
+        filenames, total = [], 0
+        for file in files:
+            size = 0
+            while chunk := await file.read(1024 * 1024):
+                size += len(chunk)
+            doc_id = f"{uuid.uuid4().hex[:8]}_{file.filename}"
+            documents[doc_id] = size
+            filenames.append(doc_id)
+            total += size
+        await delay("upload", upload_ms_per_mb * total / 1e6)
+        return {"filenames": filenames}
+
+    @app.post("/query")
+    async def query(prompt: str = Form(...), doc_id: str = Form(...), chat_id: str = Form(...)):
+        require([doc_id])
+        await delay("query")
+        return {"result": _text(response_bytes["query"], f"Answer to '{prompt[:80]}' from {doc_id}. ")}
+
+    @app.post("/summarize")
+    async def summarize(filenames: List[str] = Form(...)):
+        require(filenames)
+        await delay("summarize")
+        return [{"summary": _text(response_bytes["summarize"], f"Summary of {name}. ")} for name in filenames]
+
+    @app.post("/compare")
+    async def compare(filenames: List[str] = Form(...)):
+        require(filenames)
+        await delay("compare")
+        return {"comparison": _text(response_bytes["compare"], f"Comparison of {' and '.join(filenames)}. ")}
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": counts, "documents": len(documents)}
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the RAG server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    for endpoint, ms in DEFAULT_LATENCY_MS.items():
+        parser.add_argument(f"--{endpoint}-ms", type=float, default=ms, help=f"latency of /{endpoint}")
+    for endpoint, size in DEFAULT_RESPONSE_BYTES.items():
+        parser.add_argument(f"--{endpoint}-bytes", type=int, default=size, help=f"response size of /{endpoint}")
+    parser.add_argument("--upload-ms-per-mb", type=float, default=50.0, help="extra upload latency per MB received")
+    parser.add_argument("--jitter", type=float, default=0.2, help="relative latency jitter, e.g. 0.2 for ±20%%")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    app = create_app(
+        latency_ms={endpoint: getattr(args, f"{endpoint}_ms") for endpoint in DEFAULT_LATENCY_MS},
+        response_bytes={endpoint: getattr(args, f"{endpoint}_bytes") for endpoint in DEFAULT_RESPONSE_BYTES},
+        jitter=args.jitter,
+        upload_ms_per_mb=args.upload_ms_per_mb,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -960,6 +960,46 @@ class HPGPTClient {
                 this.prepareAssistantMessage();
             }
 
+            // 📊 Compact figure JSON is plotted beside the text so formatting passes don't wipe it
+            if (content.includes('class="hpgpt-figure"')) {
+                const figureHost = document.createElement("div");
+                figureHost.className = "message-figures";
+                figureHost.innerHTML = content;
+                this.currentMessageDiv.insertBefore(figureHost, this.currentMessageContent);
+                this.renderCompactFigures(figureHost);
+                return;
+            }
+
+            // 🧾 SQL result tables arrive in row chunks; later chunks extend the table with the same id
+            if (content.includes('class="hpgpt-table"')) {
+                const chunkHost = document.createElement("div");
+                chunkHost.innerHTML = content;
+                const chunk = chunkHost.querySelector(".hpgpt-table");
+                const existing = this.currentMessageDiv.querySelector(
+                    `.hpgpt-table[data-table-id="${chunk.dataset.tableId}"]`
+                );
+                if (existing) {
+                    this.appendTableRows(existing, chunk.dataset.rows);
+                    return;
+                }
+                const tableHost = document.createElement("div");
+                tableHost.className = "message-tables";
+                tableHost.appendChild(chunk);
+                this.currentMessageDiv.insertBefore(tableHost, this.currentMessageContent);
+                this.renderTables(tableHost);
+                return;
+            }
+
+            // 🎯 Approximate analytics answer: the exact result is fetched and shown once ready
+            if (content.includes('class="hpgpt-refinement"')) {
+                const refinementHost = document.createElement("div");
+                refinementHost.className = "message-refinements";
+                refinementHost.innerHTML = content;
+                this.currentMessageDiv.appendChild(refinementHost);
+                this.renderRefinements(refinementHost);
+                return;
+            }
+
             // ✅ Handle Plotly charts or raw HTML blocks
             if (content.startsWith("<div") || content.includes("plotly-graph-div")) {
                 this.currentMessageContent.insertAdjacentHTML("beforeend", content);
@@ -1234,6 +1274,10 @@ class HPGPTClient {
             Prism.highlightElement(block);
         });
 
+        this.renderCompactFigures(messageContent);
+        this.renderTables(messageContent);
+        this.renderRefinements(messageContent);
+
         // 📊 Ensure Plotly charts fit inside chat container
         const plotlyDivs = messageContent.querySelectorAll(".plotly-graph-div");
         plotlyDivs.forEach((div) => {
@@ -1262,6 +1306,130 @@ class HPGPTClient {
     }
 
     // ENHANCED: Prepare assistant message with formatting observer
+    // 📊 Plot compact figure payloads; downsampled ones get a full-resolution button
+    renderCompactFigures(container) {
+        container.querySelectorAll(".hpgpt-figure").forEach((figureDiv) => {
+            let figure;
+            try {
+                figure = JSON.parse(figureDiv.dataset.figure);
+            } catch (error) {
+                console.error("Invalid figure payload:", error);
+                return;
+            }
+
+            figureDiv.innerHTML = "";
+            figureDiv.style.width = "100%";
+            const plotDiv = document.createElement("div");
+            figureDiv.appendChild(plotDiv);
+            Plotly.newPlot(plotDiv, figure.data, figure.layout, { responsive: true });
+
+            const figureId = figureDiv.dataset.figureId;
+            if (figureDiv.dataset.downsampled === "true" && figureId) {
+                const fullResBtn = document.createElement("button");
+                fullResBtn.className = "figure-full-res-btn";
+                fullResBtn.textContent = "Load full resolution";
+                fullResBtn.addEventListener("click", async () => {
+                    fullResBtn.disabled = true;
+                    try {
+                        const response = await fetch(`http://localhost:8000/figures/${figureId}`);
+                        if (response.status === 404) {
+                            // Old full-resolution files are cleaned up on the server
+                            fullResBtn.textContent = "Full resolution no longer available";
+                            return;
+                        }
+                        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                        const fullFigure = await response.json();
+                        Plotly.react(plotDiv, fullFigure.data, fullFigure.layout, { responsive: true });
+                        fullResBtn.remove();
+                    } catch (error) {
+                        console.error("Failed to load full-resolution figure:", error);
+                        fullResBtn.disabled = false;
+                    }
+                });
+                figureDiv.appendChild(fullResBtn);
+            }
+        });
+    }
+
+    // 🧾 Build tables from SQL result payloads, merging the row chunks of each table
+    renderTables(container) {
+        const tables = {};
+        container.querySelectorAll(".hpgpt-table").forEach((tableDiv) => {
+            const tableId = tableDiv.dataset.tableId;
+            if (tables[tableId]) {
+                this.appendTableRows(tables[tableId], tableDiv.dataset.rows);
+                tableDiv.remove();
+                return;
+            }
+
+            let columns;
+            try {
+                columns = JSON.parse(tableDiv.dataset.columns || "[]");
+            } catch (error) {
+                console.error("Invalid table payload:", error);
+                return;
+            }
+
+            tableDiv.innerHTML = "";
+            const table = document.createElement("table");
+            const headerRow = table.createTHead().insertRow();
+            columns.forEach((column) => {
+                const th = document.createElement("th");
+                th.textContent = column;
+                headerRow.appendChild(th);
+            });
+            table.createTBody();
+            tableDiv.appendChild(table);
+            tables[tableId] = tableDiv;
+            this.appendTableRows(tableDiv, tableDiv.dataset.rows);
+        });
+    }
+
+    appendTableRows(tableDiv, rowsPayload) {
+        let rows;
+        try {
+            rows = JSON.parse(rowsPayload || "[]");
+        } catch (error) {
+            console.error("Invalid table rows:", error);
+            return;
+        }
+        const body = tableDiv.querySelector("tbody");
+        if (!body) return;
+        rows.forEach((row) => {
+            const tr = body.insertRow();
+            row.forEach((value) => {
+                tr.insertCell().textContent = value === null ? "NULL" : String(value);
+            });
+        });
+    }
+
+    // 🎯 Poll for the exact answer behind an approximate analytics reply
+    renderRefinements(container) {
+        container.querySelectorAll(".hpgpt-refinement").forEach(async (refinementDiv) => {
+            const refinementId = refinementDiv.dataset.refinementId;
+            refinementDiv.textContent = "⏳ Computing the exact result…";
+
+            for (let attempt = 0; attempt < 15; attempt++) {
+                try {
+                    const response = await fetch(`http://localhost:8000/analytics/refinements/${refinementId}?wait=20`);
+                    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                    const refinement = await response.json();
+                    if (refinement.status === "pending") continue;
+
+                    refinementDiv.textContent = refinement.status === "done"
+                        ? `✅ Exact result: ${refinement.summary}`
+                        : "⚠️ The exact result could not be computed.";
+                    return;
+                } catch (error) {
+                    console.error("Failed to fetch exact analytics result:", error);
+                    refinementDiv.remove();
+                    return;
+                }
+            }
+            refinementDiv.remove();
+        });
+    }
+
     prepareAssistantMessage() {
         this.currentMessageDiv = document.createElement('div');
         this.currentMessageDiv.className = 'message assistant typing-active';
@@ -1506,30 +1674,36 @@ class HPGPTClient {
 
     async handleFileUpload(event) {
         const files = Array.from(event.target.files);
+        if (files.length === 0) return;
 
+        // One request for the whole selection; processing continues on the server after it returns
+        const formData = new FormData();
         for (const file of files) {
-            const formData = new FormData();
-            formData.append('file', file);
+            formData.append('files', file);
+        }
 
-            try {
-                const response = await fetch(`http://localhost:8000/upload/${this.currentSessionId}`, {
-                    method: 'POST',
-                    body: formData
-                });
+        try {
+            const response = await fetch(`http://localhost:8000/uploads/${this.currentSessionId}`, {
+                method: 'POST',
+                body: formData
+            });
 
-                const result = await response.json();
+            const result = await response.json();
 
-                if (result.success) {
+            files.forEach((file, index) => {
+                const uploaded = (result.files || [])[index];
+                if (uploaded && uploaded.success) {
                     this.uploadedFiles.push({
                         name: file.name,
                         type: file.type,
-                        content: result.content
+                        file_id: uploaded.file_id,
+                        content: uploaded.content
                     });
-                    this.updateFileUploadArea();
                 }
-            } catch (error) {
-                console.error('File upload error:', error);
-            }
+            });
+            this.updateFileUploadArea();
+        } catch (error) {
+            console.error('File upload error:', error);
         }
 
         event.target.value = '';
@@ -0,0 +1,29 @@
+from backend.utils.column_refs import referenced_columns
+
+COLUMNS = ["Name", "Price", "Stock", "Category"]
+
+
+def test_named_columns_are_loaded():
+    assert referenced_columns('print(df["Price"].mean())', COLUMNS) == ["Price"]
+
+
+def test_drop_duplicates_without_subset_loads_every_column():
+    assert referenced_columns("print(len(df.drop_duplicates()))", COLUMNS) is None
+    assert referenced_columns('print(df.drop_duplicates()["Name"].nunique())', COLUMNS) is None
+
+
+def test_dropna_without_subset_loads_every_column():
+    assert referenced_columns('print(df.dropna()["Price"].mean())', COLUMNS) is None
+
+
+def test_subset_columns_are_loaded():
+    code = 'print(df.dropna(subset=["Stock"])["Price"].mean())'
+    assert referenced_columns(code, COLUMNS) == ["Price", "Stock"]
+    code = 'print(len(df.drop_duplicates(["Name", "Category"])))'
+    assert referenced_columns(code, COLUMNS) == ["Name", "Category"]
+    code = 'print(len(df.drop_duplicates(subset="Name")))'
+    assert referenced_columns(code, COLUMNS) == ["Name"]
+
+
+def test_computed_subset_loads_every_column():
+    assert referenced_columns("cols = ['Name']\nprint(len(df.dropna(subset=cols)))", COLUMNS) is None
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from backend.utils.fast_path import AggregateFastPath, FastQuery, column_categories, describe_result, entity_nouns
+
+CARS = pd.DataFrame({
+    "brand": ["Maruti", "Skoda", "Honda", "Maruti"],
+    "km_driven": [145500, 120000, 140000, 127000],
+    "fuel": ["Diesel", "Diesel", "Petrol", "Petrol"],
+    "year": [2014, 2006, 2010, 2020],
+    "selling_price": [450000, 370000, 158000, 225000],
+})
+
+
+def parse(prompt, df=CARS, file_name="28571346-2650-4bb9-901e-2942cc9b9a82_cars.csv"):
+    dtypes = {col: str(dtype) for col, dtype in df.dtypes.items()}
+    return AggregateFastPath().parse(prompt, list(df.columns), dtypes, column_categories(df, 50),
+                                     entity_nouns(file_name))
+
+
+@pytest.mark.parametrize("prompt", [
+    "average km driven excluding maruti",
+    "average selling price without diesel",
+    "average selling price of non diesel cars",
+    "total km driven except maruti",
+    "how many cars are not petrol",
+    "max selling price for brands other than honda",
+])
+def test_negated_filters_go_to_the_llm(prompt):
+    assert parse(prompt) is None
+
+
+def test_filter_is_still_parsed():
+    query = parse("average selling price of petrol cars")
+    assert query.kind == "aggregate" and query.filter == ("fuel", "petrol")
+
+
+@pytest.mark.parametrize("prompt", ["how many models", "how many dealers", "how many brands", "count of owners"])
+def test_counts_of_other_nouns_go_to_the_llm(prompt):
+    assert parse(prompt) is None
+
+
+def test_counts_of_other_nouns_on_a_second_dataset():
+    df = pd.DataFrame({"Make Name": ["Acura", "Audi"], "Model Year": [2020, 2021]})
+    assert parse("how many brands", df, "mileages-sample.csv") is None
+
+
+@pytest.mark.parametrize("prompt", ["how many rows", "how many records are there", "number of entries in dataset",
+                                    "how many cars", "how many are there"])
+def test_row_counts(prompt):
+    assert parse(prompt).kind == "count"
+
+
+def test_unknown_trailing_noun_goes_to_the_llm():
+    assert parse("average selling price of petrol dealers") is None
+
+
+def test_entity_nouns():
+    assert {"car", "cars"} <= entity_nouns("0817fe76-52d6-4dbc-9cc7-3444e887735e_used_cars.csv")
+    assert "sample" not in entity_nouns("mileages-sample.csv")
+
+
+def test_years_have_no_thousands_separator():
+    query = FastQuery("aggregate", value="year", agg="max")
+    assert describe_result(query, 2020) == "The maximum year is 2020."
+    assert describe_result(FastQuery("aggregate", value="year", agg="mean"), 2012.5) == "The average year is 2012.50."
+    assert describe_result(FastQuery("aggregate", value="km_driven", agg="sum"), 532500) == \
+        "The total km_driven is 532,500."
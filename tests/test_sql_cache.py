@@ -0,0 +1,53 @@
+import pytest
+
+from backend.utils.sql_cache import SqlTranslationCache
+
+USA_SQL = "SELECT c.* FROM Customer c WHERE c.Country = 'USA'"
+
+
+@pytest.fixture
+def cache():
+    return SqlTranslationCache()
+
+
+def test_rephrased_question_reuses_translation(cache):
+    cache.store("v1", "top 10 artists by sales", "SQL")
+    assert cache.lookup("v1", "show me the top 10 artists by sales") == "SQL"
+
+
+def test_filler_words_still_match(cache):
+    cache.store("v1", "top 10 artists by sales", "SQL")
+    assert cache.lookup("v1", "can you look up the top 10 artists by sales in the database") == "SQL"
+
+
+def test_different_numbers_do_not_match(cache):
+    cache.store("v1", "top 10 artists by sales", "SQL")
+    assert cache.lookup("v1", "top 5 artists by sales") is None
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("list customers from USA who bought rock tracks", "list customers not from USA who bought rock tracks"),
+    ("rock tracks by genre and album sorted by unit price in descending order with composer names",
+     "rock tracks by genre and album sorted by unit price in ascending order with composer names"),
+    ("which album by an american artist has the most rock tracks priced per unit on media type",
+     "which album by an american artist has the least rock tracks priced per unit on media type"),
+    ("customer name and country with the highest total invoice spend on rock genre tracks",
+     "customer name and country with the lowest total invoice spend on rock genre tracks"),
+    ("invoices from german customers billed before 2022 grouped by billing city with total amount",
+     "invoices from german customers billed after 2022 grouped by billing city with total amount"),
+    ("artists having more albums than tracks in rock genre with total album count by artist name",
+     "artists having less albums than tracks in rock genre with total album count by artist name"),
+    ("total invoice amount for customers from brazil in year 2010 grouped by billing city",
+     "total invoice amount for customers from germany in year 2010 grouped by billing city"),
+    ("number of tracks and total duration per album in the rock genre sorted by album title",
+     "number of tracks and total duration per album in the jazz genre sorted by album title"),
+])
+def test_questions_with_different_meaning_do_not_match(cache, stored, asked):
+    cache.store("v1", stored, USA_SQL)
+    assert cache.lookup("v1", asked) is None
+    assert cache.lookup("v1", stored) == USA_SQL
+
+
+def test_other_schema_version_does_not_match(cache):
+    cache.store("v1", "top 10 artists by sales", "SQL")
+    assert cache.lookup("v2", "top 10 artists by sales") is None